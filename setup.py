@@ -11,5 +11,6 @@ setup(
             "wnghub = wnghub.__main__:main",
         ],
     },
-    install_requires=["marshmallow==3.9.1", "click==7.1.2", "prettytable==2.0.0"],
+    install_requires=["marshmallow==3.9.1", "click==7.1.2"],
+    extras_require={"arrow": ["pyarrow"]},
 )
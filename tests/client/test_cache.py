@@ -0,0 +1,91 @@
+import multiprocessing
+import threading
+
+from wnghub.client.cache import SharedResponseCache
+from wnghub.client.github import GithubApiClient
+from wnghub.testing.server import FakeGithubServer, generate_notifications
+
+
+def test_get_or_fetch(tmp_path):
+    cache = SharedResponseCache(str(tmp_path), ttl=60)
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        return ["body", 2, None]
+
+    assert cache.get_or_fetch("a", fetch) == ["body", 2, None]
+    assert cache.get_or_fetch("a", fetch) == ["body", 2, None]
+    assert len(calls) == 1
+    cache.get_or_fetch("b", fetch)
+    assert len(calls) == 2
+    cache.clear()
+    cache.get_or_fetch("a", fetch)
+    assert len(calls) == 3
+
+
+def test_ttl(tmp_path):
+    cache = SharedResponseCache(str(tmp_path), ttl=0)
+    calls = []
+    cache.get_or_fetch("a", lambda: calls.append(1))
+    cache.get_or_fetch("a", lambda: calls.append(1))
+    assert len(calls) == 2
+
+
+def _fetch(url, directory, results):
+    client = GithubApiClient(
+        "token", api_url=url, shared_cache=SharedResponseCache(directory, ttl=60)
+    )
+    results.put(len(client.get_notifications(all=True, per_page=50)))
+
+
+def test_coalesces_concurrent_threads(tmp_path):
+    with FakeGithubServer(generate_notifications(80), latency=0.2) as server:
+        results = []
+
+        def fetch():
+            client = GithubApiClient(
+                "token",
+                api_url=server.url,
+                shared_cache=SharedResponseCache(str(tmp_path), ttl=60),
+            )
+            results.append(client.get_notifications(all=True, per_page=50))
+
+        threads = [threading.Thread(target=fetch) for _ in range(5)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert len(server.requests) == 1
+    assert all(r == results[0] for r in results)
+    assert len(results[0]) == 50
+
+
+def test_coalesces_concurrent_processes(tmp_path):
+    context = multiprocessing.get_context("fork")
+    results = context.Queue()
+    with FakeGithubServer(generate_notifications(80), latency=0.2) as server:
+        processes = [
+            context.Process(target=_fetch, args=(server.url, str(tmp_path), results))
+            for _ in range(5)
+        ]
+        for p in processes:
+            p.start()
+        for p in processes:
+            p.join()
+        assert len(server.requests) == 1
+    assert [results.get() for _ in processes] == [50] * 5
+
+
+def test_mark_read_clears_shared_cache(tmp_path):
+    with FakeGithubServer(generate_notifications(10)) as server:
+        client = GithubApiClient(
+            "token",
+            api_url=server.url,
+            shared_cache=SharedResponseCache(str(tmp_path), ttl=60),
+        )
+        notification = client.get_notifications(per_page=50)[0]
+        client.update_notification_status(notification)
+        client.clear_cache()
+        client.get_notifications(per_page=50)
+        assert [m for m, _ in server.requests] == ["GET", "PATCH", "GET"]
@@ -1 +1,121 @@
-pass
+from wnghub.client.github import (
+    GithubApiClient,
+    BadCredentialsError,
+    GithubHttpException,
+)
+from wnghub.testing.server import FakeGithubServer, generate_notifications
+import datetime
+import pytest
+import requests
+
+
+@pytest.fixture
+def server():
+    with FakeGithubServer(generate_notifications(250), auth_token="token") as s:
+        yield s
+
+
+@pytest.fixture
+def client(server):
+    c = GithubApiClient("token", api_url=server.url)
+    yield c
+    c.clear_cache()
+
+
+def test_get_notifications(client):
+    res = client.get_notifications(all=True, per_page=100, page=1)
+    assert len(res) == 100
+    assert res[0].updated_at > res[-1].updated_at
+    assert res[0].thread_id == "1000000"
+    assert res[0].repository.startswith("repo")
+    assert res[0].org.startswith("org")
+    assert res[0].html_url.startswith("https://github.com/")
+
+
+def test_get_notifications_pages(client):
+    pages = [
+        client.get_notifications(all=True, per_page=100, page=p) for p in (1, 2, 3, 4)
+    ]
+    assert [len(p) for p in pages] == [100, 100, 50, 0]
+
+
+def test_get_notifications_unread_only(client, server):
+    res = client.get_notifications(all=False, per_page=100, page=1)
+    assert all(n.unread for n in res)
+
+
+def test_get_notifications_since(client):
+    since = datetime.datetime(2020, 11, 19, 23, 0, tzinfo=datetime.timezone.utc)
+    res = client.get_notifications(all=True, since=since, per_page=100)
+    assert len(res) == 61
+
+
+def test_fetch_notifications_page_skips_cache(client, server):
+    first = client.fetch_notifications_page(all=True, per_page=100, page=1)
+    second = client.fetch_notifications_page(all=True, per_page=100, page=1)
+    assert len(first.notifications) == len(second.notifications) == 100
+    assert (first.next_page, first.last_page) == (2, 3)
+    assert len(server.requests) == 2
+    assert client.get_notifications_page.cache_info().currsize == 0
+
+
+def test_bad_credentials(server):
+    client = GithubApiClient("wrong", api_url=server.url)
+    with pytest.raises(BadCredentialsError):
+        client.get_notifications(all=True, page=5)
+
+
+def test_server_error(client, server):
+    server.fail_next()
+    with pytest.raises(GithubHttpException):
+        client.get_notifications(all=True, page=6)
+
+
+def test_update_notification_status(client, server):
+    n = client.get_notifications(all=False, per_page=1, page=1)[0]
+    client.update_notification_status(n)
+    assert server.notifications[n.thread_id]["unread"] is False
+    assert server.requests[-1] == (
+        "PATCH",
+        "/notifications/threads/{}".format(n.thread_id),
+    )
+
+
+def test_ignore_thread(client, server):
+    muted = client.get_notifications(all=True, per_page=1)[0]
+    client.ignore_thread(muted)
+    client.clear_cache()
+    res = client.get_notifications(all=True, per_page=100)
+    assert muted.thread_id not in [n.thread_id for n in res]
+    assert client.rate_limit_remaining is not None
+    with pytest.raises(GithubHttpException):
+        client.ignore_thread(type(muted)(thread_id="missing"))
+
+
+def test_unwatch_repository(client, server):
+    before = client.get_notifications(all=True, per_page=100)
+    n = before[0]
+    client.unwatch_repository(n.org, n.repository)
+    client.clear_cache()
+    after = client.get_notifications(all=True, per_page=100)
+    assert all(
+        m.reason != "subscribed"
+        for m in after
+        if (m.org, m.repository) == (n.org, n.repository)
+    )
+    assert server.requests[-2] == (
+        "DELETE",
+        "/repos/{}/{}/subscription".format(n.org, n.repository),
+    )
+
+
+def test_server_link_and_etag_headers(server):
+    headers = {"Authorization": "token token"}
+    url = server.url + "/notifications"
+    res = requests.get(url, params={"all": "true", "per_page": 100}, headers=headers)
+    assert 'rel="next"' in res.headers["Link"]
+    assert "page=3" in res.links["last"]["url"]
+    assert int(res.headers["X-RateLimit-Remaining"]) < 5000
+    headers["If-None-Match"] = res.headers["ETag"]
+    res = requests.get(url, params={"all": "true", "per_page": 100}, headers=headers)
+    assert res.status_code == 304
@@ -0,0 +1,35 @@
+from unittest.mock import patch
+
+import pytest
+from click.testing import CliRunner
+
+from wnghub.cli.base import cli
+from wnghub.config.config import Config
+from wnghub.controller.config import ConfigController
+
+
+def test_set_regexes_keeps_commas():
+    config = Config()
+    with patch.object(Config, "write"):
+        ConfigController(config).set("exclude_title_regexes", ["a{1,3}", "(?i)bump"])
+    assert config.exclude_title_regexes == ["a{1,3}", "(?i)bump"]
+
+
+def test_set_invalid_regex():
+    with patch.object(Config, "write"), pytest.raises(Exception):
+        ConfigController(Config()).set("exclude_title_regexes", ["(unclosed"])
+
+
+def test_set_config_cli_takes_one_value_per_regex():
+    config = Config()
+    with patch.object(Config, "read", return_value=config), patch.object(
+        Config, "write"
+    ):
+        runner = CliRunner()
+        res = runner.invoke(
+            cli, ["set-config", "exclude_title_regexes", "a{1,3}", "(?i)bump"]
+        )
+        assert res.exit_code == 0
+        assert config.exclude_title_regexes == ["a{1,3}", "(?i)bump"]
+        res = runner.invoke(cli, ["set-config", "exclude_repos", "a", "b"])
+        assert res.exit_code != 0
@@ -0,0 +1,118 @@
+import threading
+import time
+from unittest.mock import Mock
+
+from wnghub.client.github import GithubHttpException
+from wnghub.config.config import Config
+from wnghub.controller.actions import ActionQueueController, UnknownActionError
+from wnghub.controller.readstate import ReadStateController
+from wnghub.model.notification import Notification
+from wnghub.store.actions import (
+    IGNORE_THREAD,
+    MARK_READ,
+    UNWATCH_REPOSITORY,
+    SqliteActionQueue,
+)
+
+
+def _client():
+    return Mock(rate_limit_remaining=None, rate_limit_reset=None)
+
+
+def test_bounded_concurrency():
+    lock = threading.Lock()
+    in_flight = []
+    peak = []
+
+    def update(notification):
+        with lock:
+            in_flight.append(notification.thread_id)
+            peak.append(len(in_flight))
+        time.sleep(0.01)
+        with lock:
+            in_flight.remove(notification.thread_id)
+
+    client = _client()
+    client.update_notification_status.side_effect = update
+    actions = ActionQueueController(
+        client, Config(), SqliteActionQueue(":memory:"), concurrency=3
+    )
+    for i in range(12):
+        actions.enqueue(str(i), MARK_READ)
+    assert actions.drain(timeout=5)
+    assert client.update_notification_status.call_count == 12
+    assert max(peak) <= 3
+    assert actions.queue.count() == 0
+
+
+def test_retries_then_fails():
+    client = _client()
+    client.update_notification_status.side_effect = GithubHttpException("down")
+    actions = ActionQueueController(
+        client, Config(), SqliteActionQueue(":memory:"), max_attempts=3, backoff=0.001
+    )
+    errors = []
+    actions.add_listener(lambda action, e: errors.append(e))
+    actions.enqueue("1", MARK_READ)
+    assert actions.drain(timeout=5)
+    assert client.update_notification_status.call_count == 3
+    assert len(errors) == 1
+    assert [a.error for a in actions.queue.failed()] == ["down"]
+
+
+def test_pauses_when_rate_limit_is_low():
+    client = _client()
+    client.rate_limit_remaining = 10
+    client.rate_limit_reset = time.time() + 0.2
+    actions = ActionQueueController(
+        client, Config(), SqliteActionQueue(":memory:"), rate_limit_reserve=50
+    )
+    actions.enqueue("1", MARK_READ)
+    start = time.monotonic()
+    assert actions.drain(timeout=5)
+    assert time.monotonic() - start >= 0.15
+
+
+def test_mute():
+    client = _client()
+    actions = ActionQueueController(client, Config(), SqliteActionQueue(":memory:"))
+    notifications = [
+        Notification(thread_id="1", org="apache", repository="spark"),
+        Notification(thread_id="2", org="apache", repository="spark"),
+        Notification(thread_id="2", org="apache", repository="spark"),
+        Notification(thread_id="3", org="apache", repository="arrow"),
+    ]
+    assert actions.mute(notifications) == ["1", "2", "3"]
+    assert actions.mute(notifications, repositories=True) == [
+        "apache/spark",
+        "apache/arrow",
+    ]
+    assert len(actions.queue.pending(IGNORE_THREAD)) == 3
+    assert len(actions.queue.pending(UNWATCH_REPOSITORY)) == 2
+    assert actions.drain(timeout=5)
+    assert client.ignore_thread.call_count == 3
+    client.unwatch_repository.assert_any_call("apache", "arrow")
+
+
+def test_unknown_action():
+    actions = ActionQueueController(_client(), Config(), SqliteActionQueue(":memory:"))
+    try:
+        actions.enqueue("1", "explode")
+        assert False
+    except UnknownActionError:
+        pass
+
+
+def test_read_state_resumes_queued_actions(tmp_path):
+    path = str(tmp_path / "wnghub.db")
+    queue = SqliteActionQueue(path)
+    queue.enqueue("1", MARK_READ, {"updated_at": "2020-11-01T00:00:00+00:00"})
+    queue.close()
+    client = _client()
+    actions = ActionQueueController(client, Config(), SqliteActionQueue(path))
+    read_state = ReadStateController(client, Config(), actions=actions)
+    assert read_state.pending() == ["1"]
+    actions.start()
+    assert read_state.flush(timeout=5)
+    client.update_notification_status.assert_called_once()
+    assert client.update_notification_status.call_args[0][0].thread_id == "1"
@@ -0,0 +1,283 @@
+from wnghub.client.github import GithubApiClient, NotificationsPage
+from wnghub.config.config import Config
+from wnghub.controller import github as github_controller
+from wnghub.controller.github import GithubController, _page_size
+from wnghub.controller.pipeline import FILTER, SINK, BatchStage, ItemStage, Pipeline
+from wnghub.testing.server import FakeGithubServer, generate_notifications
+from wnghub.model.notification import Notification
+from wnghub.store.sqlite import SqliteNotificationStore
+from unittest.mock import Mock
+import datetime
+import threading
+import tracemalloc
+import pytest
+
+
+def _notification(thread_id, unread=True, day=1, repository="airflow"):
+    return Notification(
+        thread_id=thread_id,
+        repository=repository,
+        is_pull=True,
+        unread=unread,
+        updated_at=datetime.datetime(2020, 11, day, tzinfo=datetime.timezone.utc),
+    )
+
+
+def test_get_notifications_saves_to_store():
+    store = SqliteNotificationStore(":memory:")
+    client = Mock(max_per_page=100)
+    client.get_notifications_page.return_value = NotificationsPage([_notification("1")])
+    controller = GithubController(client, Config(), store=store)
+    assert len(controller.get_notifications()) == 1
+    assert store.count() == 1
+    assert store.synced_at() is not None
+
+
+def test_get_notifications_marks_read_elsewhere():
+    store = SqliteNotificationStore(":memory:")
+    store.save([_notification("1"), _notification("2"), _notification("3", day=2)])
+    client = Mock(max_per_page=100)
+    client.get_notifications_page.return_value = NotificationsPage(
+        [_notification("1"), _notification("3", day=2)]
+    )
+    controller = GithubController(client, Config(), store=store)
+    # Filtered results don't matter, only what Github returned
+    controller.get_notifications(query="repo:nope")
+    assert [n.thread_id for n in store.unread_notifications()] == ["3", "1"]
+    assert store.unread_counts()["unread"] == 2
+    # Nothing is known to be read after fetching only some notifications
+    client.get_notifications_page.return_value = NotificationsPage([])
+    controller.get_notifications(all=True)
+    controller.get_notifications(participating=True)
+    controller.get_notifications(since=datetime.datetime(2020, 11, 2))
+    assert store.unread_counts()["unread"] == 2
+
+
+def test_get_stored_notifications():
+    store = SqliteNotificationStore(":memory:")
+    store.save(
+        [
+            _notification("1", day=3),
+            _notification("2", unread=False, day=2),
+            _notification("3", day=1, repository="docs"),
+        ]
+    )
+    controller = GithubController(Mock(), Config(), store=store)
+    res = controller.get_stored_notifications(num_results=5)
+    assert [n.thread_id for n in res] == ["1", "3"]
+    res = controller.get_stored_notifications(all=True, query="repo:airflow")
+    assert [n.thread_id for n in res] == ["1", "2"]
+    res = controller.get_stored_notifications(since=datetime.datetime(2020, 11, 2))
+    assert [n.thread_id for n in res] == ["1"]
+    controller.client.get_notifications.assert_not_called()
+
+
+def test_get_ranked_notifications():
+    store = SqliteNotificationStore(":memory:")
+    notifications = [_notification(str(i), day=10 + i) for i in range(10)]
+    notifications[0].reason = "review_requested"
+    notifications[1].repository = "spark"
+    store.save(notifications)
+    config = Config(repo_weights={"spark": 100.0}, score_half_life_hours=24 * 365)
+    controller = GithubController(Mock(), config, store=store)
+    res = controller.get_ranked_notifications(stored=True, num_results=3)
+    assert [n.thread_id for n in res] == ["1", "0", "9"]
+    # Only the most recent `pool` notifications are ranked
+    res = controller.get_ranked_notifications(stored=True, num_results=1, pool=5)
+    assert [n.thread_id for n in res] == ["9"]
+    controller.client.get_notifications_page.assert_not_called()
+
+
+def test_refresh_notifications_deadline():
+    release = threading.Event()
+    client = Mock(max_per_page=100)
+    client.get_notifications_page.side_effect = lambda **kwargs: release.wait() and []
+    controller = GithubController(client, Config())
+    assert controller.refresh_notifications(0.01) is None
+    release.set()
+
+
+def test_refresh_notifications_error():
+    client = Mock(max_per_page=100)
+    client.get_notifications_page.side_effect = ValueError("offline")
+    controller = GithubController(client, Config())
+    with pytest.raises(ValueError):
+        controller.refresh_notifications(1)
+
+
+def test_page_size():
+    assert _page_size(5, 1.0, 100) == 10
+    assert _page_size(5, 0.0, 100) == 100
+    assert _page_size(50, 0.1, 100) == 100
+    assert _page_size(10, 0.5, 100) == 25
+    assert _page_size(2, 0.5, 100, minimum=10) == 10
+
+
+def _fetch(server, **kwargs):
+    client = GithubApiClient("token", api_url=server.url)
+    controller = GithubController(client, Config())
+    try:
+        res = controller.get_notifications(all=True, **kwargs)
+    finally:
+        client.clear_cache()
+    pages = [path for method, path in server.requests if method == "GET"]
+    return res, pages
+
+
+def test_get_notifications_small_unfiltered_page():
+    with FakeGithubServer(generate_notifications(500)) as server:
+        res, pages = _fetch(server, num_results=5)
+    assert len(res) == 5
+    assert len(pages) == 1
+
+
+def test_get_notifications_no_empty_last_page():
+    with FakeGithubServer(generate_notifications(200)) as server:
+        res, pages = _fetch(server, num_results=1000)
+    assert len(res) == 200
+    assert len(pages) == 2
+
+
+def _paging_client(notifications):
+    """
+    Mock client serving notifications in pages, recording page sizes.
+    """
+    client = Mock(max_per_page=100)
+    client.requests = []
+
+    def get_page(page=1, per_page=10, **kwargs):
+        client.requests.append((page, per_page))
+        start = (page - 1) * per_page
+        has_next = start + per_page < len(notifications)
+        return NotificationsPage(
+            notifications[start : start + per_page],  # noqa
+            page=page,
+            next_page=page + 1 if has_next else None,
+        )
+
+    client.get_notifications_page.side_effect = get_page
+    return client
+
+
+def test_get_notifications_adapts_page_size():
+    notifications = generate_notifications(500)
+    expected = [n["id"] for n in notifications if n["repository"]["name"] == "repo3"]
+    with FakeGithubServer(notifications) as server:
+        res, pages = _fetch(server, num_results=30, query="repo:repo3")
+    assert [n.thread_id for n in res] == expected[0:30]
+    # Nothing known to pass, so pages are full
+    assert len(pages) == 4
+
+
+def test_get_notifications_grows_page_over_fetched_ones(monkeypatch):
+    notifications = [_notification(str(i)) for i in range(500)]
+    for i in (0, 2, 4, 6, 8, 150, 151):
+        notifications[i].title = "keep"
+    client = _paging_client(notifications)
+    controller = GithubController(client, Config())
+    # Assume everything passes at first, then learn that few do
+    monkeypatch.setattr(github_controller, "_passes_everything", lambda f: True)
+    res = controller.get_notifications(num_results=7, query="title:keep")
+    assert [n.thread_id for n in res] == ["0", "2", "4", "6", "8", "150", "151"]
+    assert client.requests[0] == (1, 10)
+    # Pages grow past the size of earlier ones instead of being pinned to it
+    assert max(per_page for _, per_page in client.requests) == 100
+    assert client.requests == [(1, 10), (2, 10), (1, 100), (2, 100)]
+
+
+def test_get_notifications_local_filters_start_with_full_page():
+    class KeepFew(ItemStage):
+        kind = FILTER
+
+        def process_item(self, notification):
+            return int(notification.thread_id) % 20 == 0
+
+    client = _paging_client([_notification(str(i)) for i in range(500)])
+    controller = GithubController(client, Config(), pipeline=Pipeline([KeepFew()]))
+    res = controller.get_notifications(num_results=5)
+    assert [n.thread_id for n in res] == ["0", "20", "40", "60", "80"]
+    assert client.requests == [(1, 100)]
+
+
+def test_iter_notifications_streams_pages_within_memory_budget():
+    collected = []
+
+    class Collect(BatchStage):
+        kind = SINK
+
+        def process(self, notifications):
+            collected.append(len(notifications))
+
+    with FakeGithubServer(generate_notifications(250)) as server:
+        client = GithubApiClient("token", api_url=server.url)
+        client.clear_cache()
+        store = SqliteNotificationStore(":memory:")
+        config = Config(auth_token="token", memory_budget_mb=0.05)
+        controller = GithubController(
+            client, config, store=store, pipeline=Pipeline([Collect()])
+        )
+        res = list(controller.iter_notifications(all=True, num_results=1000))
+        assert GithubApiClient.get_notifications_page.cache_info().currsize == 0
+    assert len(res) == 250
+    assert store.count() == 250
+    updated = [n.updated_at for n in res]
+    assert updated == sorted(updated, reverse=True)
+    # Sinks get chunks of results within the budget, not everything at once
+    assert len(collected) > 1
+    assert sum(collected) == 250
+
+
+def test_iter_notifications_peak_memory():
+    def get_page(page=1, per_page=10, **kwargs):
+        # Made on demand, so only what the controller keeps is traced
+        start = (page - 1) * per_page
+        end = min(start + per_page, 20000)
+        return NotificationsPage(
+            [
+                Notification(
+                    thread_id=str(i),
+                    title="Notification number {}".format(i),
+                    repository="airflow",
+                    is_pull=True,
+                    updated_at=datetime.datetime(2020, 11, 1),
+                )
+                for i in range(start, end)
+            ],
+            page=page,
+            next_page=page + 1 if end < 20000 else None,
+        )
+
+    client = Mock(max_per_page=100)
+    client.fetch_notifications_page.side_effect = get_page
+    config = Config(memory_budget_mb=1.0)
+    controller = GithubController(client, config)
+    tracemalloc.start()
+    try:
+        count = sum(
+            1 for _ in controller.iter_notifications(all=True, num_results=20000)
+        )
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    assert count == 20000
+    assert peak < 2**20
+
+
+def test_iter_notifications_without_budget():
+    client = Mock(max_per_page=100)
+    client.fetch_notifications_page.return_value = NotificationsPage(
+        [_notification("1"), _notification("2", day=2)]
+    )
+    collected = []
+
+    class Collect(BatchStage):
+        kind = SINK
+
+        def process(self, notifications):
+            collected.append([n.thread_id for n in notifications])
+
+    controller = GithubController(client, Config(), pipeline=Pipeline([Collect()]))
+    assert [n.thread_id for n in controller.iter_notifications()] == ["1", "2"]
+    # Fits in the default budget, so sinks get it in one chunk
+    assert collected == [["1", "2"]]
+    client.get_notifications_page.assert_not_called()
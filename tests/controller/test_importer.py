@@ -0,0 +1,35 @@
+from wnghub.client.github import GithubApiClient
+from wnghub.config.config import Config
+from wnghub.controller.importer import (
+    NotificationImportController,
+    parse_notifications_page,
+)
+from wnghub.store.sqlite import SqliteNotificationStore
+from wnghub.testing.server import FakeGithubServer, generate_notifications
+import json
+import pytest
+
+
+def test_parse_notifications_page():
+    records = parse_notifications_page(json.dumps(generate_notifications(3)))
+    assert len(records) == 3
+    assert all(isinstance(r, tuple) for r in records)
+    assert records[0][0] == "1000000"
+
+
+@pytest.mark.parametrize("parse_workers", [0, 2])
+def test_import(parse_workers):
+    store = SqliteNotificationStore(":memory:")
+    with FakeGithubServer(generate_notifications(1050)) as server:
+        client = GithubApiClient("token", api_url=server.url)
+        controller = NotificationImportController(
+            client, Config(), store, fetch_workers=3, parse_workers=parse_workers
+        )
+        result = controller.run()
+        requests = len(server.requests)
+    assert result.pages == 11
+    assert result.notifications == 1050
+    assert result.changed == 1050
+    assert requests == 11
+    assert store.count() == 1050
+    assert store.synced_at() is not None
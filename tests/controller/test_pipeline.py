@@ -0,0 +1,220 @@
+from wnghub.client.github import NotificationsPage
+from wnghub.config.config import Config
+from wnghub.controller import pipeline as pipeline_module
+from wnghub.controller.github import GithubController
+from wnghub.controller.pipeline import (
+    ENRICH,
+    FILTER,
+    SCORE,
+    SINK,
+    BatchStage,
+    ItemStage,
+    Pipeline,
+    PipelineError,
+)
+from wnghub.model.notification import Notification
+from wnghub.store.sqlite import SqliteNotificationStore
+from unittest.mock import Mock
+import pytest
+
+
+def _notifications(n, repository="airflow", start=0):
+    return [
+        Notification(
+            thread_id=str(start + i),
+            repository=repository,
+            is_pull=True,
+            title="title {}".format(i),
+        )
+        for i in range(n)
+    ]
+
+
+class DropOdd(ItemStage):
+    kind = FILTER
+
+    def process_item(self, notification):
+        return int(notification.thread_id) % 2 == 0
+
+
+class Shout(ItemStage):
+    kind = ENRICH
+
+    def process_item(self, notification):
+        notification.title = notification.title.upper()
+        return notification
+
+
+class CountPages(BatchStage):
+    kind = FILTER
+
+    def __init__(self, config=None):
+        BatchStage.__init__(self, config)
+        self.pages = []
+
+    def process(self, notifications):
+        self.pages.append(len(notifications))
+        return notifications
+
+
+class ByThreadId(ItemStage):
+    kind = SCORE
+
+    def process_item(self, notification):
+        return int(notification.thread_id)
+
+
+class Collect(BatchStage):
+    kind = SINK
+
+    def __init__(self, config=None):
+        BatchStage.__init__(self, config)
+        self.collected = []
+
+    def process(self, notifications):
+        self.collected.extend(notifications)
+
+
+def test_stages_run_in_order_of_kind():
+    calls = []
+
+    class Record(BatchStage):
+        def process(self, notifications):
+            calls.append(self.kind)
+            return notifications
+
+    stages = []
+    for kind in (SINK, SCORE, FILTER, ENRICH):
+        stage = Record()
+        stage.kind = kind
+        stages.append(stage)
+    pipeline = Pipeline(stages)
+    pipeline.finish(pipeline.process_page(_notifications(2)))
+    assert calls == [ENRICH, FILTER, SCORE, SINK]
+
+
+def test_item_stages():
+    collect = Collect()
+    pipeline = Pipeline([collect, ByThreadId(), DropOdd(), Shout()])
+    res = pipeline.finish(pipeline.process_page(_notifications(6)))
+    assert [n.thread_id for n in res] == ["4", "2", "0"]
+    assert res[0].title == "TITLE 4"
+    assert collect.collected == res
+
+
+def test_item_stages_of_a_kind_are_fused():
+    pipeline = Pipeline([DropOdd(), DropOdd(), Shout(), CountPages(), DropOdd()])
+    # enrich, fused filters, batch filter, filter
+    assert len(pipeline._page_steps) == 4
+    res = pipeline.process_page(_notifications(4))
+    assert [n.thread_id for n in res] == ["0", "2"]
+
+
+def test_unknown_kind():
+    stage = Shout()
+    stage.kind = "decode"
+    with pytest.raises(PipelineError):
+        Pipeline([stage])
+
+
+def test_stage_must_be_batch_or_item_stage():
+    class Half(ItemStage):
+        pass
+
+    with pytest.raises(TypeError):
+        Half()
+    with pytest.raises(PipelineError):
+        Pipeline([object()])
+
+
+def test_empty_pipeline():
+    pipeline = Pipeline()
+    assert not pipeline
+    notifications = _notifications(3)
+    assert pipeline.finish(pipeline.process_page(notifications)) == notifications
+
+
+def test_discover(monkeypatch):
+    class EntryPoint(object):
+        def __init__(self, name, obj):
+            self.name = name
+            self.obj = obj
+
+        def load(self):
+            return self.obj
+
+    def broken(config):
+        raise ImportError("No module named 'mypackage'")
+
+    monkeypatch.setattr(
+        pipeline_module,
+        "_entry_points",
+        lambda: [
+            EntryPoint("drop-odd", DropOdd),
+            EntryPoint("shout", Shout),
+            EntryPoint("broken", broken),
+            EntryPoint("not-a-stage", lambda config: object()),
+        ],
+    )
+    config = Config(disabled_stages=["shout"])
+    pipeline = Pipeline.discover(config)
+    assert [s.name for s in pipeline.stages] == ["drop-odd"]
+    assert pipeline.stages[0].config is config
+    assert pipeline.errors == [
+        "Skipped stage broken: No module named 'mypackage'",
+        "Skipped stage not-a-stage: Stage object is neither a BatchStage nor an "
+        "ItemStage",
+    ]
+
+
+def test_get_notifications_runs_batch_stages_once_per_page():
+    counter = CountPages()
+    collect = Collect()
+    client = Mock(max_per_page=4)
+    client.get_notifications_page.side_effect = [
+        NotificationsPage(_notifications(4), next_page=2),
+        NotificationsPage(
+            _notifications(4, repository="spark", start=4), next_page=None
+        ),
+    ]
+    controller = GithubController(
+        client, Config(), pipeline=Pipeline([counter, DropOdd(), collect])
+    )
+    res = controller.get_notifications(num_results=10)
+    assert counter.pages == [4, 4]
+    assert [(n.repository, n.thread_id) for n in res] == [
+        ("airflow", "0"),
+        ("airflow", "2"),
+        ("spark", "4"),
+        ("spark", "6"),
+    ]
+    assert collect.collected == res
+
+
+def test_get_ranked_notifications_skips_score_stages():
+    store = SqliteNotificationStore(":memory:")
+    notifications = _notifications(5)
+    notifications[0].reason = "review_requested"
+    store.save(notifications)
+    collect = Collect()
+    controller = GithubController(
+        Mock(), Config(), store=store, pipeline=Pipeline([ByThreadId(), collect])
+    )
+    res = controller.get_ranked_notifications(stored=True, num_results=2)
+    # Ranked by the scorer, not undone by score stages
+    assert res[0].thread_id == "0"
+    assert collect.collected == res
+
+
+def test_get_stored_notifications_runs_pipeline_in_pages():
+    store = SqliteNotificationStore(":memory:")
+    store.save(_notifications(25))
+    counter = CountPages()
+    controller = GithubController(
+        Mock(), Config(), store=store, pipeline=Pipeline([DropOdd(), counter])
+    )
+    controller.stored_page_size = 10
+    res = controller.get_stored_notifications(num_results=8)
+    assert len(res) == 8
+    assert all(int(n.thread_id) % 2 == 0 for n in res)
+    assert counter.pages == [5, 5]
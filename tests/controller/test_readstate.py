@@ -0,0 +1,89 @@
+import datetime
+import threading
+from unittest.mock import Mock
+
+from wnghub.client.github import GithubHttpException, NotificationsPage
+from wnghub.config.config import Config
+from wnghub.controller.github import GithubController
+from wnghub.controller.readstate import ReadStateController
+from wnghub.model.notification import Notification
+from wnghub.store.sqlite import SqliteNotificationStore
+
+
+def _notification(thread_id, hour=0, unread=True):
+    return Notification(
+        thread_id=thread_id,
+        title="Notification " + thread_id,
+        updated_at=datetime.datetime(2020, 11, 1, hour, tzinfo=datetime.timezone.utc),
+        unread=unread,
+        is_issue=True,
+    )
+
+
+def test_mark_read_is_optimistic():
+    store = SqliteNotificationStore(":memory:")
+    store.save([_notification("1"), _notification("2")])
+    delivered = threading.Event()
+    client = Mock()
+    client.update_notification_status.side_effect = lambda n: delivered.wait(5)
+    read_state = ReadStateController(client, Config(), store=store)
+    read_state.mark_read(_notification("1"))
+    # Stored state changed before Github was told
+    assert {n.thread_id: n.unread for n in store.notifications()} == {
+        "1": False,
+        "2": True,
+    }
+    assert read_state.pending() == ["1"]
+    delivered.set()
+    assert read_state.flush(timeout=5)
+    assert read_state.pending() == []
+    client.update_notification_status.assert_called_once()
+
+
+def test_retries_then_reverts():
+    store = SqliteNotificationStore(":memory:")
+    client = Mock()
+    client.update_notification_status.side_effect = GithubHttpException("down")
+    read_state = ReadStateController(
+        client, Config(), store=store, max_attempts=3, backoff=0.001
+    )
+    errors = []
+    read_state.add_listener(lambda n, e: errors.append(e))
+    read_state.mark_read(_notification("1"))
+    assert read_state.flush(timeout=5)
+    assert client.update_notification_status.call_count == 3
+    assert len(errors) == 1
+    assert store.notifications()[0].unread is True
+    assert read_state.reconcile([_notification("1")])[0].unread is True
+
+
+def test_reconcile():
+    client = Mock()
+    block = threading.Event()
+    client.update_notification_status.side_effect = lambda n: block.wait(5)
+    read_state = ReadStateController(client, Config())
+    read_state.mark_read(_notification("1"))
+    read_state.mark_read(_notification("2"))
+    fetched = [_notification("1"), _notification("2", hour=1), _notification("3")]
+    # Still pending: local state wins, unless there was newer activity
+    assert [n.unread for n in read_state.reconcile(fetched)] == [False, True, True]
+    block.set()
+    read_state.flush(timeout=5)
+    # Delivered, but Github hasn't caught up yet
+    assert read_state.reconcile([_notification("1")])[0].unread is False
+    # Github caught up, so local state is dropped
+    read_state.reconcile([_notification("1", unread=False)])
+    assert read_state.reconcile([_notification("1")])[0].unread is True
+
+
+def test_github_controller_applies_read_state():
+    client = Mock(max_per_page=100)
+    client.get_notifications_page.return_value = NotificationsPage(
+        [_notification("1"), _notification("2")]
+    )
+    read_state = ReadStateController(Mock(), Config())
+    read_state.mark_read(_notification("1"))
+    controller = GithubController(client, Config(), read_state=read_state)
+    assert [n.thread_id for n in controller.get_notifications()] == ["2"]
+    res = controller.get_notifications(all=True)
+    assert [(n.thread_id, n.unread) for n in res] == [("1", False), ("2", True)]
@@ -0,0 +1,118 @@
+import datetime
+
+from wnghub.config.config import Config
+from wnghub.controller.stats import StatsController
+from wnghub.controller.view import NotificationViewController
+from wnghub.model.notification import Notification
+from wnghub.store.sqlite import SqliteNotificationStore
+
+TODAY = datetime.date(2020, 11, 30)
+
+
+def _notification(thread_id, repository, days_ago, reason="subscribed", unread=True):
+    updated_at = datetime.datetime.combine(
+        TODAY - datetime.timedelta(days=days_ago),
+        datetime.time(12),
+        datetime.timezone.utc,
+    )
+    return Notification(
+        thread_id=thread_id,
+        org="apache",
+        repository=repository,
+        reason=reason,
+        updated_at=updated_at,
+        unread=unread,
+    )
+
+
+def _store():
+    store = SqliteNotificationStore(":memory:")
+    store.save(
+        [
+            _notification("1", "spark", 0),
+            _notification("2", "spark", 0, reason="mention"),
+            _notification("3", "spark", 10),
+            _notification("4", "arrow", 3, reason="review_requested"),
+            _notification("5", "arrow", 45, reason="review_requested"),
+            _notification("6", "arrow", 2, reason="review_requested", unread=False),
+            _notification("7", "airflow", 100),
+        ]
+    )
+    return store
+
+
+def test_compute():
+    stats = StatsController(Config(), _store()).compute(days=30, today=TODAY)
+    assert stats.since == datetime.date(2020, 11, 1)
+    assert [
+        (r.repository, r.total, r.last_7_days, r.busiest_day, r.busiest)
+        for r in stats.repositories
+    ] == [
+        ("apache/spark", 3, 2, "2020-11-30", 2),
+        ("apache/arrow", 2, 2, "2020-11-27", 1),
+    ]
+    assert stats.repositories[0].per_day == 0.1
+    # Backlog covers all history, not just the window
+    assert stats.review_backlog == {
+        "< 1 day": 0,
+        "1-7 days": 1,
+        "7-30 days": 0,
+        "30+ days": 1,
+    }
+    assert stats.oldest_review_request == 45
+    assert stats.reads == 0
+
+
+def test_compute_counts_activity_days_and_request_age():
+    store = _store()
+    # More activity on a review request, and on an older notification
+    store.save(
+        [
+            _notification("5", "arrow", 1, reason="review_requested"),
+            _notification("3", "spark", 0),
+        ]
+    )
+    stats = StatsController(Config(), store).compute(days=30, today=TODAY)
+    spark = stats.repositories[0]
+    # Still counted on the day of its earlier update
+    assert (spark.repository, spark.total, spark.busiest) == ("apache/spark", 4, 3)
+    assert stats.repositories[1].total == 3
+    # Age is from when review was requested, not from the last update
+    assert stats.review_backlog["30+ days"] == 1
+    assert stats.oldest_review_request == 45
+    # Reading the request and having it requested again starts over
+    store.save(
+        [_notification("5", "arrow", 1, reason="review_requested", unread=False)]
+    )
+    store.save([_notification("5", "arrow", 0, reason="review_requested")])
+    stats = StatsController(Config(), store).compute(days=30, today=TODAY)
+    assert stats.review_backlog["< 1 day"] == 1
+    assert stats.oldest_review_request == 3
+
+
+def test_compute_window_from_config():
+    config = Config(
+        only_include_since=datetime.datetime(2020, 8, 1),
+        only_include_before=datetime.datetime(2020, 9, 1),
+    )
+    stats = StatsController(config, _store()).compute(today=TODAY)
+    assert [r.repository for r in stats.repositories] == ["apache/airflow"]
+
+
+def test_display_stats():
+    store = _store()
+    store.save([_notification("1", "spark", 0, unread=False)])
+    # Reads are counted on the day they were seen, which is really today
+    before = datetime.datetime.now(datetime.timezone.utc).date()
+    stats = StatsController(Config(), store).compute(
+        since=TODAY, before=before + datetime.timedelta(days=1), today=TODAY
+    )
+    lines = []
+    view = NotificationViewController(
+        Config(), write_stdout=lines.append, get_columns=lambda: 120
+    )
+    view.display_stats(stats)
+    output = "\n".join(lines)
+    assert "apache/spark" in output
+    assert "Review requests waiting: 2 (oldest requested 45 days ago)" in output
+    assert "over 1 reads" in output
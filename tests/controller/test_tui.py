@@ -0,0 +1,66 @@
+from wnghub.config.config import Config
+from wnghub.controller.tui import Viewport, NotificationTuiController
+from wnghub.model.notification import Notification
+from unittest.mock import Mock
+
+
+def _notifications(n):
+    return [
+        Notification(title="title {}".format(i), repository="r", thread_id=str(i))
+        for i in range(n)
+    ]
+
+
+def test_viewport_scrolls_with_cursor():
+    viewport = Viewport(height=10)
+    viewport.resize(10, 1000)
+    viewport.move(15)
+    assert viewport.cursor == 15
+    assert viewport.visible() == range(6, 16)
+    viewport.move(-100)
+    assert viewport.cursor == 0
+    assert viewport.visible() == range(0, 10)
+
+
+def test_viewport_clamps_on_shrink():
+    viewport = Viewport(height=10)
+    viewport.resize(10, 100)
+    viewport.move(99)
+    viewport.resize(10, 5)
+    assert viewport.cursor == 4
+    assert viewport.visible() == range(0, 5)
+
+
+def test_filter_and_keep_cursor():
+    tui = NotificationTuiController(Mock(), Config())
+    tui.set_notifications(_notifications(20))
+    tui.apply_filter("title 1")
+    assert len(tui.visible_items) == 11
+    tui.viewport.move(2)
+    current = tui.current()
+    tui.set_notifications(list(reversed(_notifications(20))))
+    assert tui.current().thread_id == current.thread_id
+
+
+def test_mark_read_removes_unread():
+    controller = Mock()
+    tui = NotificationTuiController(controller, Config())
+    tui.set_notifications(_notifications(3))
+    tui.mark_read()
+    assert [n.thread_id for n in tui.visible_items] == ["1", "2"]
+
+
+def test_switch_views():
+    views = Mock()
+    views.names.return_value = ["mine"]
+    views.get.return_value.notifications.return_value = _notifications(2)
+    tui = NotificationTuiController(Mock(), Config(), views=views)
+    tui.fetched = _notifications(5)
+    tui.switch_view(None)
+    assert len(tui.visible_items) == 5
+    tui.next_view()
+    assert tui.view_name == "mine"
+    assert len(tui.visible_items) == 2
+    tui.next_view()
+    assert tui.view_name is None
+    assert len(tui.visible_items) == 5
@@ -0,0 +1,47 @@
+import datetime
+
+from wnghub.config.config import Config
+from wnghub.controller.view import NotificationViewController
+from wnghub.model.digest import group_notifications
+from wnghub.model.notification import Notification
+
+
+def test_display_digest():
+    now = datetime.datetime.now(datetime.timezone.utc)
+    notifications = [
+        Notification(
+            thread_id=str(i),
+            title="Notification {}".format(i),
+            org="apache",
+            repository="spark" if i % 3 else "arrow",
+            updated_at=now - datetime.timedelta(hours=i),
+            is_issue=True,
+        )
+        for i in range(300)
+    ]
+    lines = []
+    view = NotificationViewController(
+        Config(), write_stdout=lines.append, get_columns=lambda: 200
+    )
+    view.display_digest(
+        group_notifications(notifications), "repo", expand=["apache/arrow"]
+    )
+    output = "\n".join(lines)
+    rows = [
+        [cell.strip() for cell in line.split("|")[1:-1]]
+        for line in output.splitlines()
+        if line.startswith("|")
+    ]
+    assert rows[1][:4] == ["apache/arrow", "100", "100", "0 seconds ago"]
+    assert rows[2][:4] == ["apache/spark", "200", "200", "1 hour ago"]
+    # Only the expanded group is listed
+    expanded = output.split("apache/arrow (100):")[1]
+    assert "Notification 3 " in expanded
+    assert "Notification 1 " not in expanded
+
+
+def test_display_empty_digest():
+    lines = []
+    view = NotificationViewController(Config(), write_stdout=lines.append)
+    view.display_digest([], "repo")
+    assert lines == [NotificationViewController._no_notifications_msg]
@@ -0,0 +1,87 @@
+import datetime
+
+from wnghub.config.config import Config
+from wnghub.controller.webhook import WebhookController
+from wnghub.model.notification import Notification
+from wnghub.store.sqlite import SqliteNotificationStore
+
+URL = "https://github.com/apache/spark/pull/12"
+
+
+def _payload(updated_at="2020-11-21T00:00:00Z", url=URL):
+    return {
+        "action": "opened",
+        "pull_request": {
+            "title": "Add webhooks",
+            "html_url": url,
+            "updated_at": updated_at,
+            "user": {"login": "alice"},
+        },
+        "repository": {"name": "spark", "owner": {"login": "apache"}},
+        "sender": {"login": "alice"},
+    }
+
+
+def _thread(thread_id="123", reason="review_requested"):
+    return Notification(
+        thread_id=thread_id,
+        repository="spark",
+        org="apache",
+        html_url=URL,
+        reason=reason,
+        is_pull=True,
+        unread=True,
+        updated_at=datetime.datetime(2020, 11, 20, tzinfo=datetime.timezone.utc),
+    )
+
+
+def test_thread_saved_by_another_process_replaces_provisional(tmp_path):
+    path = str(tmp_path / "wnghub.db")
+    store = SqliteNotificationStore(path)
+    controller = WebhookController(Config(), store, login="bob")
+    controller.handle("pull_request", _payload())
+    # Another process, ie `wnghub`, saves the real thread
+    SqliteNotificationStore(path).save([_thread()])
+    # This process's poll sees nothing new, so saves nothing
+    assert store.save([_thread()]) == []
+    assert {n.thread_id for n in store.notifications()} == {
+        "123",
+        "webhook:apache/spark#12",
+    }
+    assert controller.reconcile() == 1
+    assert [n.thread_id for n in store.notifications()] == ["123"]
+
+
+def test_handle_prefers_real_thread():
+    store = SqliteNotificationStore(":memory:")
+    controller = WebhookController(Config(), store, login="bob")
+    controller.handle("pull_request", _payload(updated_at="2020-11-22T00:00:00Z"))
+    # Saved without going through the listener, ie by an older version
+    store._listeners = []
+    store.save([_thread()])
+    store._listeners = [controller.reconcile]
+    [n] = controller.handle("pull_request", _payload("2020-11-23T00:00:00Z"))
+    assert (n.thread_id, n.reason) == ("123", "review_requested")
+    assert [n.thread_id for n in store.notifications()] == ["123"]
+
+
+def test_expire():
+    store = SqliteNotificationStore(":memory:")
+    controller = WebhookController(Config(), store, login="bob")
+    for day, number in ((18, 1), (20, 2), (22, 3)):
+        controller.handle(
+            "pull_request",
+            _payload(
+                "2020-11-{}T00:00:00Z".format(day),
+                url="https://github.com/apache/spark/pull/{}".format(number),
+            ),
+        )
+    before = datetime.datetime(2020, 11, 21, tzinfo=datetime.timezone.utc)
+    since = datetime.datetime(2020, 11, 19, tzinfo=datetime.timezone.utc)
+    assert controller.expire(before, since=since) == 1
+    assert sorted(n.thread_id for n in store.notifications()) == [
+        "webhook:apache/spark#1",
+        "webhook:apache/spark#3",
+    ]
+    assert controller.expire(before) == 1
+    assert [n.thread_id for n in store.notifications()] == ["webhook:apache/spark#3"]
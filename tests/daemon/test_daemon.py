@@ -0,0 +1,144 @@
+import io
+import os
+import socket
+import threading
+import time
+from unittest.mock import Mock
+
+import pytest
+
+from wnghub.client.github import GithubApiClient
+from wnghub.config.config import Config
+from wnghub.controller.github import GithubController
+from wnghub.daemon import client
+from wnghub.daemon.server import DaemonRunningError, NotCachedError, NotificationDaemon
+from wnghub.testing.server import FakeGithubServer, generate_notifications
+
+
+@pytest.fixture
+def server():
+    with FakeGithubServer(generate_notifications(30)) as server:
+        yield server
+
+
+def _daemon(server, tmp_path, interval=60.0):
+    config = Config(auth_token="token", show_num_results=5)
+    controller = GithubController(GithubApiClient("token", api_url=server.url), config)
+    return NotificationDaemon(
+        controller, config, path=str(tmp_path / "wnghub.sock"), interval=interval
+    )
+
+
+class _Stdout(io.StringIO):
+    def fileno(self):
+        raise io.UnsupportedOperation()
+
+
+def test_show_request():
+    assert client.show_request([]) == {"cmd": "show", "all": False, "query": None}
+    assert client.show_request(["-A", "-q", "org:org1"]) == {
+        "cmd": "show",
+        "all": True,
+        "query": "org:org1",
+    }
+    assert client.show_request(["--query=reason:mention"])["query"] == (
+        "reason:mention"
+    )
+    assert client.show_request(["search", "flaky"]) is None
+    assert client.show_request(["-q"]) is None
+
+
+def test_not_running(tmp_path):
+    path = str(tmp_path / "missing.sock")
+    assert client.request({"cmd": "show"}, path=path) is None
+
+
+def test_show(server, tmp_path):
+    with _daemon(server, tmp_path) as daemon:
+        path = daemon.path
+        response = client.request({"cmd": "show", "columns": 400}, path=path)
+        assert response["ok"]
+        rows = [r for r in response["output"].splitlines() if "Notification" in r]
+        assert len(rows) == 5
+        requests = len(server.requests)
+        for _ in range(3):
+            assert client.request({"cmd": "show"}, path=path)["ok"]
+        assert len(server.requests) == requests
+        response = client.request(
+            {"cmd": "show", "query": "org:nope", "columns": 400}, path=path
+        )
+        assert "No new matching notifications!" in response["output"]
+    assert not os.path.exists(path)
+
+
+def test_refresh(server, tmp_path):
+    with _daemon(server, tmp_path, interval=0.1) as daemon:
+        client.request({"cmd": "show"}, path=daemon.path)
+        requests = len(server.requests)
+        time.sleep(0.5)
+        assert len(server.requests) > requests
+
+
+def test_try_show(server, tmp_path, monkeypatch):
+    with _daemon(server, tmp_path) as daemon:
+        monkeypatch.setenv(client.SOCKET_PATH_ENV, daemon.path)
+        stdout = _Stdout()
+        assert client.try_show(["-A"], stdout)
+        assert "Notification number 0 in" in stdout.getvalue()
+        assert stdout.getvalue().endswith("+\n")
+        assert not client.try_show(["search", "x"], _Stdout())
+
+
+def test_already_running_and_stale_socket(server, tmp_path):
+    with _daemon(server, tmp_path):
+        with pytest.raises(DaemonRunningError):
+            _daemon(server, tmp_path).start()
+    stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    stale.bind(str(tmp_path / "wnghub.sock"))
+    stale.close()
+    with _daemon(server, tmp_path) as daemon:
+        assert client.request({"cmd": "show"}, path=daemon.path)["ok"]
+
+
+def test_first_show_answers_before_client_times_out(tmp_path):
+    release = threading.Event()
+    controller = Mock()
+    controller.get_notifications.side_effect = lambda **kwargs: release.wait() and []
+    daemon = NotificationDaemon(
+        controller, Config(), path=str(tmp_path / "wnghub.sock")
+    )
+    daemon.first_fetch_wait = 0.01
+    with daemon:
+        start = time.monotonic()
+        response = client.request({"cmd": "show"}, path=daemon.path)
+        assert time.monotonic() - start < 0.5
+        assert response is not None and not response["ok"]
+        # Asking again doesn't start another fetch
+        with pytest.raises(NotCachedError):
+            daemon.show()
+        release.set()
+        daemon.first_fetch_wait = 1.0
+        assert "No new matching notifications!" in daemon.show()
+    assert controller.get_notifications.call_count == 1
+
+
+def test_keeps_recently_asked_results(tmp_path):
+    controller = Mock()
+    controller.get_notifications.return_value = []
+    daemon = NotificationDaemon(
+        controller, Config(), path=str(tmp_path / "wnghub.sock")
+    )
+    daemon.max_keys = 2
+    for query in ("org:a", "org:b", "org:c"):
+        daemon.show(query=query)
+    assert sorted(q for _, q in daemon._results) == ["org:b", "org:c"]
+    controller.get_notifications.reset_mock()
+    daemon.refresh()
+    assert controller.get_notifications.call_count == 2
+    # Results nobody asked for lately aren't refetched
+    daemon.key_ttl = 0.0
+    time.sleep(0.01)
+    controller.get_notifications.reset_mock()
+    daemon.refresh()
+    controller.get_notifications.assert_not_called()
+    assert daemon._results == {}
@@ -0,0 +1,142 @@
+import datetime
+import hashlib
+import hmac
+import json
+
+import pytest
+import requests
+
+from wnghub.client.github import GithubApiClient
+from wnghub.config.config import Config
+from wnghub.controller.github import GithubController
+from wnghub.controller.webhook import WebhookController
+from wnghub.daemon.webhook import WebhookReceiver
+from wnghub.store.sqlite import SqliteNotificationStore
+from wnghub.testing.server import FakeGithubServer, generate_notifications
+
+
+@pytest.fixture
+def store():
+    return SqliteNotificationStore(":memory:")
+
+
+def _payload(notification):
+    org = notification["repository"]["owner"]["login"]
+    repo = notification["repository"]["name"]
+    kind, number = notification["subject"]["url"].split("/")[-2:]
+    return {
+        "action": "opened",
+        "issue": {
+            "title": "Opened by webhook",
+            "html_url": "https://github.com/{}/{}/{}/{}".format(
+                org, repo, "pull" if kind == "pulls" else "issues", number
+            ),
+            "updated_at": "2020-11-21T00:00:00Z",
+            "user": {"login": "alice"},
+        },
+        "repository": notification["repository"],
+        "sender": {"login": "alice"},
+    }
+
+
+def _post(receiver, event, payload, secret=None):
+    body = json.dumps(payload).encode("utf-8")
+    headers = {"X-GitHub-Event": event, "Content-Type": "application/json"}
+    if secret is not None:
+        digest = hmac.new(secret.encode("utf-8"), body, hashlib.sha256).hexdigest()
+        headers["X-Hub-Signature-256"] = "sha256=" + digest
+    return requests.post(receiver.url, data=body, headers=headers)
+
+
+def test_webhooks_saved_then_reconciled(store):
+    notifications = generate_notifications(3)
+    config = Config(auth_token="token")
+    controller = WebhookController(config, store, login="bob")
+    with FakeGithubServer(notifications) as server:
+        github = GithubController(
+            GithubApiClient("token", api_url=server.url), config, store=store
+        )
+        with WebhookReceiver(controller, port=0, github=None) as receiver:
+            res = _post(receiver, "issues", _payload(notifications[0]))
+            assert res.status_code == 202
+            assert res.json()["saved"] == 1
+            assert _post(receiver, "ping", {"zen": "hi"}).json()["saved"] == 0
+            [n] = store.notifications()
+            assert n.thread_id.startswith("webhook:")
+            assert n.title == "Opened by webhook"
+
+            receiver.github = github
+            receiver.reconcile()
+            thread_ids = {n.thread_id for n in store.notifications()}
+            assert thread_ids == {n["id"] for n in notifications}
+
+            # Later events update the real thread
+            res = _post(receiver, "issues", _payload(notifications[0]))
+            assert res.json()["saved"] == 1
+            assert store.count() == 3
+            updated = store.by_html_url(
+                [_payload(notifications[0])["issue"]["html_url"]]
+            )
+            [[n]] = updated.values()
+            assert n.thread_id == notifications[0]["id"]
+            assert n.reason == notifications[0]["reason"]
+
+
+def test_signature(store):
+    controller = WebhookController(Config(), store)
+    payload = _payload(generate_notifications(1)[0])
+    with WebhookReceiver(controller, port=0, secret="s3cret") as receiver:
+        assert _post(receiver, "issues", payload).status_code == 401
+        assert _post(receiver, "issues", payload, secret="wrong").status_code == 401
+        assert _post(receiver, "issues", payload, secret="s3cret").status_code == 202
+    assert store.count() == 1
+
+
+def test_reconcile_expires_provisional_notifications(store):
+    notifications = generate_notifications(3)
+    config = Config(auth_token="token")
+    controller = WebhookController(config, store, login="bob")
+    # Github doesn't notify the user about this one
+    payload = _payload(notifications[0])
+    payload["issue"]["html_url"] = "https://github.com/org0/repo0/issues/999"
+    controller.handle("issues", payload)
+    with FakeGithubServer(notifications) as server:
+        github = GithubController(
+            GithubApiClient("token", api_url=server.url), config, store=store
+        )
+        with WebhookReceiver(controller, port=0, github=None) as receiver:
+            receiver.github = github
+            receiver.reconcile()
+    assert {n.thread_id for n in store.notifications()} == {
+        n["id"] for n in notifications
+    }
+
+
+def test_reconcile_keeps_provisional_older_than_poll(store):
+    notifications = generate_notifications(3)
+    config = Config(auth_token="token")
+    controller = WebhookController(config, store, login="bob")
+    payload = _payload(notifications[0])
+    payload["issue"]["html_url"] = "https://github.com/org0/repo0/issues/999"
+    now = datetime.datetime.now(datetime.timezone.utc)
+    payload["issue"]["updated_at"] = (now - datetime.timedelta(hours=2)).isoformat()
+    controller.handle("issues", payload)
+    # A partial fetch, ie `wnghub -n 5`, doesn't move the poll's watermark
+    store.mark_synced()
+    with FakeGithubServer(notifications) as server:
+        github = GithubController(
+            GithubApiClient("token", api_url=server.url), config, store=store
+        )
+        with WebhookReceiver(controller, port=0, github=None) as receiver:
+            receiver.github = github
+            store.mark_synced(
+                now - datetime.timedelta(hours=1), key=receiver.watermark_key
+            )
+            receiver.reconcile()
+            # The poll only covered the last hour, so the row may still be notified
+            assert "webhook:org0/repo0#999" in {
+                n.thread_id for n in store.notifications()
+            }
+            assert store.synced_at(receiver.watermark_key) > now - datetime.timedelta(
+                minutes=2
+            )
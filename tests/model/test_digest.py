@@ -0,0 +1,62 @@
+import datetime
+
+import pytest
+
+from wnghub.model.digest import UnknownGroupError, group_notifications
+from wnghub.model.notification import Notification
+
+
+def _notification(thread_id, org, repo, hour, reason="subscribed", unread=True):
+    return Notification(
+        thread_id=thread_id,
+        title="Notification " + thread_id,
+        org=org,
+        repository=repo,
+        reason=reason,
+        updated_at=datetime.datetime(2020, 11, 1, hour, tzinfo=datetime.timezone.utc),
+        unread=unread,
+    )
+
+
+NOTIFICATIONS = [
+    _notification("1", "apache", "spark", 1),
+    _notification("2", "apache", "arrow", 5, reason="mention"),
+    _notification("3", "apache", "spark", 3, unread=False),
+    _notification("4", "psf", "black", 2, reason="mention"),
+]
+
+
+def test_group_by_repo():
+    groups = group_notifications(NOTIFICATIONS)
+    assert [(g.key, g.count, g.unread) for g in groups] == [
+        ("apache/arrow", 1, 1),
+        ("apache/spark", 2, 1),
+        ("psf/black", 1, 1),
+    ]
+    spark = groups[1]
+    assert spark.latest.hour == 3
+    assert spark.latest_title == "Notification 3"
+    assert [n.thread_id for n in spark.notifications] == ["1", "3"]
+
+
+def test_group_by_other_fields():
+    assert [(g.key, g.count) for g in group_notifications(NOTIFICATIONS, "org")] == [
+        ("apache", 3),
+        ("psf", 1),
+    ]
+    assert [
+        (g.key, g.count) for g in group_notifications(NOTIFICATIONS, by="reason")
+    ] == [("mention", 2), ("subscribed", 2)]
+
+
+def test_group_missing_timestamps_last():
+    groups = group_notifications(
+        [Notification(thread_id="1", reason="a"), NOTIFICATIONS[0]], by="reason"
+    )
+    assert [g.key for g in groups] == ["subscribed", "a"]
+    assert groups[1].latest is None
+
+
+def test_unknown_group():
+    with pytest.raises(UnknownGroupError):
+        group_notifications(NOTIFICATIONS, by="title")
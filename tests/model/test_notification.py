@@ -3,9 +3,13 @@ from wnghub.model.notification import (
     NotificationReasonsFilter,
     NotificationPrIssuesFilter,
     NotificationReposFilter,
+    NotificationGlobFilter,
+    NotificationRegexFilter,
+    NotificationTitleKeywordsFilter,
 )
 from unittest.mock import Mock, MagicMock
 import datetime
+import re
 
 
 def test_notification_reasons_filter_include():
@@ -71,3 +75,64 @@ def test_notification_repos_filter_exclude():
     res = nr_filter.apply([mock_n_r1, mock_n_r2])
     assert len(res) == 1
     assert res[0] == mock_n_r2
+
+
+def test_notification_glob_filter_exclude():
+    mock_n_r1 = Mock()
+    mock_n_r2 = Mock()
+    mock_n_r1.repository = "deploy-bot"
+    mock_n_r2.repository = "airflow"
+    ng_filter = NotificationGlobFilter(["*-bot", "docs"], exclude=True)
+    res = ng_filter.apply([mock_n_r1, mock_n_r2])
+    assert res == [mock_n_r2]
+
+
+def test_notification_glob_filter_matches_whole_value():
+    mock_n_r1 = Mock()
+    mock_n_r1.org = "apache-incubator"
+    ng_filter = NotificationGlobFilter(["apache"], field="org")
+    assert ng_filter.apply([mock_n_r1]) == []
+
+
+def test_notification_regex_filter_include():
+    mock_n_r1 = Mock()
+    mock_n_r2 = Mock()
+    mock_n_r1.title = "Bump requests from 2.0 to 2.1"
+    mock_n_r2.title = "Fix scheduler"
+    nr_filter = NotificationRegexFilter([r"^Bump \S+", "nothing"])
+    assert nr_filter.apply([mock_n_r1, mock_n_r2]) == [mock_n_r1]
+
+
+def test_notification_regex_filter_inline_flags_and_backreferences():
+    titles = ["BUMP deps", "Fix fix", "a{1,3} in title", "Docs"]
+    notifications = [Notification(title=t) for t in titles]
+    nr_filter = NotificationRegexFilter(
+        ["(?i)bump", r"(\w+) (?i:\1)", "a{1,3}"], exclude=True
+    )
+    assert nr_filter.apply(notifications) == notifications[3:]
+
+
+def test_notification_regex_filter_combines_patterns():
+    patterns = ["(?i)release {}".format(i) for i in range(300)]
+    patterns.append(r"(?P<word>\w+)-(?P=word)")
+    nr_filter = NotificationRegexFilter(patterns)
+    assert isinstance(nr_filter.matcher.__self__, re.Pattern)
+    titles = ["RELEASE 299", "ping-ping", "Docs", "wow wow", "ha!"]
+    notifications = [Notification(title=t) for t in titles]
+    assert nr_filter.apply(notifications) == notifications[:2]
+    nr_filter = NotificationRegexFilter(patterns + [r"(\w+) \1", r"(?P<word>\w+)!"])
+    assert nr_filter.apply(notifications) == notifications[:2] + notifications[3:]
+
+
+def test_notification_title_keywords_filter():
+    titles = ["Dependabot update", "Depend on x", "dep", "Fix scheduler"]
+    notifications = [Notification(title=t) for t in titles]
+    nk_filter = NotificationTitleKeywordsFilter(["dependabot", "depend", "sched"])
+    assert nk_filter.apply(notifications) == notifications[0:2] + notifications[3:]
+    nk_filter = NotificationTitleKeywordsFilter(["dependabot", ""], exclude=True)
+    assert nk_filter.apply(notifications) == notifications[1:]
+
+
+def test_notification_pattern_filter_empty_include():
+    nk_filter = NotificationTitleKeywordsFilter([])
+    assert nk_filter.apply([Notification(title="hello")]) == []
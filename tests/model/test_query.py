@@ -0,0 +1,62 @@
+from wnghub.model.notification import Notification
+from wnghub.model.query import (
+    And,
+    Const,
+    In,
+    Not,
+    QueryFilter,
+    QuerySyntaxError,
+    optimize,
+    parse,
+)
+import pytest
+
+
+def _notification(org, repository, type, reason="mention", title=""):
+    return Notification(
+        org=org, repository=repository, type=type, reason=reason, title=title
+    )
+
+
+def test_parse_precedence():
+    ast = parse("org:apache type:PR OR reason:mention")
+    assert ast.children[0] == And(
+        (In("org", frozenset(["apache"])), In("type", frozenset(["PR"])))
+    )
+
+
+def test_optimize_merges_sets():
+    ast = optimize(parse("(repo:a OR repo:b OR repo:c) AND NOT NOT org:x"))
+    assert ast == And(
+        (In("repository", frozenset(["a", "b", "c"])), In("org", frozenset(["x"])))
+    )
+
+
+def test_optimize_folds_constants():
+    assert optimize(parse("repo:a AND repo:b")) == Const(False)
+    assert optimize(parse("")) == Const(True)
+    assert optimize(parse("NOT (repo:a AND repo:b)")) == Const(True)
+    assert optimize(parse("-repo:a")) == Not(In("repository", frozenset(["a"])))
+
+
+def test_query_filter():
+    n1 = _notification("apache", "airflow", "PR")
+    n2 = _notification("apache", "docs", "PR")
+    n3 = _notification("apache", "airflow", "IS", reason="review_requested")
+    n4 = _notification("other", "airflow", "PR")
+    n5 = _notification("apache", "airflow", "IS", title="Flaky test in scheduler")
+    q_filter = QueryFilter(
+        "org:apache AND (type:pr OR reason:review_requested) AND NOT repo:docs"
+    )
+    assert q_filter.apply([n1, n2, n3, n4, n5]) == [n1, n3]
+    assert QueryFilter('"flaky TEST"').apply([n1, n5]) == [n5]
+    assert QueryFilter("repo:air* -org:other").apply([n1, n2, n4]) == [n1]
+    assert QueryFilter("repo:docs,airflow type:PR").apply([n1, n2, n3]) == [n1, n2]
+
+
+@pytest.mark.parametrize(
+    "query", ["(org:apache", "org:apache)", "nope:x", "org:", "AND", "NOT"]
+)
+def test_query_syntax_errors(query):
+    with pytest.raises(QuerySyntaxError):
+        QueryFilter(query)
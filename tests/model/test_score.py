@@ -0,0 +1,84 @@
+import datetime
+
+import pytest
+
+from wnghub.model.notification import Notification
+from wnghub.model.score import NotificationScorer
+
+NOW = datetime.datetime(2020, 11, 30, tzinfo=datetime.timezone.utc)
+
+
+def _notification(thread_id, reason="subscribed", repository="spark", hours_ago=0):
+    return Notification(
+        thread_id=thread_id,
+        org="apache",
+        repository=repository,
+        reason=reason,
+        updated_at=NOW - datetime.timedelta(hours=hours_ago),
+    )
+
+
+def test_scores():
+    scorer = NotificationScorer(half_life_hours=24)
+    scores = scorer.scores(
+        [
+            _notification("1"),
+            _notification("2", reason="review_requested"),
+            _notification("3", hours_ago=24),
+            _notification("4", reason="unknown"),
+        ],
+        now=NOW,
+    )
+    assert scores[0] == pytest.approx(1.0)
+    # Reason weight plus participation bonus
+    assert scores[1] == pytest.approx(6.0)
+    # Halves every half life
+    assert scores[2] == pytest.approx(0.5)
+    assert scores[3] == pytest.approx(1.0)
+
+
+def test_repo_weights():
+    scorer = NotificationScorer(
+        repo_weights={"apache/spark": 3, "arrow": 2, "apache": 0.5}
+    )
+    scores = scorer.scores(
+        [
+            _notification("1", repository="spark"),
+            _notification("2", repository="arrow"),
+            _notification("3", repository="airflow"),
+        ],
+        now=NOW,
+    )
+    assert scores == pytest.approx([3.0, 2.0, 0.5])
+
+
+def test_top():
+    scorer = NotificationScorer()
+    notifications = [
+        _notification(str(i), reason="subscribed", hours_ago=i) for i in range(2000)
+    ]
+    notifications[1500] = _notification("mention", reason="mention", hours_ago=1500)
+    notifications[700] = _notification("review", reason="review_requested", hours_ago=2)
+    top = scorer.top(notifications, 3, now=NOW)
+    assert [n.thread_id for n in top] == ["review", "0", "1"]
+    assert scorer.top(notifications, 0, now=NOW) == []
+    assert len(scorer.top(notifications[:2], 10, now=NOW)) == 2
+
+
+def test_old_notifications_still_ranked():
+    scorer = NotificationScorer(half_life_hours=1)
+    notifications = [
+        _notification("1", hours_ago=24 * 3650),
+        _notification("2", reason="mention", hours_ago=24 * 3650),
+    ]
+    assert [n.thread_id for n in scorer.top(notifications, 1, now=NOW)] == ["2"]
+
+
+def test_ties_keep_order():
+    scorer = NotificationScorer()
+    notifications = [_notification(str(i)) for i in range(5)]
+    assert [n.thread_id for n in scorer.top(notifications, 3, now=NOW)] == [
+        "0",
+        "1",
+        "2",
+    ]
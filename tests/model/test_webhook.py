@@ -0,0 +1,90 @@
+from wnghub.model.webhook import (
+    is_provisional,
+    notification_from_event,
+    provisional_thread_id,
+)
+import datetime
+
+
+def _repository():
+    return {"name": "spark", "owner": {"login": "apache"}}
+
+
+def _pull_request(**kwargs):
+    return dict(
+        {
+            "number": 12,
+            "title": "Speed up shuffle",
+            "html_url": "https://github.com/apache/spark/pull/12",
+            "updated_at": "2020-11-20T10:00:00Z",
+            "user": {"login": "alice"},
+        },
+        **kwargs
+    )
+
+
+def test_review_requested():
+    payload = {
+        "action": "review_requested",
+        "pull_request": _pull_request(),
+        "requested_reviewer": {"login": "bob"},
+        "repository": _repository(),
+        "sender": {"login": "alice"},
+    }
+    n = notification_from_event("pull_request", payload, login="bob")
+    assert n.thread_id == "webhook:apache/spark#12"
+    assert is_provisional(n)
+    assert (n.org, n.repository, n.title) == ("apache", "spark", "Speed up shuffle")
+    assert n.reason == "review_requested"
+    assert n.is_pull and not n.is_issue and n.type == "PR"
+    assert n.unread
+    assert n.updated_at == datetime.datetime(
+        2020, 11, 20, 10, tzinfo=datetime.timezone.utc
+    )
+    assert notification_from_event("pull_request", payload).reason == "subscribed"
+    assert (
+        notification_from_event("pull_request", payload, login="carol").reason
+        == "subscribed"
+    )
+
+
+def test_issue_comment():
+    payload = {
+        "action": "created",
+        "issue": {
+            "title": "Crash on startup",
+            "html_url": "https://github.com/apache/spark/issues/3",
+            "user": {"login": "bob"},
+            "pull_request": {
+                "url": "https://api.github.com/repos/apache/spark/pulls/3"
+            },
+        },
+        "comment": {"body": "cc @Bob", "created_at": "2020-11-21T00:00:00Z"},
+        "repository": _repository(),
+        "sender": {"login": "alice"},
+    }
+    n = notification_from_event("issue_comment", payload, login="bob")
+    assert n.is_pull
+    assert n.reason == "mention"
+    assert n.updated_at.day == 21
+    payload["comment"]["body"] = "cc @bobby"
+    assert notification_from_event("issue_comment", payload, login="bob").reason == (
+        "author"
+    )
+
+
+def test_ignored_events():
+    payload = {
+        "action": "opened",
+        "pull_request": _pull_request(),
+        "repository": _repository(),
+        "sender": {"login": "alice"},
+    }
+    assert notification_from_event("push", payload) is None
+    assert notification_from_event("pull_request", payload, login="alice") is None
+    assert notification_from_event("pull_request", {"zen": "Keep it simple"}) is None
+
+
+def test_provisional_thread_id():
+    assert provisional_thread_id("https://github.com/a/b/issues/4") == ("webhook:a/b#4")
+    assert provisional_thread_id("https://github.com/a/b") is None
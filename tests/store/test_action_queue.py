@@ -0,0 +1,61 @@
+import time
+
+from wnghub.store.actions import MARK_READ, SqliteActionQueue
+
+
+def test_coalesces_per_thread_and_action():
+    queue = SqliteActionQueue(":memory:")
+    assert queue.enqueue("1", MARK_READ, {"updated_at": "a"})
+    assert not queue.enqueue("1", MARK_READ, {"updated_at": "b"})
+    assert queue.enqueue("1", "other")
+    assert queue.enqueue("2", MARK_READ)
+    assert queue.count() == 3
+    assert [a.payload for a in queue.pending(MARK_READ)] == [{"updated_at": "b"}, {}]
+
+
+def test_claim_leases_actions():
+    queue = SqliteActionQueue(":memory:")
+    for thread_id in "123":
+        queue.enqueue(thread_id, MARK_READ)
+    claimed = queue.claim(2)
+    assert [a.thread_id for a in claimed] == ["1", "2"]
+    assert [a.thread_id for a in queue.claim(2)] == ["3"]
+    assert queue.claim(2) == []
+    queue.complete(claimed[0])
+    assert queue.count() == 2
+    # Expired leases are handed out again
+    queue2 = SqliteActionQueue(":memory:")
+    queue2.enqueue("1", MARK_READ)
+    queue2.claim(1, lease=0)
+    assert [a.thread_id for a in queue2.claim(1)] == ["1"]
+
+
+def test_retry_and_fail():
+    queue = SqliteActionQueue(":memory:")
+    queue.enqueue("1", MARK_READ)
+    action = queue.claim(1)[0]
+    queue.retry(action, "down", delay=60)
+    assert queue.claim(1) == []
+    assert 0 < queue.next_due() <= 60
+    queue.fail(action, "still down")
+    assert queue.count() == 0
+    assert queue.next_due() is None
+    failed = queue.failed()
+    assert [(a.thread_id, a.attempts, a.error) for a in failed] == [
+        ("1", 2, "still down")
+    ]
+    assert queue.retry_failed() == 1
+    assert [a.attempts for a in queue.claim(1)] == [0]
+
+
+def test_survives_reopen(tmp_path):
+    path = str(tmp_path / "wnghub.db")
+    queue = SqliteActionQueue(path)
+    queue.enqueue("1", MARK_READ, {"updated_at": "2020-11-01T00:00:00+00:00"})
+    queue.claim(1, lease=0.05)
+    queue.close()
+    time.sleep(0.1)
+    queue = SqliteActionQueue(path)
+    assert [(a.thread_id, a.payload) for a in queue.claim(1)] == [
+        ("1", {"updated_at": "2020-11-01T00:00:00+00:00"})
+    ]
@@ -0,0 +1,126 @@
+import datetime
+import json
+import os
+
+from wnghub.client.github import GithubApiClient
+from wnghub.store.archive import RawPageArchive
+from wnghub.testing.server import FakeGithubServer, generate_notifications
+
+
+def _page(notifications):
+    return json.dumps(notifications, indent=1)
+
+
+def test_append_and_get(tmp_path):
+    notifications = generate_notifications(5)
+    notifications[2]["subject"]["title"] = "Ünïcödé title ✓"
+    with RawPageArchive(str(tmp_path / "archive")) as archive:
+        archive.append(_page(notifications[:3]))
+        archive.append(_page(notifications[3:]))
+        assert len(archive) == 5
+        assert archive.num_pages == 2
+        assert isinstance(archive.raw("1000002"), memoryview)
+        assert json.loads(bytes(archive.raw("1000002"))) == notifications[2]
+        assert archive.get("1000002").title == "Ünïcödé title ✓"
+        assert archive.get("1000004").thread_id == "1000004"
+        assert archive.get("missing") is None
+        assert [len(json.loads(bytes(p))) for p in archive.pages()] == [3, 2]
+
+
+def test_latest_version_wins(tmp_path):
+    notifications = generate_notifications(2)
+    with RawPageArchive(str(tmp_path / "archive")) as archive:
+        archive.append(_page(notifications))
+        notifications[1]["updated_at"] = "2021-01-01T00:00:00Z"
+        notifications[1]["unread"] = False
+        archive.append(_page([notifications[1]]))
+        assert len(archive) == 2
+        assert archive.thread_ids() == ["1000001", "1000000"]
+        assert archive.get("1000001").unread is False
+
+
+def test_range(tmp_path):
+    with RawPageArchive(str(tmp_path / "archive")) as archive:
+        archive.append(_page(generate_notifications(10)))
+        since = datetime.datetime(2020, 11, 19, 23, 55, tzinfo=datetime.timezone.utc)
+        before = datetime.datetime(2020, 11, 19, 23, 58, tzinfo=datetime.timezone.utc)
+        assert archive.thread_ids(since=since, before=before) == [
+            "1000003",
+            "1000004",
+            "1000005",
+        ]
+        assert len(list(archive.notifications(since=since))) == 6
+
+
+def test_reopen_and_rebuild_index(tmp_path):
+    path = str(tmp_path / "archive")
+    with RawPageArchive(path) as archive:
+        archive.append(_page(generate_notifications(4)))
+    with RawPageArchive(path) as archive:
+        assert len(archive) == 4
+        assert archive.num_pages == 1
+    os.remove(path + ".idx")
+    with RawPageArchive(path) as archive:
+        assert len(archive) == 4
+        assert archive.get("1000003").thread_id == "1000003"
+
+
+def test_reopen_indexes_pages_missing_from_index(tmp_path):
+    path = str(tmp_path / "archive")
+    with RawPageArchive(path) as archive:
+        archive.append(_page(generate_notifications(2)))
+    with open(path + ".idx") as f:
+        index = f.read()
+    with RawPageArchive(path) as archive:
+        archive.append(_page(generate_notifications(4)[2:]))
+    # Crash after writing the data, with only part of the index written
+    with open(path + ".idx", "w") as f:
+        f.write(index + "1000002\t0.0")
+    with RawPageArchive(path) as archive:
+        assert len(archive) == 4
+        assert archive.num_pages == 2
+        assert archive.get("1000003").thread_id == "1000003"
+    with RawPageArchive(path) as archive:
+        assert len(archive) == 4
+        assert archive.num_pages == 2
+
+
+def test_reopen_drops_partially_written_page(tmp_path):
+    path = str(tmp_path / "archive")
+    with RawPageArchive(path) as archive:
+        archive.append(_page(generate_notifications(2)))
+    size = os.path.getsize(path)
+    # Crash halfway through writing a page
+    with open(path, "ab") as f:
+        f.write(b"\x00\x00\x01\x00[{")
+    with RawPageArchive(path) as archive:
+        assert os.path.getsize(path) == size
+        archive.append(_page(generate_notifications(3)[2:]))
+        assert archive.num_pages == 2
+        assert archive.get("1000002").thread_id == "1000002"
+
+
+def test_reopen_legacy_index(tmp_path):
+    path = str(tmp_path / "archive")
+    with RawPageArchive(path) as archive:
+        archive.append(_page(generate_notifications(3)))
+    with open(path + ".idx") as f:
+        lines = [line for line in f if not line.startswith("#")]
+    with open(path + ".idx", "w") as f:
+        f.writelines(lines)
+    with RawPageArchive(path) as archive:
+        assert len(archive) == 3
+        assert archive.num_pages == 1
+
+
+def test_client_archives_fetched_pages(tmp_path):
+    with RawPageArchive(str(tmp_path / "archive")) as archive:
+        with FakeGithubServer(generate_notifications(150)) as server:
+            client = GithubApiClient("token", api_url=server.url)
+            client.add_raw_page_listener(archive.append)
+            client.get_notifications(all=True, per_page=100, page=1)
+            client.get_notifications(all=True, per_page=100, page=2)
+            client.get_notifications(all=True, per_page=100, page=2)
+            client.clear_cache()
+        assert archive.num_pages == 2
+        assert len(archive) == 150
@@ -0,0 +1,71 @@
+import datetime
+
+import pytest
+
+from wnghub.model.notification import Notification
+from wnghub.store import columnar
+from wnghub.store.sqlite import SqliteNotificationStore
+
+pyarrow = pytest.importorskip("pyarrow")
+pyarrow_parquet = pytest.importorskip("pyarrow.parquet")
+
+
+def _store(n):
+    store = SqliteNotificationStore(":memory:")
+    start = datetime.datetime(2020, 11, 30, tzinfo=datetime.timezone.utc)
+    store.save(
+        [
+            Notification(
+                thread_id=str(i),
+                title="Notification {}".format(i),
+                repository="repo{}".format(i % 7),
+                org="org{}".format(i % 3),
+                reason="mention" if i % 2 else "subscribed",
+                type="PR",
+                is_pull=True,
+                updated_at=start - datetime.timedelta(minutes=i),
+                unread=i % 4 != 0,
+            )
+            for i in range(n)
+        ]
+    )
+    return store
+
+
+@pytest.mark.parametrize("name", ["history.parquet", "history.arrow"])
+def test_round_trip(tmp_path, name):
+    store = _store(250)
+    path = str(tmp_path / name)
+    assert columnar.export(store, path, batch_size=100) == 250
+    imported = SqliteNotificationStore(":memory:")
+    assert columnar.load(imported, path, batch_size=60) == 250
+    assert imported.notifications() == store.notifications()
+    # Loading again changes nothing
+    assert columnar.load(imported, path) == 0
+
+
+def test_dictionary_encoded(tmp_path):
+    path = str(tmp_path / "history.parquet")
+    columnar.export(_store(50), path, batch_size=20)
+    table = pyarrow_parquet.read_table(path)
+    for name in ("repository", "org", "reason", "type"):
+        assert pyarrow.types.is_dictionary(table.schema.field(name).type)
+    assert table.schema.field("updated_at").type == pyarrow.timestamp("us", tz="UTC")
+    assert pyarrow_parquet.ParquetFile(path).num_row_groups == 3
+
+
+def test_missing_columns_get_defaults(tmp_path):
+    path = str(tmp_path / "partial.parquet")
+    table = pyarrow.table({"thread_id": ["1", "2"], "title": ["a", "b"]})
+    pyarrow_parquet.write_table(table, path)
+    store = SqliteNotificationStore(":memory:")
+    assert columnar.load(store, path) == 2
+    assert {n.thread_id: n.unread for n in store.notifications()} == {
+        "1": True,
+        "2": True,
+    }
+
+
+def test_unknown_format(tmp_path):
+    with pytest.raises(columnar.ColumnarFormatError):
+        columnar.export(_store(1), str(tmp_path / "history.csv"))
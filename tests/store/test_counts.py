@@ -0,0 +1,33 @@
+import io
+
+from wnghub.store import counts
+
+
+def test_write_and_read(tmp_path):
+    path = str(tmp_path / "counts")
+    assert counts.read_counts(path) is None
+    counts.write_counts({"unread": 3, "reason:mention": 2, "type:PR": 0}, path)
+    assert counts.read_counts(path) == {"unread": 3, "reason:mention": 2}
+
+
+def test_format_counts():
+    c = {"unread": 3, "reason:review_requested": 2, "type:PR": 1}
+    assert counts.format_counts(c) == "3 unread, 2 review requests"
+    assert counts.format_counts(c, "{PR} PRs, {reason_mention} mentions") == (
+        "1 PRs, 0 mentions"
+    )
+
+
+def test_try_count(tmp_path, monkeypatch):
+    path = str(tmp_path / "counts")
+    monkeypatch.setenv(counts.COUNTS_PATH_ENV, path)
+    assert not counts.try_count(["count"], io.StringIO())
+    counts.write_counts({"unread": 4, "reason:mention": 1})
+    stdout = io.StringIO()
+    assert counts.try_count(["count"], stdout)
+    assert stdout.getvalue() == "4 unread, 0 review requests\n"
+    stdout = io.StringIO()
+    assert counts.try_count(["count", "-f", "{mention}"], stdout)
+    assert stdout.getvalue() == "1\n"
+    assert not counts.try_count(["count", "--bogus"], io.StringIO())
+    assert not counts.try_count([], io.StringIO())
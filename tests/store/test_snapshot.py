@@ -0,0 +1,73 @@
+import datetime
+import json
+import zlib
+
+import pytest
+
+from wnghub.model.notification import Notification
+from wnghub.store import snapshot
+from wnghub.testing.server import generate_notifications
+
+
+def _notifications(n=50):
+    return Notification.load_from_json_str(json.dumps(generate_notifications(n)))
+
+
+def test_round_trip():
+    notifications = _notifications()
+    notifications[0].title = "Ünïcödé ✓"
+    notifications[0].abbrev_title = "custom"
+    notifications[1].updated_at = datetime.datetime(
+        2021, 1, 1, tzinfo=datetime.timezone.utc
+    )
+    notifications.append(Notification(thread_id="abc"))
+    assert snapshot.loads(snapshot.dumps(notifications)) == notifications
+
+
+def test_empty():
+    assert snapshot.loads(snapshot.dumps([])) == []
+
+
+def test_dump_and_load_file(tmp_path):
+    notifications = _notifications()
+    path = tmp_path / "snapshot"
+    with open(path, "wb") as f:
+        snapshot.dump(notifications, f)
+    with open(path, "rb") as f:
+        assert snapshot.load(f) == notifications
+
+
+def test_compact():
+    notifications = _notifications(2000)
+    raw = json.dumps([n.to_record() for n in notifications], default=str)
+    assert len(snapshot.dumps(notifications)) * 5 < len(raw)
+
+
+def test_bad_snapshots():
+    with pytest.raises(snapshot.SnapshotFormatError):
+        snapshot.loads(b"not a snapshot")
+    with pytest.raises(snapshot.SnapshotFormatError):
+        snapshot.loads(snapshot.MAGIC + bytes([99]) + b"...")
+    with pytest.raises(snapshot.SnapshotFormatError):
+        snapshot.loads(snapshot.dumps(_notifications())[:-20])
+
+
+def _rewrite_fields(data, rename):
+    """
+    Renames fields in snapshot, as if it was written by a different
+    version of `Notification`.
+    """
+    body = zlib.decompress(data[len(snapshot.MAGIC) + 1 :])  # noqa
+    for old, new in rename.items():
+        old = bytes([len(old)]) + old.encode()
+        new = bytes([len(new)]) + new.encode()
+        body = body.replace(old, new, 1)
+    return data[: len(snapshot.MAGIC) + 1] + zlib.compress(body)
+
+
+def test_unknown_and_missing_fields():
+    notifications = _notifications(3)
+    data = _rewrite_fields(snapshot.dumps(notifications), {"reason": "motive"})
+    loaded = snapshot.loads(data)
+    assert [n.reason for n in loaded] == ["", "", ""]
+    assert [n.thread_id for n in loaded] == [n.thread_id for n in notifications]
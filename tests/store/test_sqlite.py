@@ -0,0 +1,221 @@
+from wnghub.model.notification import Notification
+from wnghub.store.base import BaseNotificationStore
+from wnghub.store.sqlite import SqliteNotificationStore
+import datetime
+
+
+def _notification(thread_id, title, repository="airflow", day=1):
+    return Notification(
+        thread_id=thread_id,
+        title=title,
+        repository=repository,
+        org="apache",
+        reason="mention",
+        type="IS",
+        is_issue=True,
+        updated_at=datetime.datetime(2020, 11, day, tzinfo=datetime.timezone.utc),
+    )
+
+
+def test_save_returns_delta():
+    store = SqliteNotificationStore(":memory:")
+    n1 = _notification("1", "Flaky test in scheduler")
+    n2 = _notification("2", "Add docs")
+    assert store.save([n1, n2]) == [n1, n2]
+    assert store.save([n1, n2]) == []
+    n2_updated = _notification("2", "Add more docs", day=2)
+    assert store.save([n1, n2_updated]) == [n2_updated]
+    assert store.count() == 2
+
+
+def test_notifications_round_trip():
+    store = SqliteNotificationStore(":memory:")
+    n1 = _notification("1", "Old", day=1)
+    n2 = _notification("2", "New", day=2)
+    store.save([n1, n2])
+    assert store.notifications() == [n2, n1]
+    assert store.notifications(limit=1) == [n2]
+
+
+def test_search():
+    store = SqliteNotificationStore(":memory:")
+    store.save(
+        [
+            _notification("1", "Flaky test in scheduler"),
+            _notification("2", "Flaky docs build", repository="docs"),
+            _notification("3", "Add feature"),
+        ]
+    )
+    assert [n.thread_id for n in store.search("flak tes")] == ["1"]
+    assert [n.thread_id for n in store.search("flaky repo:docs")] == ["2"]
+    assert store.search("nothing") == []
+    assert store.search('"') == []
+
+
+def test_search_index_updated():
+    store = SqliteNotificationStore(":memory:")
+    store.save([_notification("1", "Flaky test")])
+    store.save([_notification("1", "Renamed", day=2)])
+    assert store.search("flaky") == []
+    assert [n.thread_id for n in store.search("renamed")] == ["1"]
+
+
+def test_migrates_old_database(tmp_path):
+    import sqlite3
+
+    path = str(tmp_path / "old.db")
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE notifications (thread_id TEXT PRIMARY KEY, title TEXT, "
+        "abbrev_title TEXT, repository TEXT, org TEXT, html_url TEXT, "
+        "reason TEXT, type TEXT, is_pull INTEGER, is_issue INTEGER, updated_at TEXT)"
+    )
+    conn.execute("INSERT INTO notifications (thread_id, title) VALUES ('1', 'old')")
+    conn.commit()
+    conn.close()
+    store = SqliteNotificationStore(path)
+    assert store.notifications()[0].unread is True
+    assert store.unread_counts() == {"unread": 1, "reason:": 1, "type:": 1}
+
+
+def test_synced_at():
+    store = SqliteNotificationStore(":memory:")
+    assert store.synced_at() is None
+    at = datetime.datetime(2020, 11, 1, tzinfo=datetime.timezone.utc)
+    store.mark_synced(at)
+    assert store.synced_at() == at
+
+
+def test_unread_counts():
+    store = SqliteNotificationStore(":memory:")
+    n1 = _notification("1", "a")
+    n2 = _notification("2", "b")
+    n2.reason = "review_requested"
+    n3 = _notification("3", "c")
+    n3.unread = False
+    store.save([n1, n2, n3])
+    assert store.unread_counts() == {
+        "unread": 2,
+        "reason:mention": 1,
+        "reason:review_requested": 1,
+        "type:IS": 2,
+    }
+    n2.unread = False
+    n1.reason = "author"
+    store.save([n1, n2])
+    assert store.unread_counts() == {"unread": 1, "reason:author": 1, "type:IS": 1}
+    assert store.unread_counts() == BaseNotificationStore.unread_counts(store)
+    assert [n.thread_id for n in store.unread_notifications()] == ["1"]
+
+
+def test_daily_counts():
+    store = SqliteNotificationStore(":memory:")
+    n1 = _notification("1", "a", day=1)
+    n2 = _notification("2", "b", day=1)
+    n3 = _notification("3", "c", repository="spark", day=2)
+    n3.unread = False
+    store.save([n1, n2, n3])
+    assert [(c.day, c.repository, c.n, c.unread) for c in store.daily_counts()] == [
+        ("2020-11-01", "airflow", 2, 2),
+        ("2020-11-02", "spark", 1, 0),
+    ]
+    assert store.daily_counts() == BaseNotificationStore.daily_counts(store)
+    # Updated notifications are counted on every day they were updated,
+    # but are only unread on the day of their latest update
+    store.save([_notification("2", "b", day=3)])
+    store.save([_notification("2", "b", day=3)])
+    assert [(c.day, c.repository, c.n, c.unread) for c in store.daily_counts()] == [
+        ("2020-11-01", "airflow", 2, 1),
+        ("2020-11-02", "spark", 1, 0),
+        ("2020-11-03", "airflow", 1, 1),
+    ]
+    assert store.daily_counts(before=datetime.date(2020, 11, 2))[0].n == 2
+    assert store.daily_counts(reason="author") == []
+    assert store.delete(["2"]) == 1
+    assert [(c.day, c.n, c.unread) for c in store.daily_counts()] == [
+        ("2020-11-01", 1, 1),
+        ("2020-11-02", 1, 0),
+    ]
+
+
+def test_read_latencies():
+    store = SqliteNotificationStore(":memory:")
+    n = _notification("1", "a")
+    n.updated_at = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(
+        hours=2
+    )
+    store.save([n])
+    assert store.read_latencies() == []
+    n.unread = False
+    store.save([n])
+    (latency,) = store.read_latencies()
+    assert latency.n == 1
+    assert 7100 < latency.total_seconds < 7300
+    assert latency.max_seconds == latency.total_seconds
+
+
+def test_stats_backfilled_for_old_database(tmp_path):
+    path = str(tmp_path / "old.db")
+    store = SqliteNotificationStore(path)
+    store.save([_notification("1", "a"), _notification("2", "b")])
+    with store._conn:
+        store._conn.execute("DROP TABLE daily_counts")
+    store.close()
+    store = SqliteNotificationStore(path)
+    assert [(c.day, c.n, c.unread) for c in store.daily_counts()] == [
+        ("2020-11-01", 2, 2)
+    ]
+
+
+def test_review_requested_at():
+    store = SqliteNotificationStore(":memory:")
+    n = _notification("1", "a")
+    n.reason = "review_requested"
+    store.save([n, _notification("2", "b")])
+    requested_at = n.updated_at
+    n.updated_at += datetime.timedelta(days=2)
+    store.save([n])
+    assert store.review_requested_at() == [requested_at]
+    n.unread = False
+    store.save([n])
+    assert store.review_requested_at() == []
+
+
+def test_stats_upgraded_from_old_triggers(tmp_path):
+    path = str(tmp_path / "old.db")
+    store = SqliteNotificationStore(path)
+    n = _notification("1", "a")
+    n.reason = "review_requested"
+    store.save([n, _notification("2", "b")])
+    with store._conn:
+        for table in ("activity", "review_requests"):
+            store._conn.execute("DROP TABLE {}".format(table))
+        for trigger in ("ai", "ad", "au"):
+            store._conn.execute("DROP TRIGGER daily_activity_{}".format(trigger))
+            store._conn.execute("DROP TRIGGER review_requests_{}".format(trigger))
+        store._conn.execute(
+            "CREATE TRIGGER daily_counts_au AFTER UPDATE ON notifications "
+            "BEGIN UPDATE daily_counts SET n = n - 1; END"
+        )
+    store.close()
+    store = SqliteNotificationStore(path)
+    assert store.review_requested_at() == [n.updated_at]
+    store.save([_notification("2", "b", day=2)])
+    counts = store.daily_counts(reason="mention")
+    assert [(c.day, c.n) for c in counts] == [("2020-11-01", 1), ("2020-11-02", 1)]
+
+
+def test_delete_and_by_html_url():
+    store = SqliteNotificationStore(":memory:")
+    n1 = _notification("1", "Flaky test in scheduler")
+    n1.html_url = "https://github.com/apache/airflow/issues/1"
+    n2 = _notification("2", "Add docs")
+    n2.html_url = "https://github.com/apache/airflow/issues/2"
+    store.save([n1, n2])
+    assert store.by_html_url([n1.html_url, "https://github.com/a/b/pull/3"]) == {
+        n1.html_url: [n1]
+    }
+    assert store.with_thread_id_prefix("2") == [n2]
+    assert store.delete(["1", "3"]) == 1
+    assert [n.thread_id for n in store.notifications()] == ["2"]
+    assert store.unread_counts() == {"unread": 1, "reason:mention": 1, "type:IS": 1}
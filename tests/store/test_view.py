@@ -0,0 +1,34 @@
+from wnghub.model.notification import Notification
+from wnghub.store.sqlite import SqliteNotificationStore
+from wnghub.store.view import MaterializedView, MaterializedViews
+import datetime
+
+
+def _notification(thread_id, org, day=1):
+    return Notification(
+        thread_id=thread_id,
+        org=org,
+        updated_at=datetime.datetime(2020, 11, day),
+    )
+
+
+def test_materialized_view_apply_delta():
+    view = MaterializedView("apache", "org:apache")
+    view.load([_notification("1", "apache"), _notification("2", "other")])
+    assert [n.thread_id for n in view.notifications()] == ["1"]
+    view.apply_delta([_notification("3", "apache", day=2), _notification("1", "moved")])
+    assert [n.thread_id for n in view.notifications()] == ["3"]
+    view.apply_delta([_notification("4", "apache", day=3)])
+    assert [n.thread_id for n in view.notifications(limit=1)] == ["4"]
+    assert len(view) == 2
+
+
+def test_materialized_views_follow_store():
+    store = SqliteNotificationStore(":memory:")
+    store.save([_notification("1", "apache")])
+    views = MaterializedViews({"apache": "org:apache", "rest": "NOT org:apache"}, store)
+    assert len(views.get("apache")) == 1
+    assert len(views.get("rest")) == 0
+    store.save([_notification("2", "other"), _notification("1", "apache")])
+    assert len(views.get("apache")) == 1
+    assert [n.thread_id for n in views.get("rest").notifications()] == ["2"]
@@ -0,0 +1,13 @@
+from wnghub.testing.loadtest import run_load_test
+from wnghub.testing.server import FakeGithubServer, generate_notifications
+
+
+def test_run_load_test():
+    with FakeGithubServer(generate_notifications(50), failure_rate=0.2) as server:
+        results = run_load_test(
+            server.url, concurrency_levels=(1, 4), requests_per_level=20, per_page=10
+        )
+    assert [r.concurrency for r in results] == [1, 4]
+    assert all(r.requests == 20 for r in results)
+    assert 0 < sum(r.errors for r in results) < 40
+    assert all(r.requests_per_second > 0 for r in results)
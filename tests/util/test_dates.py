@@ -0,0 +1,16 @@
+from wnghub.util.dates import as_utc, timestamp
+import datetime
+
+
+def test_as_utc():
+    naive = datetime.datetime(2020, 11, 1, 12)
+    aware = naive.replace(tzinfo=datetime.timezone(datetime.timedelta(hours=2)))
+    assert as_utc(naive) == naive.replace(tzinfo=datetime.timezone.utc)
+    assert as_utc(aware) is aware
+
+
+def test_timestamp():
+    naive = datetime.datetime(2020, 11, 1, 12)
+    assert timestamp(naive) == timestamp(as_utc(naive)) == 1604232000.0
+    assert timestamp(None) == 0.0
+    assert timestamp(None, missing=float("-inf")) == float("-inf")
@@ -0,0 +1,39 @@
+from wnghub.util.table import TableRenderer, terminal_columns
+from unittest.mock import Mock
+
+
+def test_render_widths():
+    renderer = TableRenderer()
+    lines = list(renderer.render(["A", "Bee"], [["hello", 1], ["hi", None]]))
+    assert lines[0] == "+-------+-----+"
+    assert lines[1] == "|   A   | Bee |"
+    assert lines[3] == "| hello |  1  |"
+    assert lines[4] == "|   hi  |     |"
+    assert len(lines) == 6
+
+
+def test_render_truncates_shrinkable_column():
+    renderer = TableRenderer(max_width=20)
+    rows = [["a" * 30, "url"]]
+    lines = list(renderer.render(["Title", "url"], rows, shrinkable=[0]))
+    assert all(len(line) <= 20 for line in lines)
+    assert "..." in lines[3]
+
+
+def test_render_does_not_truncate_other_columns():
+    renderer = TableRenderer(max_width=10)
+    lines = list(renderer.render(["url"], [["https://github.com"]]))
+    assert "https://github.com" in lines[3]
+
+
+def test_write_chunks():
+    renderer = TableRenderer(chunk_lines=2)
+    write = Mock()
+    renderer.write(["A"], [["x"]] * 4, write)
+    assert write.call_count == 4
+
+
+def test_terminal_columns_not_tty():
+    stream = Mock()
+    stream.isatty.return_value = False
+    assert terminal_columns(stream) is None
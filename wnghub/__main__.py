@@ -1,12 +1,22 @@
 #!/usr/bin/env python
 
-from wnghub.cli.base import cli
+import sys
+
+from wnghub.daemon.client import try_show
+from wnghub.store.counts import try_count
 
 
 def main():
     """
     This method is the entrypoint for the `wnghub` console script.
+
+    `wnghub count` and, if the daemon is running, commands it can
+    answer are answered before the rest of the CLI is even imported.
     """
+    if try_count(sys.argv[1:], sys.stdout) or try_show(sys.argv[1:], sys.stdout):
+        return
+    from wnghub.cli.base import cli
+
     cli()
 
 
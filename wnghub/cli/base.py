@@ -1,23 +1,167 @@
+import datetime
+
 import click
+from requests.exceptions import RequestException
 from wnghub.config.config import Config
-from wnghub.client.github import GithubApiClient
+from wnghub.client.cache import SharedResponseCache
+from wnghub.client.github import GithubApiClient, GithubHttpException
+from wnghub.controller.actions import ActionQueueController
 from wnghub.controller.config import ConfigController
 from wnghub.controller.github import GithubController
+from wnghub.controller.importer import NotificationImportController
+from wnghub.controller.pipeline import Pipeline
+from wnghub.controller.readstate import ReadStateController
+from wnghub.controller.stats import StatsController
 from wnghub.controller.view import NotificationViewController
+from wnghub.controller.webhook import WebhookController
+from wnghub.controller.tui import NotificationTuiController
+from wnghub.daemon import client as daemon_client
+from wnghub.daemon.server import DaemonRunningError, NotificationDaemon
+from wnghub.daemon.webhook import WebhookReceiver
+from wnghub.model.digest import GROUP_FIELDS, group_notifications
+from wnghub.store import columnar, snapshot
+from wnghub.store.actions import SqliteActionQueue
+from wnghub.store.archive import RawPageArchive
+from wnghub.store.counts import DEFAULT_FORMAT, format_counts, write_counts
+from wnghub.store.sqlite import SqliteNotificationStore
+from wnghub.store.view import MaterializedView, MaterializedViews
+
+
+def _store(config):
+    """
+    Opens local notification store, unless disabled in config.
+    """
+    if not config.store_path:
+        return None
+    store = SqliteNotificationStore(config.store_path)
+    # Keep counts file for `wnghub count` up to date
+    store.add_listener(lambda delta: write_counts(store.unread_counts()))
+    return store
+
+
+def _client(config):
+    """
+    Creates Github client, sharing responses with other wnghub processes
+    and archiving fetched pages if enabled in config.
+    """
+    shared_cache = None
+    if config.shared_cache_ttl:
+        shared_cache = SharedResponseCache(ttl=config.shared_cache_ttl)
+    client = GithubApiClient(config.auth_token, shared_cache=shared_cache)
+    if config.archive_path:
+        client.add_raw_page_listener(RawPageArchive(config.archive_path).append)
+    return client
+
+
+def _actions(config, client, **kwargs):
+    """
+    Creates controller for queued Github writes, kept next to the local
+    store so they survive restarts, or in memory if it is disabled.
+    """
+    queue = SqliteActionQueue(config.store_path or ":memory:")
+    return ActionQueueController(client, config, queue, **kwargs)
+
+
+def _controller(client, config, **kwargs):
+    """
+    Creates Github controller, with custom stages installed as plugins.
+    """
+    pipeline = Pipeline.discover(config)
+    for error in pipeline.errors:
+        click.echo(error, err=True)
+    return GithubController(client, config, pipeline=pipeline, **kwargs)
+
+
+def _batches(items, size):
+    """
+    Groups items into lists of at most `size`, without reading ahead.
+    """
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _require_store(config):
+    """
+    Opens local notification store, failing if disabled in config.
+    """
+    store = _store(config)
+    if store is None:
+        raise click.ClickException("Local store is disabled. Set store_path.")
+    return store
+
+
+"""
+Errors that mean Github couldn't be reached, as opposed to bad
+credentials or bad input.
+"""
+_network_errors = (GithubHttpException, RequestException)
+
+
+def _display_stale_while_revalidate(controller, view_controller, deadline, **kwargs):
+    """
+    Displays notifications from the local store right away, then
+    refreshes them from Github, displaying them again only if the
+    refresh finishes within `deadline` seconds and changed anything.
+    """
+    store = controller.store
+    snapshot = controller.get_stored_notifications(**kwargs)
+    view_controller.display(snapshot)
+    view_controller.display_snapshot_age(store.synced_at(), "Refreshing...")
+    try:
+        results = controller.refresh_notifications(deadline, **kwargs)
+    except _network_errors:
+        click.echo("Github is unreachable. Showing saved notifications.")
+        return
+    if results is None:
+        click.echo("Refresh did not finish in time. Showing saved notifications.")
+    elif results != snapshot:
+        click.echo("Updated:")
+        view_controller.display(results)
+    else:
+        click.echo("Up to date.")
 
 
 @click.group(invoke_without_command=True)
 @click.option("-A/--only-unread", default=False)
+@click.option("-q", "--query", default=None, help="Filter query, ie 'org:apache'.")
+@click.option(
+    "--stale/--no-stale",
+    default=None,
+    help="Show saved notifications right away, then refresh them.",
+)
 @click.pass_context
-def cli(ctx, a):
+def cli(ctx, a, query, stale):
     ctx.obj = Config.read()
     if ctx.invoked_subcommand is None:
         config = ctx.obj
-        auth_token = config.auth_token
-        client = GithubApiClient(auth_token)
-        controller = GithubController(client, config)
-        results = controller.get_notifications(all=a)
+        client = _client(config)
+        store = _store(config)
+        controller = _controller(client, config, store=store)
         view_controller = NotificationViewController(config)
+        if stale is None:
+            stale = config.stale_while_revalidate
+        if stale and store is not None:
+            _display_stale_while_revalidate(
+                controller, view_controller, config.refresh_deadline, all=a, query=query
+            )
+            return
+        try:
+            results = controller.get_notifications(all=a, query=query)
+        except _network_errors:
+            if store is None:
+                raise
+            results = controller.get_stored_notifications(all=a, query=query)
+            view_controller.display(results)
+            view_controller.display_snapshot_age(
+                store.synced_at(), "Github is unreachable."
+            )
+            return
         view_controller.display(results)
 
 
@@ -45,11 +189,16 @@ def get_config(ctx, field_name):
 
 @click.command("set-config", help="Sets value in config file")
 @click.argument("field_name", nargs=1)
-@click.argument("value", nargs=1)
+@click.argument("values", nargs=-1, required=True)
 @click.pass_context
-def set_config(ctx, field_name, value):
+def set_config(ctx, field_name, values):
     controller = ConfigController(ctx.obj)
-    controller.set(field_name, value)
+    if field_name in ConfigController.repeated_fields:
+        controller.set(field_name, list(values))
+        return
+    if len(values) != 1:
+        raise click.UsageError("{} takes exactly one value.".format(field_name))
+    controller.set(field_name, values[0])
 
 
 @click.command("reset-config", help="Resets value in config file to default")
@@ -60,10 +209,450 @@ def reset_config(ctx, field_name):
     controller.reset(field_name)
 
 
+@click.command("tui", help="Interactive, full-screen view of notifications.")
+@click.option("-A/--only-unread", default=False)
+@click.option("-n", "--num-results", default=1000, help="Max notifications to load.")
+@click.option("--interval", default=60.0, help="Seconds between background refreshes.")
+@click.pass_context
+def tui(ctx, a, num_results, interval):
+    config = ctx.obj
+    client = _client(config)
+    store = _store(config)
+    views = None
+    if store is not None and config.saved_views:
+        views = MaterializedViews(config.saved_views, store)
+    read_state = ReadStateController(
+        client, config, store=store, actions=_actions(config, client)
+    )
+    controller = _controller(client, config, store=store, read_state=read_state)
+    tui_controller = NotificationTuiController(
+        controller,
+        config,
+        all=a,
+        num_results=num_results,
+        refresh_interval=interval,
+        views=views,
+    )
+    tui_controller.run()
+    if not read_state.flush(timeout=5.0):
+        click.echo(
+            "Couldn't mark {} notifications as read on Github yet. "
+            "Run `wnghub outbox --drain` to retry.".format(len(read_state.pending()))
+        )
+
+
+@click.command("search", help="Searches notifications saved locally.")
+@click.argument("query", nargs=-1, required=True)
+@click.option("-n", "--num-results", default=20, help="Max results to show.")
+@click.pass_context
+def search(ctx, query, num_results):
+    config = ctx.obj
+    store = _require_store(config)
+    results = store.search(" ".join(query), limit=num_results)
+    view_controller = NotificationViewController(config)
+    view_controller.display(results)
+
+
+@click.command("save-view", help="Saves a named view with a filter query.")
+@click.argument("name", nargs=1)
+@click.argument("query", nargs=1)
+@click.pass_context
+def save_view(ctx, name, query):
+    controller = ConfigController(ctx.obj)
+    controller.save_view(name, query)
+
+
+@click.command("delete-view", help="Deletes a saved view.")
+@click.argument("name", nargs=1)
+@click.pass_context
+def delete_view(ctx, name):
+    controller = ConfigController(ctx.obj)
+    controller.delete_view(name)
+
+
+@click.command("view", help="Shows locally saved notifications in a saved view.")
+@click.argument("name", nargs=1)
+@click.option("-n", "--num-results", default=None, type=int, help="Max results.")
+@click.pass_context
+def view(ctx, name, num_results):
+    config = ctx.obj
+    saved_views = config.saved_views or {}
+    if name not in saved_views:
+        raise click.ClickException(
+            "No saved view: {}. Possible values: {}".format(name, list(saved_views))
+        )
+    materialized = MaterializedView(name, saved_views[name])
+    materialized.load(_require_store(config).notifications())
+    results = materialized.notifications(limit=num_results or config.show_num_results)
+    view_controller = NotificationViewController(config)
+    view_controller.display(results)
+
+
+@click.command("backfill", help="Imports notification history into local store.")
+@click.option("--since", type=click.DateTime(), default=None, help="Start of range.")
+@click.option("--before", type=click.DateTime(), default=None, help="End of range.")
+@click.option("--fetch-workers", default=8, help="Concurrent page fetches.")
+@click.option("--parse-workers", default=None, type=int, help="Parsing processes.")
+@click.pass_context
+def backfill(ctx, since, before, fetch_workers, parse_workers):
+    config = ctx.obj
+    client = _client(config)
+    controller = NotificationImportController(
+        client,
+        config,
+        _require_store(config),
+        fetch_workers=fetch_workers,
+        parse_workers=parse_workers,
+    )
+    result = controller.run(all=True, since=since, before=before)
+    click.echo(
+        "Imported {} notifications from {} pages ({} new or changed).".format(
+            result.notifications, result.pages, result.changed
+        )
+    )
+
+
+@click.command("reparse", help="Rebuilds local store from archived pages.")
+@click.option("--since", type=click.DateTime(), default=None, help="Start of range.")
+@click.option("--before", type=click.DateTime(), default=None, help="End of range.")
+@click.pass_context
+def reparse(ctx, since, before):
+    config = ctx.obj
+    if not config.archive_path:
+        raise click.ClickException("Archive is disabled. Set archive_path.")
+    store = _require_store(config)
+    total = 0
+    batch = []
+    with RawPageArchive(config.archive_path) as archive:
+        for notification in archive.notifications(since=since, before=before):
+            batch.append(notification)
+            if len(batch) >= 500:
+                total += len(store.save(batch))
+                batch = []
+        total += len(store.save(batch))
+    click.echo("Reparsed archive ({} new or changed).".format(total))
+
+
+@click.command("export-snapshot", help="Writes local store to a binary snapshot.")
+@click.argument("path", type=click.Path(dir_okay=False, writable=True))
+@click.pass_context
+def export_snapshot(ctx, path):
+    notifications = _require_store(ctx.obj).notifications()
+    with open(path, "wb") as f:
+        snapshot.dump(notifications, f)
+    click.echo("Wrote {} notifications to {}.".format(len(notifications), path))
+
+
+@click.command("import-snapshot", help="Loads a binary snapshot into local store.")
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+@click.pass_context
+def import_snapshot(ctx, path):
+    store = _require_store(ctx.obj)
+    try:
+        with open(path, "rb") as f:
+            notifications = snapshot.load(f)
+    except snapshot.SnapshotFormatError as e:
+        raise click.ClickException(str(e))
+    delta = store.save(notifications)
+    click.echo(
+        "Loaded {} notifications ({} new or changed).".format(
+            len(notifications), len(delta)
+        )
+    )
+
+
+@click.command("export", help="Writes local store to a Parquet or Arrow file.")
+@click.argument("path", type=click.Path(dir_okay=False, writable=True))
+@click.option(
+    "--format",
+    "fmt",
+    type=click.Choice([columnar.PARQUET, columnar.ARROW]),
+    default=None,
+    help="By default, from extension of path.",
+)
+@click.option("--batch-size", default=10000, help="Notifications per batch.")
+@click.option(
+    "--from-github",
+    is_flag=True,
+    default=False,
+    help="Streams notifications from Github instead. See memory_budget_mb.",
+)
+@click.option("-A/--only-unread", default=False)
+@click.option("-q", "--query", default=None, help="Filter query, ie 'org:apache'.")
+@click.option("-n", "--num-results", default=100000, help="Max notifications.")
+@click.pass_context
+def export(ctx, path, fmt, batch_size, from_github, a, query, num_results):
+    config = ctx.obj
+    try:
+        if from_github:
+            controller = _controller(_client(config), config, store=_store(config))
+            notifications = controller.iter_notifications(
+                all=a, query=query, num_results=num_results
+            )
+            batches = _batches((n.to_record() for n in notifications), batch_size)
+            written = columnar.export_records(batches, path, fmt=fmt)
+        else:
+            store = _require_store(config)
+            written = columnar.export(store, path, fmt=fmt, batch_size=batch_size)
+    except (columnar.ColumnarFormatError, columnar.ColumnarUnavailableError) as e:
+        raise click.ClickException(str(e))
+    click.echo("Exported {} notifications to {}.".format(written, path))
+
+
+@click.command("import", help="Loads a Parquet or Arrow file into local store.")
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+@click.option(
+    "--format",
+    "fmt",
+    type=click.Choice([columnar.PARQUET, columnar.ARROW]),
+    default=None,
+    help="By default, from extension of path.",
+)
+@click.option("--batch-size", default=10000, help="Notifications per batch.")
+@click.pass_context
+def import_(ctx, path, fmt, batch_size):
+    store = _require_store(ctx.obj)
+    try:
+        changed = columnar.load(store, path, fmt=fmt, batch_size=batch_size)
+    except (columnar.ColumnarFormatError, columnar.ColumnarUnavailableError) as e:
+        raise click.ClickException(str(e))
+    click.echo("Imported {} new or changed notifications.".format(changed))
+
+
+@click.command("daemon", help="Runs daemon that answers wnghub instantly.")
+@click.option("--interval", default=60.0, help="Seconds between refreshes.")
+@click.option("--socket", "path", default=None, help="Path of Unix socket.")
+@click.option("--stop", is_flag=True, default=False, help="Stops running daemon.")
+@click.pass_context
+def daemon(ctx, interval, path, stop):
+    if stop:
+        if daemon_client.request({"cmd": "stop"}, path=path) is None:
+            raise click.ClickException("Daemon is not running.")
+        return
+    config = ctx.obj
+    client = _client(config)
+    controller = _controller(client, config, store=_store(config))
+    notification_daemon = NotificationDaemon(
+        controller, config, path=path, interval=interval
+    )
+    # Drain writes queued by other wnghub processes in the background
+    actions = _actions(config, client).start()
+    try:
+        notification_daemon.serve_forever()
+    except DaemonRunningError as e:
+        raise click.ClickException(str(e))
+    finally:
+        actions.stop()
+
+
+@click.command("webhook", help="Receives Github webhooks into local store.")
+@click.option("--host", default="127.0.0.1", help="Host to listen on.")
+@click.option("--port", default=8787, help="Port to listen on.")
+@click.option("--login", default=None, help="Your Github login. See github_login.")
+@click.option(
+    "--reconcile-interval",
+    default=900.0,
+    help="Seconds between polls of Github, to catch up.",
+)
+@click.pass_context
+def webhook(ctx, host, port, login, reconcile_interval):
+    config = ctx.obj
+    store = _require_store(config)
+    controller = WebhookController(config, store, login=login)
+    github = _controller(_client(config), config, store=store)
+    receiver = WebhookReceiver(
+        controller,
+        host=host,
+        port=port,
+        secret=config.webhook_secret,
+        github=github,
+        reconcile_interval=reconcile_interval,
+    )
+    if not config.webhook_secret:
+        click.echo("webhook_secret is not set, so payloads aren't verified.")
+    if not controller.login:
+        click.echo("github_login is not set, so every reason is 'subscribed'.")
+    click.echo("Receiving webhooks on {}".format(receiver.url))
+    receiver.serve_forever()
+
+
+@click.command("outbox", help="Shows writes to Github that are still queued.")
+@click.option("--drain", is_flag=True, default=False, help="Makes queued writes now.")
+@click.option(
+    "--retry-failed", is_flag=True, default=False, help="Queues failed writes again."
+)
+@click.option("--timeout", default=60.0, help="Max seconds to drain for.")
+@click.pass_context
+def outbox(ctx, drain, retry_failed, timeout):
+    config = ctx.obj
+    actions = _actions(config, _client(config))
+    if retry_failed:
+        actions.queue.retry_failed()
+    if drain:
+        actions.drain(timeout=timeout)
+    failed = actions.queue.failed()
+    click.echo("{} pending, {} failed.".format(actions.queue.count(), len(failed)))
+    for action in failed:
+        click.echo("{} {}: {}".format(action.name, action.thread_id, action.error))
+
+
+@click.command("mute", help="Stops notifications matching query at the source.")
+@click.argument("query", nargs=-1, required=True)
+@click.option(
+    "--repos", is_flag=True, default=False, help="Unwatches their repositories instead."
+)
+@click.option("-A/--only-unread", default=False)
+@click.option("-n", "--num-results", default=1000, help="Max notifications to match.")
+@click.option("--concurrency", default=8, help="Concurrent API calls.")
+@click.option("--timeout", default=60.0, help="Max seconds to wait for Github.")
+@click.option("-y", "--yes", is_flag=True, default=False, help="Don't ask to confirm.")
+@click.pass_context
+def mute(ctx, query, repos, a, num_results, concurrency, timeout, yes):
+    config = ctx.obj
+    client = _client(config)
+    controller = _controller(client, config, store=_store(config))
+    matches = controller.get_notifications(
+        all=a, query=" ".join(query), num_results=num_results
+    )
+    if not matches:
+        click.echo("No notifications match.")
+        return
+    if repos:
+        targets = sorted({"{}/{}".format(n.org, n.repository) for n in matches})
+        prompt = "Unwatch {} repositories ({})?".format(
+            len(targets), ", ".join(targets)
+        )
+    else:
+        prompt = "Mute {} threads?".format(len({n.thread_id for n in matches}))
+    if not yes and not click.confirm(prompt):
+        return
+    actions = _actions(config, client, concurrency=concurrency)
+    queued = actions.mute(matches, repositories=repos)
+    if not actions.drain(timeout=timeout):
+        click.echo("Github is slow. Run `wnghub outbox --drain` to finish.")
+    unfinished = {
+        action.thread_id for action in actions.queue.pending() + actions.queue.failed()
+    }
+    done = [key for key in queued if key not in unfinished]
+    click.echo(
+        "{} {} of {}.".format("Unwatched" if repos else "Muted", len(done), len(queued))
+    )
+
+
+@click.command("digest", help="Shows notifications grouped into a short summary.")
+@click.option(
+    "-b",
+    "--by",
+    type=click.Choice(list(GROUP_FIELDS)),
+    default="repo",
+    help="Group by.",
+)
+@click.option("-A/--only-unread", default=False)
+@click.option("-q", "--query", default=None, help="Filter query, ie 'org:apache'.")
+@click.option("-d", "--days", default=None, type=float, help="Only the last N days.")
+@click.option("-e", "--expand", multiple=True, help="Lists notifications of group.")
+@click.option("-n", "--num-results", default=1000, help="Max notifications to group.")
+@click.option(
+    "--stored", is_flag=True, default=False, help="Uses notifications saved locally."
+)
+@click.pass_context
+def digest(ctx, by, a, query, days, expand, num_results, stored):
+    config = ctx.obj
+    kwargs = {"all": a, "query": query, "num_results": num_results}
+    if days is not None:
+        kwargs["since"] = datetime.datetime.now(
+            datetime.timezone.utc
+        ) - datetime.timedelta(days=days)
+    if stored:
+        controller = _controller(None, config, store=_require_store(config))
+        notifications = controller.get_stored_notifications(**kwargs)
+    else:
+        controller = _controller(_client(config), config, store=_store(config))
+        notifications = controller.get_notifications(**kwargs)
+    view_controller = NotificationViewController(config)
+    view_controller.display_digest(
+        group_notifications(notifications, by=by), by, expand=expand
+    )
+
+
+@click.command("stats", help="Shows metrics over notifications saved locally.")
+@click.option("-d", "--days", default=30, help="Number of days to cover.")
+@click.option("--since", type=click.DateTime(), default=None, help="Start of range.")
+@click.option("--before", type=click.DateTime(), default=None, help="End of range.")
+@click.option("-n", "--num-repos", default=10, help="Max repositories to show.")
+@click.pass_context
+def stats(ctx, days, since, before, num_repos):
+    config = ctx.obj
+    controller = StatsController(config, _require_store(config))
+    results = controller.compute(
+        since=since.date() if since else None,
+        before=before.date() if before else None,
+        days=days,
+    )
+    view_controller = NotificationViewController(config)
+    view_controller.display_stats(results, num_repositories=num_repos)
+
+
+@click.command("inbox", help="Shows the notifications that matter most first.")
+@click.option("-n", "--num-results", default=10, help="Max results to show.")
+@click.option("-q", "--query", default=None, help="Filter query, ie 'org:apache'.")
+@click.option("--pool", default=1000, help="Number of recent notifications to rank.")
+@click.option(
+    "--stored", is_flag=True, default=False, help="Uses notifications saved locally."
+)
+@click.pass_context
+def inbox(ctx, num_results, query, pool, stored):
+    config = ctx.obj
+    if stored:
+        controller = _controller(None, config, store=_require_store(config))
+    else:
+        controller = _controller(_client(config), config, store=_store(config))
+    results = controller.get_ranked_notifications(
+        pool=pool, stored=stored, query=query, num_results=num_results
+    )
+    view_controller = NotificationViewController(config)
+    view_controller.display(results)
+
+
+@click.command("count", help="Shows counts of unread notifications saved locally.")
+@click.option(
+    "-f",
+    "--format",
+    "fmt",
+    default=DEFAULT_FORMAT,
+    help="Template, ie '{unread} unread, {PR} PRs, {mention} mentions'.",
+)
+@click.pass_context
+def count(ctx, fmt):
+    store = _require_store(ctx.obj)
+    counts = store.unread_counts()
+    write_counts(counts)
+    click.echo(format_counts(counts, fmt))
+
+
 cli.add_command(auth)
 cli.add_command(get_config)
 cli.add_command(set_config)
 cli.add_command(reset_config)
+cli.add_command(tui)
+cli.add_command(search)
+cli.add_command(save_view)
+cli.add_command(delete_view)
+cli.add_command(view)
+cli.add_command(backfill)
+cli.add_command(reparse)
+cli.add_command(export_snapshot)
+cli.add_command(import_snapshot)
+cli.add_command(export)
+cli.add_command(import_)
+cli.add_command(daemon)
+cli.add_command(webhook)
+cli.add_command(count)
+cli.add_command(outbox)
+cli.add_command(mute)
+cli.add_command(digest)
+cli.add_command(stats)
+cli.add_command(inbox)
 
 if __name__ == "__main__":
     cli()
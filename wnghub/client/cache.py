@@ -0,0 +1,106 @@
+import hashlib
+import json
+import os
+import time
+from typing import Callable, Optional
+
+from wnghub.config.base import config_path
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - ie on Windows
+    fcntl = None
+
+
+class SharedResponseCache(object):
+    """
+    Cache of API responses shared by every wnghub process on the
+    machine, ie a shell prompt, a tmux status line and an editor
+    plugin all polling notifications for the same token.
+
+    Each entry is a small JSON file. When an entry is missing or
+    older than `ttl`, the first process to ask for it takes an
+    exclusive lock on the entry and fetches it, while the others
+    wait on the lock and then read its result, so concurrent
+    processes make one API call between them.
+
+    Without `fcntl` (ie on Windows), entries are still shared but
+    concurrent fetches aren't coalesced.
+
+    :param directory: where to keep entries. By default, `DEFAULT_CACHE_DIR`
+    :type directory: Optional[str]
+    :param ttl: seconds an entry is fresh for
+    :type ttl: float
+    """
+
+    DEFAULT_CACHE_DIR = "~/wnghub.cache"
+
+    def __init__(self, directory: Optional[str] = None, ttl: float = 10.0):
+        self.directory = config_path(directory or self.DEFAULT_CACHE_DIR)
+        self.ttl = ttl
+        self.directory.mkdir(mode=0o700, parents=True, exist_ok=True)
+
+    def get_or_fetch(self, key: str, fetch: Callable[[], object]):
+        """
+        Gets fresh value for key, fetching and storing it if needed.
+
+        :param key: identifies the request, ie its url and params
+        :type key: str
+        :param fetch: function making the request. Its result must be
+                      JSON serializable
+        :type fetch: Callable[[], object]
+        :return: the cached or fetched value. Tuples come back as lists
+        """
+        name = hashlib.sha256(key.encode("utf-8")).hexdigest()
+        path = self.directory / (name + ".json")
+        hit = self._read(path)
+        if hit is not None:
+            return hit[0]
+        with open(self.directory / (name + ".lock"), "a") as lock:
+            if fcntl is not None:
+                # Blocks while another process is fetching the same key
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                hit = self._read(path)
+                if hit is not None:
+                    return hit[0]
+                value = fetch()
+                self._write(path, value)
+                return value
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def clear(self):
+        """
+        Removes every entry.
+        """
+        for path in self.directory.glob("*.json"):
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+
+    def _read(self, path) -> Optional[tuple]:
+        """
+        Reads entry if it is fresh.
+
+        :return: Optional[tuple] of the value, or None on a miss
+        """
+        try:
+            with open(path) as f:
+                entry = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+        if time.time() - entry.get("fetched_at", 0) > self.ttl:
+            return None
+        return (entry.get("value"),)
+
+    def _write(self, path, value):
+        # Written to a temp file and renamed, so readers never see
+        # a partially written entry
+        tmp = path.with_name("{}.{}.tmp".format(path.name, os.getpid()))
+        fd = os.open(str(tmp), os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w") as f:
+            json.dump({"fetched_at": time.time(), "value": value}, f)
+        os.replace(str(tmp), str(path))
@@ -1,12 +1,38 @@
-from typing import Optional, List
+import hashlib
+import json
+from typing import Callable, Optional, List, Tuple
 from datetime import datetime
+from dataclasses import dataclass
 from functools import lru_cache
+from urllib.parse import urlparse, parse_qs
 from requests import request
 from abc import ABC, abstractmethod
 
+from wnghub.client.cache import SharedResponseCache
 from wnghub.model.notification import Notification
 
 
+@dataclass
+class NotificationsPage:
+    """
+    One page of notifications, along with where to find the rest.
+
+    :param notifications: notifications in page
+    :type notifications: List[Notification]
+    :param page: number of this page
+    :type page: int
+    :param next_page: number of next page, None if this is the last one
+    :type next_page: Optional[int]
+    :param last_page: number of last page, if known
+    :type last_page: Optional[int]
+    """
+
+    notifications: List[Notification]
+    page: int = 1
+    next_page: Optional[int] = None
+    last_page: Optional[int] = None
+
+
 class BaseGithubClient(ABC):
     """
     Base Github client class for interacting with
@@ -17,6 +43,16 @@ class BaseGithubClient(ABC):
 
     auth_token: str = ""
 
+    max_per_page: int = 100
+
+    """
+    Requests left in current rate limit window, and when (epoch
+    seconds) the window resets. None until known.
+    """
+    rate_limit_remaining: Optional[int] = None
+
+    rate_limit_reset: Optional[float] = None
+
     def __init__(self, auth_token: str):
         if auth_token is None or auth_token == "":
             raise BadCredentialsError(
@@ -36,6 +72,61 @@ class BaseGithubClient(ABC):
     ) -> List[Notification]:
         pass
 
+    def get_notifications_page(
+        self,
+        all: bool = False,
+        participating: bool = False,
+        since: Optional[datetime] = None,
+        before: Optional[datetime] = None,
+        per_page: int = None,
+        page: int = 1,
+    ) -> NotificationsPage:
+        """
+        Gets page of notifications along with the numbers of the next
+        and last pages. By default, assumes there is another page if
+        this one is full.
+
+        :return: NotificationsPage
+        """
+        notifications = self.get_notifications(
+            all=all,
+            participating=participating,
+            since=since,
+            before=before,
+            per_page=per_page,
+            page=page,
+        )
+        has_next = per_page is not None and len(notifications) >= per_page
+        return NotificationsPage(
+            notifications, page=page, next_page=page + 1 if has_next else None
+        )
+
+    def fetch_notifications_page(
+        self,
+        all: bool = False,
+        participating: bool = False,
+        since: Optional[datetime] = None,
+        before: Optional[datetime] = None,
+        per_page: int = None,
+        page: int = 1,
+    ) -> NotificationsPage:
+        """
+        Gets page of notifications like `get_notifications_page`, but
+        without keeping it in memory for later calls, ie when streaming
+        through more pages than fit in memory. By default, the same as
+        `get_notifications_page`.
+
+        :return: NotificationsPage
+        """
+        return self.get_notifications_page(
+            all=all,
+            participating=participating,
+            since=since,
+            before=before,
+            per_page=per_page,
+            page=page,
+        )
+
     @abstractmethod
     def update_notification_status(
         self,
@@ -44,6 +135,21 @@ class BaseGithubClient(ABC):
     ):
         pass
 
+    @abstractmethod
+    def ignore_thread(self, notification: Notification):
+        pass
+
+    @abstractmethod
+    def unwatch_repository(self, org: str, repository: str):
+        pass
+
+    def clear_cache(self):
+        """
+        Clears any cached responses, so the next call
+        fetches fresh data from Github.
+        """
+        pass
+
 
 class GithubApiClient(BaseGithubClient):
     """
@@ -52,16 +158,49 @@ class GithubApiClient(BaseGithubClient):
 
     :param auth_token: Github personal access token
     :type auth_token: str
+    :param api_url: base url of Github's API. Override to point the
+                    client at another server, ie for testing
+    :type api_url: Optional[str]
+    :param shared_cache: optional cache of notifications responses shared
+                         with other wnghub processes
+    :type shared_cache: Optional[SharedResponseCache]
     """
 
-    _notifications_url = "https://api.github.com/notifications"
-
-    _notifications_status_url = "https://api.github.com/notifications/threads"
+    _default_api_url = "https://api.github.com"
 
     _unauthorized_code = 401
 
     _auth_token_info_url = "https://docs.github.com/en/free-pro-team@latest/github/authenticating-to-github/creating-a-personal-access-token"  # noqa
 
+    def __init__(
+        self,
+        auth_token: str,
+        api_url: Optional[str] = None,
+        shared_cache: Optional[SharedResponseCache] = None,
+    ):
+        BaseGithubClient.__init__(self, auth_token)
+        self.api_url = (api_url or self._default_api_url).rstrip("/")
+        self.shared_cache = shared_cache
+        self._raw_page_listeners: List[Callable[[str], None]] = []
+
+    def add_raw_page_listener(self, listener: Callable[[str], None]):
+        """
+        Registers function to call with the body of every notifications
+        page fetched from Github, ie to archive it.
+
+        :param listener: function to call
+        :type listener: Callable[[str], None]
+        """
+        self._raw_page_listeners.append(listener)
+
+    @property
+    def _notifications_url(self):
+        return "{}/notifications".format(self.api_url)
+
+    @property
+    def _notifications_status_url(self):
+        return "{}/notifications/threads".format(self.api_url)
+
     @property
     def default_headers(self):
         """
@@ -72,7 +211,6 @@ class GithubApiClient(BaseGithubClient):
             "accept": "application/vnd.github.v3+json",
         }
 
-    @lru_cache(maxsize=None)
     def get_notifications(
         self,
         all: bool = False,
@@ -96,7 +234,58 @@ class GithubApiClient(BaseGithubClient):
         :type before: Optional[datetime.datetime]
         :return: List[Notification]
         """
-        raw_res = self._notifications(
+        return self.get_notifications_page(
+            all=all,
+            participating=participating,
+            since=since,
+            before=before,
+            per_page=per_page,
+            page=page,
+        ).notifications
+
+    @lru_cache(maxsize=None)
+    def get_notifications_page(
+        self,
+        all: bool = False,
+        participating: bool = False,
+        since: Optional[datetime] = None,
+        before: Optional[datetime] = None,
+        per_page: int = 10,
+        page: int = 1,
+    ) -> NotificationsPage:
+        """
+        Retrieves page of users' notifications, with the next and last
+        page numbers taken from the `Link` header of the response.
+
+        Takes the same params as `get_notifications`.
+
+        :return: NotificationsPage
+        """
+        raw_res, next_page, last_page = self._notifications(
+            all=all,
+            participating=participating,
+            since=since,
+            before=before,
+            per_page=per_page,
+            page=page,
+        )
+        res = Notification.load_from_json_str(raw_res)
+        return NotificationsPage(
+            res, page=page, next_page=next_page, last_page=last_page
+        )
+
+    def fetch_notifications_page(
+        self,
+        all: bool = False,
+        participating: bool = False,
+        since: Optional[datetime] = None,
+        before: Optional[datetime] = None,
+        per_page: int = 10,
+        page: int = 1,
+    ) -> NotificationsPage:
+        # Skips the in-memory caches, which keep every page until cleared,
+        # but still shares responses with other processes
+        raw_res, next_page, last_page = self._fetch_notifications(
             all=all,
             participating=participating,
             since=since,
@@ -105,7 +294,9 @@ class GithubApiClient(BaseGithubClient):
             page=page,
         )
         res = Notification.load_from_json_str(raw_res)
-        return res
+        return NotificationsPage(
+            res, page=page, next_page=next_page, last_page=last_page
+        )
 
     def update_notification_status(
         self,
@@ -135,13 +326,47 @@ class GithubApiClient(BaseGithubClient):
         url = "{}/{}".format(self._notifications_status_url, notification.thread_id)
         headers = self.default_headers
         res = request("PATCH", url, headers=headers)
-        status_code = res.status_code
-        self._unauthorized_status_code(status_code)
-        if not (status_code == 205 or status_code == 304):
-            raise GithubHttpException("Unknown error with Github API.")
+        self._check_write(res, (205, 304))
 
-    @lru_cache(maxsize=None)
-    def _notifications(
+    def ignore_thread(self, notification: Notification):
+        """
+        Mutes thread of given notification, so Github stops sending
+        notifications for it, even when the user is mentioned.
+
+        :param notification: notification of thread to mute
+        :type notification: Notification
+        """
+        thread_id = notification.thread_id
+        if thread_id is None or thread_id == "":
+            raise GithubHttpException("Thread ID missing from given Notification.")
+        url = "{}/{}/subscription".format(self._notifications_status_url, thread_id)
+        res = request("PUT", url, headers=self.default_headers, json={"ignored": True})
+        self._check_write(res, (200,))
+
+    def unwatch_repository(self, org: str, repository: str):
+        """
+        Stops watching repository, so Github only sends notifications
+        for its threads the user participates in.
+
+        :param org: owner of repository
+        :type org: str
+        :param repository: name of repository
+        :type repository: str
+        """
+        if not org or not repository:
+            raise GithubHttpException("Org and repository are required.")
+        url = "{}/repos/{}/{}/subscription".format(self.api_url, org, repository)
+        res = request("DELETE", url, headers=self.default_headers)
+        self._check_write(res, (204,))
+
+    def clear_cache(self):
+        """
+        Clears cached notifications responses.
+        """
+        GithubApiClient.get_notifications_page.cache_clear()
+        GithubApiClient._notifications.cache_clear()
+
+    def get_raw_notifications_page(
         self,
         all: bool = False,
         participating: bool = False,
@@ -149,9 +374,12 @@ class GithubApiClient(BaseGithubClient):
         before: Optional[datetime] = None,
         page: int = 1,
         per_page: int = 10,
-    ) -> str:
+    ) -> Tuple[str, Optional[int], Optional[int]]:
         """
-        API call for getting notifications
+        API call for getting notifications, without parsing or
+        caching the response. Along with the response body, returns
+        the next and last page numbers from the response's `Link`
+        header (None if missing).
 
         :param all: whether to retrieve all notifications, or just new ones
         :type all: bool
@@ -162,7 +390,7 @@ class GithubApiClient(BaseGithubClient):
         :type since: Optional[datetime.datetime]
         :param before: optional datetime for end of notification range to fetch
         :type before: Optional[datetime.datetime]
-        :return: str
+        :return: Tuple[str, Optional[int], Optional[int]]
         """
         headers = self.default_headers
         params = {
@@ -175,16 +403,111 @@ class GithubApiClient(BaseGithubClient):
             params["since"] = since.isoformat()
         if before is not None:
             params["before"] = before.isoformat()
-        if per_page > 100:
+        if per_page > self.max_per_page:
             raise Exception(
-                "Github API support maximum 100 notifications per page for api calls"
+                "Github API support maximum {} notifications per page "
+                "for api calls".format(self.max_per_page)
             )
         res = request("GET", self._notifications_url, headers=headers, params=params)
+        self._record_rate_limit(res)
         status_code = res.status_code
         self._unauthorized_status_code(status_code)
         if status_code != 200:
             raise GithubHttpException("Unknown error occurred with Github API.")
-        return res.text
+        for listener in self._raw_page_listeners:
+            listener(res.text)
+        return (
+            res.text,
+            _link_page(res.links, "next"),
+            _link_page(res.links, "last"),
+        )
+
+    @lru_cache(maxsize=None)
+    def _notifications(
+        self,
+        all: bool = False,
+        participating: bool = False,
+        since: Optional[datetime] = None,
+        before: Optional[datetime] = None,
+        page: int = 1,
+        per_page: int = 10,
+    ) -> Tuple[str, Optional[int], Optional[int]]:
+        """
+        Cached version of `_fetch_notifications`.
+        """
+        return self._fetch_notifications(
+            all=all,
+            participating=participating,
+            since=since,
+            before=before,
+            page=page,
+            per_page=per_page,
+        )
+
+    def _fetch_notifications(
+        self,
+        all: bool = False,
+        participating: bool = False,
+        since: Optional[datetime] = None,
+        before: Optional[datetime] = None,
+        page: int = 1,
+        per_page: int = 10,
+    ) -> Tuple[str, Optional[int], Optional[int]]:
+        """
+        Calls `get_raw_notifications_page`, through `shared_cache`, if
+        set, so concurrent processes share one call.
+        """
+
+        def fetch():
+            return self.get_raw_notifications_page(
+                all=all,
+                participating=participating,
+                since=since,
+                before=before,
+                page=page,
+                per_page=per_page,
+            )
+
+        if self.shared_cache is None:
+            return fetch()
+        key = json.dumps(
+            [
+                self.api_url,
+                hashlib.sha256(self.auth_token.encode("utf-8")).hexdigest(),
+                all,
+                participating,
+                since.isoformat() if since is not None else None,
+                before.isoformat() if before is not None else None,
+                page,
+                per_page,
+            ]
+        )
+        return tuple(self.shared_cache.get_or_fetch(key, fetch))
+
+    def _check_write(self, res, ok_codes: Tuple[int, ...]):
+        """
+        Checks response of a write, and drops responses shared with
+        other processes, which it made stale.
+
+        :raises GithubHttpException: if status code isn't one of `ok_codes`
+        """
+        self._record_rate_limit(res)
+        self._unauthorized_status_code(res.status_code)
+        if res.status_code not in ok_codes:
+            raise GithubHttpException("Unknown error with Github API.")
+        # Other processes shouldn't keep showing it as unread, or subscribed
+        if self.shared_cache is not None:
+            self.shared_cache.clear()
+
+    def _record_rate_limit(self, res):
+        """
+        Records rate limit headers of response, if it has them.
+        """
+        remaining = res.headers.get("X-RateLimit-Remaining")
+        reset = res.headers.get("X-RateLimit-Reset")
+        if remaining is not None and reset is not None:
+            self.rate_limit_remaining = int(remaining)
+            self.rate_limit_reset = float(reset)
 
     def _unauthorized_status_code(self, code):
         """
@@ -200,6 +523,25 @@ class GithubApiClient(BaseGithubClient):
             )
 
 
+def _link_page(links: dict, rel: str) -> Optional[int]:
+    """
+    Gets page number from `Link` header entry with given rel.
+
+    :param links: parsed `Link` header, ie `requests.Response.links`
+    :type links: dict
+    :param rel: the rel to look for, ie "next"
+    :type rel: str
+    :return: Optional[int]
+    """
+    url = links.get(rel, {}).get("url")
+    if url is None:
+        return None
+    pages = parse_qs(urlparse(url).query).get("page")
+    if not pages:
+        return None
+    return int(pages[0])
+
+
 class BadCredentialsError(Exception):
     pass
 
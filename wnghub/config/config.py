@@ -1,4 +1,4 @@
-from typing import Optional, List
+from typing import Dict, Optional, List
 from datetime import datetime
 from dataclasses import dataclass
 from marshmallow import Schema, fields, post_load
@@ -25,6 +25,26 @@ class Config(BaseConfig):
     only_include_before: Optional[datetime] = None
     include_issues: bool = True
     include_prs: bool = True
+    only_include_repo_globs: Optional[List[str]] = None
+    exclude_repo_globs: Optional[List[str]] = None
+    exclude_org_globs: Optional[List[str]] = None
+    exclude_title_regexes: Optional[List[str]] = None
+    only_include_title_keywords: Optional[List[str]] = None
+    exclude_title_keywords: Optional[List[str]] = None
+    store_path: Optional[str] = "~/wnghub.db"
+    filter_query: Optional[str] = None
+    saved_views: Optional[Dict[str, str]] = None
+    stale_while_revalidate: bool = False
+    refresh_deadline: float = 3.0
+    archive_path: Optional[str] = None
+    shared_cache_ttl: float = 10.0
+    reason_weights: Optional[Dict[str, float]] = None
+    repo_weights: Optional[Dict[str, float]] = None
+    score_half_life_hours: float = 24.0
+    disabled_stages: Optional[List[str]] = None
+    github_login: Optional[str] = None
+    webhook_secret: Optional[str] = None
+    memory_budget_mb: Optional[float] = None
 
     DEFAULT_CONFIG_PATH = "~/wnghub.config"
 
@@ -43,6 +63,32 @@ class Config(BaseConfig):
         only_include_before = fields.DateTime(allow_none=True)
         include_issues = fields.Bool(allow_none=True)
         include_prs = fields.Bool(allow_none=True)
+        only_include_repo_globs = fields.List(fields.Str(), allow_none=True)
+        exclude_repo_globs = fields.List(fields.Str(), allow_none=True)
+        exclude_org_globs = fields.List(fields.Str(), allow_none=True)
+        exclude_title_regexes = fields.List(fields.Str(), allow_none=True)
+        only_include_title_keywords = fields.List(fields.Str(), allow_none=True)
+        exclude_title_keywords = fields.List(fields.Str(), allow_none=True)
+        store_path = fields.Str(allow_none=True)
+        filter_query = fields.Str(allow_none=True)
+        stale_while_revalidate = fields.Bool(allow_none=True)
+        refresh_deadline = fields.Float(allow_none=True)
+        archive_path = fields.Str(allow_none=True)
+        shared_cache_ttl = fields.Float(allow_none=True)
+        reason_weights = fields.Dict(
+            keys=fields.Str(), values=fields.Float(), allow_none=True
+        )
+        repo_weights = fields.Dict(
+            keys=fields.Str(), values=fields.Float(), allow_none=True
+        )
+        score_half_life_hours = fields.Float(allow_none=True)
+        disabled_stages = fields.List(fields.Str(), allow_none=True)
+        github_login = fields.Str(allow_none=True)
+        webhook_secret = fields.Str(allow_none=True)
+        memory_budget_mb = fields.Float(allow_none=True)
+        saved_views = fields.Dict(
+            keys=fields.Str(), values=fields.Str(), allow_none=True
+        )
 
         @post_load
         def get_config_obj(self, data, **kwargs):
@@ -0,0 +1,241 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+from wnghub.client.github import BaseGithubClient
+from wnghub.config.config import Config
+from wnghub.controller.base import BaseController
+from wnghub.model.notification import Notification
+from wnghub.store.actions import (
+    IGNORE_THREAD,
+    MARK_READ,
+    UNWATCH_REPOSITORY,
+    Action,
+    SqliteActionQueue,
+)
+
+
+class ActionQueueController(BaseController):
+    """
+    Makes queued actions (see `SqliteActionQueue`) on Github in the
+    background, so writes like marking notifications as read are
+    local and instant for the user.
+
+    Actions are made by up to `concurrency` threads at once, at most
+    one every `min_interval` seconds, and are paused while the client
+    reports fewer than `rate_limit_reserve` requests left in the
+    current rate limit window, so reads keep working. Failed actions
+    are retried with exponential backoff, and given up on after
+    `max_attempts` attempts.
+
+    :param client: client used to make actions
+    :type client: BaseGithubClient
+    :param config: the app config
+    :type config: Config
+    :param queue: durable queue of actions
+    :type queue: SqliteActionQueue
+    :param concurrency: max actions in flight at once
+    :type concurrency: int
+    :param max_attempts: attempts at each action before giving up
+    :type max_attempts: int
+    :param backoff: seconds to wait after first failed attempt, doubled
+                    after every failed attempt
+    :type backoff: float
+    :param min_interval: min seconds between starting actions
+    :type min_interval: float
+    :param rate_limit_reserve: requests to leave for reads
+    :type rate_limit_reserve: int
+    """
+
+    _idle_poll = 5.0
+
+    def __init__(
+        self,
+        client: BaseGithubClient,
+        config: Config,
+        queue: SqliteActionQueue,
+        concurrency: int = 4,
+        max_attempts: int = 5,
+        backoff: float = 1.0,
+        min_interval: float = 0.0,
+        rate_limit_reserve: int = 100,
+    ):
+        self.client = client
+        self.queue = queue
+        self.concurrency = max(concurrency, 1)
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.min_interval = min_interval
+        self.rate_limit_reserve = rate_limit_reserve
+        self.handlers: Dict[str, Callable[[Action], None]] = {
+            MARK_READ: self._mark_read,
+            IGNORE_THREAD: self._ignore_thread,
+            UNWATCH_REPOSITORY: self._unwatch_repository,
+        }
+        self._listeners: List[Callable[[Action, Optional[Exception]], None]] = []
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._throttle_lock = threading.Lock()
+        self._last_started = 0.0
+        self._worker: Optional[threading.Thread] = None
+        BaseController.__init__(self, config)
+
+    def add_listener(self, listener: Callable[[Action, Optional[Exception]], None]):
+        """
+        Registers function to call after an action is made, or with
+        the error if it was given up on.
+
+        :param listener: function to call
+        :type listener: Callable[[Action, Optional[Exception]], None]
+        """
+        self._listeners.append(listener)
+
+    def enqueue(self, thread_id: str, name: str, payload: Optional[dict] = None):
+        """
+        Queues action and wakes background worker, if running.
+
+        :param thread_id: thread the action is for
+        :type thread_id: str
+        :param name: what to do, ie `MARK_READ`
+        :type name: str
+        :param payload: anything else needed to perform the action
+        :type payload: Optional[dict]
+        """
+        if name not in self.handlers:
+            raise UnknownActionError("Unknown action: {}".format(name))
+        self.queue.enqueue(thread_id, name, payload)
+        self._wake.set()
+
+    def mute(
+        self, notifications: List[Notification], repositories: bool = False
+    ) -> List[str]:
+        """
+        Queues muting threads of notifications, so Github stops sending
+        them, or unwatching their repositories.
+
+        :param notifications: notifications to mute
+        :type notifications: List[Notification]
+        :param repositories: whether to unwatch repositories instead
+        :type repositories: bool
+        :return: List[str] threads or "<org>/<repository>"s queued
+        """
+        if repositories:
+            name = UNWATCH_REPOSITORY
+            keys = ["{}/{}".format(n.org, n.repository) for n in notifications]
+        else:
+            name = IGNORE_THREAD
+            keys = [n.thread_id for n in notifications]
+        keys = list(dict.fromkeys(keys))
+        for key in keys:
+            self.queue.enqueue(key, name)
+        self._wake.set()
+        return keys
+
+    def run_once(self) -> int:
+        """
+        Makes every action that is due, `concurrency` at a time.
+
+        :return: int number of actions attempted
+        """
+        attempted = 0
+        with ThreadPoolExecutor(self.concurrency) as executor:
+            while not self._stop.is_set():
+                actions = self.queue.claim(self.concurrency)
+                if not actions:
+                    break
+                list(executor.map(self._run, actions))
+                attempted += len(actions)
+        return attempted
+
+    def drain(self, timeout: Optional[float] = None) -> bool:
+        """
+        Makes queued actions until none are left, waiting for retries.
+
+        :param timeout: max seconds to wait
+        :type timeout: Optional[float]
+        :return: bool whether queue was emptied
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not self._stop.is_set():
+            self.run_once()
+            due = self.queue.next_due()
+            if due is None:
+                return True
+            if deadline is not None:
+                left = deadline - time.monotonic()
+                if left <= 0:
+                    return False
+                due = min(due, left)
+            self._stop.wait(max(due, 0.01))
+        return self.queue.count() == 0
+
+    def start(self):
+        """
+        Starts making actions on a background thread.
+        """
+        if self._worker is None:
+            self._worker = threading.Thread(target=self._loop, daemon=True)
+            self._worker.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+    def _loop(self):
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+                due = self.queue.next_due()
+            except Exception:
+                due = None
+            self._wake.wait(self._idle_poll if due is None else max(due, 0.01))
+            self._wake.clear()
+
+    def _run(self, action: Action):
+        self._throttle()
+        try:
+            self.handlers[action.name](action)
+        except Exception as e:
+            if action.attempts + 1 >= self.max_attempts:
+                self.queue.fail(action, str(e))
+                self._notify(action, e)
+            else:
+                self.queue.retry(action, str(e), self.backoff * 2**action.attempts)
+            return
+        self.queue.complete(action)
+        self._notify(action, None)
+
+    def _throttle(self):
+        """
+        Waits until another action can be started.
+        """
+        with self._throttle_lock:
+            wait = self._last_started + self.min_interval - time.monotonic()
+            remaining = self.client.rate_limit_remaining
+            reset = self.client.rate_limit_reset
+            if isinstance(remaining, int) and isinstance(reset, (int, float)):
+                if remaining <= self.rate_limit_reserve:
+                    wait = max(wait, reset - time.time())
+            if wait > 0:
+                self._stop.wait(wait)
+            self._last_started = time.monotonic()
+
+    def _notify(self, action: Action, error: Optional[Exception]):
+        for listener in self._listeners:
+            listener(action, error)
+
+    def _mark_read(self, action: Action):
+        self.client.update_notification_status(Notification(thread_id=action.thread_id))
+
+    def _ignore_thread(self, action: Action):
+        self.client.ignore_thread(Notification(thread_id=action.thread_id))
+
+    def _unwatch_repository(self, action: Action):
+        org, _, repository = action.thread_id.partition("/")
+        self.client.unwatch_repository(org, repository)
+
+
+class UnknownActionError(Exception):
+    pass
@@ -1,7 +1,9 @@
+import re
 from typing import Optional
 
 from wnghub.controller.base import BaseController
 from wnghub.config.config import Config
+from wnghub.model.query import QueryFilter
 
 
 class ConfigController(BaseController):
@@ -31,6 +33,26 @@ class ConfigController(BaseController):
         "only_include_participating",
         "include_issues",
         "include_prs",
+        "store_path",
+        "only_include_repo_globs",
+        "exclude_repo_globs",
+        "exclude_org_globs",
+        "exclude_title_regexes",
+        "only_include_title_keywords",
+        "exclude_title_keywords",
+        "filter_query",
+        "saved_views",
+        "stale_while_revalidate",
+        "refresh_deadline",
+        "archive_path",
+        "shared_cache_ttl",
+        "reason_weights",
+        "repo_weights",
+        "score_half_life_hours",
+        "disabled_stages",
+        "github_login",
+        "webhook_secret",
+        "memory_budget_mb",
     ]
 
     """
@@ -38,12 +60,28 @@ class ConfigController(BaseController):
     set directly below. Map them to a separate
     command to set config field directly.
     """
-    _disallow_set_directly = {"auth_token": "set-auth"}
+    _disallow_set_directly = {"auth_token": "set-auth", "saved_views": "save-view"}
+
+    """
+    Register list fields whose values can contain commas below. They
+    are set with one value per argument instead of comma separated.
+    """
+    repeated_fields = {"exclude_title_regexes"}
 
     _comma_sep_list = lambda x: x.split(",")  # noqa
 
     _parse_bool = lambda b: b.lower() == "true"  # noqa
 
+    _regex_list = lambda x: [  # noqa
+        re.compile(p).pattern for p in ([x] if isinstance(x, str) else x)
+    ]
+
+    _query = lambda q: QueryFilter(q).query  # noqa
+
+    _weights = lambda x: {  # noqa
+        k.strip(): float(v) for k, v in (p.split("=", 1) for p in x.split(","))
+    }
+
     """
     Register any fields that need preprocessing
     below. Key is name of the field and the value
@@ -64,6 +102,21 @@ class ConfigController(BaseController):
         "only_include_participating": _parse_bool,
         "include_issues": _parse_bool,
         "include_prs": _parse_bool,
+        "only_include_repo_globs": _comma_sep_list,
+        "exclude_repo_globs": _comma_sep_list,
+        "exclude_org_globs": _comma_sep_list,
+        "exclude_title_regexes": _regex_list,
+        "only_include_title_keywords": _comma_sep_list,
+        "exclude_title_keywords": _comma_sep_list,
+        "filter_query": _query,
+        "stale_while_revalidate": _parse_bool,
+        "refresh_deadline": float,
+        "shared_cache_ttl": float,
+        "reason_weights": _weights,
+        "repo_weights": _weights,
+        "score_half_life_hours": float,
+        "disabled_stages": _comma_sep_list,
+        "memory_budget_mb": float,
     }
 
     def get(self, field_name: str):
@@ -123,6 +176,37 @@ class ConfigController(BaseController):
         """
         self.config.set_auth(auth_token=auth_token)
 
+    def save_view(self, name: str, query: str):
+        """
+        Saves a named view. Overwrites existing view with same name.
+
+        :param name: name of the view
+        :type name: str
+        :param query: filter query for the view
+        :type query: str
+        :raises QuerySyntaxError: if query is invalid
+        """
+        QueryFilter(query)
+        views = dict(self.config.saved_views or {})
+        views[name] = query
+        self.config.saved_views = views
+        self.config.write()
+
+    def delete_view(self, name: str):
+        """
+        Deletes a named view.
+
+        :param name: name of the view
+        :type name: str
+        :raises Exception: if there is no view with that name
+        """
+        views = dict(self.config.saved_views or {})
+        if name not in views:
+            raise Exception("No saved view: {}".format(name))
+        del views[name]
+        self.config.saved_views = views or None
+        self.config.write()
+
     def _verify_valid_field(self, field_name: str):
         """
         Verifies that field is available in config.
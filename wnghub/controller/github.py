@@ -1,14 +1,31 @@
 from wnghub.controller.base import BaseController
 from wnghub.config.config import Config
-from wnghub.client.github import BaseGithubClient
+from wnghub.client.github import BaseGithubClient, NotificationsPage
+from wnghub.controller.pipeline import Pipeline
+from wnghub.controller.readstate import ReadStateController
+from wnghub.store.base import BaseNotificationStore
 from wnghub.model.filter import AggregateFilter
 from wnghub.model.notification import (
     NotificationReposFilter,
     NotificationReasonsFilter,
     NotificationPrIssuesFilter,
     NotificationOrgsFilter,
+    NotificationGlobFilter,
+    NotificationRegexFilter,
+    NotificationTitleKeywordsFilter,
 )
+from wnghub.model.query import QueryFilter
+from wnghub.model.score import NotificationScorer
 from wnghub.util.kwargs import Kwarg, KwargsReconciler
+from wnghub.model.notification import Notification
+from wnghub.model.webhook import is_provisional
+from collections import deque
+from typing import Callable, Iterator, List, Optional
+import datetime
+import math
+import sys
+import threading
+from wnghub.util.dates import as_utc
 
 
 class GithubController(BaseController):
@@ -19,10 +36,40 @@ class GithubController(BaseController):
     :type client: Subclass of `BaseGithubClient`
     :param config: the application config to use
     :type config: Config
+    :param store: optional local store to save fetched notifications to
+    :type store: Optional[BaseNotificationStore]
+    :param read_state: optional local read state, applied to fetched
+                       notifications before they are saved or filtered
+    :type read_state: Optional[ReadStateController]
+    :param pipeline: optional custom stages, run on notifications after
+                     the filters from config (see `Pipeline.discover`)
+    :type pipeline: Optional[Pipeline]
     """
 
-    def __init__(self, client: BaseGithubClient, config: Config):
+    """
+    Number of stored notifications passed to the pipeline at once,
+    since the store isn't paged like Github's API.
+    """
+    stored_page_size = 100
+
+    """
+    Memory budget for chunks of streamed notifications passed to sink
+    stages, when `memory_budget_mb` isn't set in config.
+    """
+    default_memory_budget_mb = 64.0
+
+    def __init__(
+        self,
+        client: BaseGithubClient,
+        config: Config,
+        store: Optional[BaseNotificationStore] = None,
+        read_state: Optional[ReadStateController] = None,
+        pipeline: Optional[Pipeline] = None,
+    ):
         self.client = client
+        self.store = store
+        self.read_state = read_state
+        self.pipeline = pipeline
         BaseController.__init__(self, config)
 
     @property
@@ -46,6 +93,13 @@ class GithubController(BaseController):
             Kwarg("before", "only_include_before", None),
             Kwarg("show_issues", "include_issues", True),
             Kwarg("show_prs", "include_prs", True),
+            Kwarg("include_repo_globs", "only_include_repo_globs", None),
+            Kwarg("exclude_repo_globs", "exclude_repo_globs", None),
+            Kwarg("exclude_org_globs", "exclude_org_globs", None),
+            Kwarg("exclude_title_regexes", "exclude_title_regexes", None),
+            Kwarg("include_title_keywords", "only_include_title_keywords", None),
+            Kwarg("exclude_title_keywords", "exclude_title_keywords", None),
+            Kwarg("query", "filter_query", None),
             config=self.config,
         )
 
@@ -81,24 +135,219 @@ class GithubController(BaseController):
         :type show_issues: bool
         :param show_prs: whether to show prs or not (default True)
         :type show_prs: bool
+        :param include_repo_globs: only include repos matching these wildcards (optional)
+        :type include_repo_globs: List[str]
+        :param exclude_repo_globs: exclude repos matching these wildcards (optional)
+        :type exclude_repo_globs: List[str]
+        :param exclude_org_globs: exclude orgs matching these wildcards (optional)
+        :type exclude_org_globs: List[str]
+        :param exclude_title_regexes: exclude titles matching these regexes (optional)
+        :type exclude_title_regexes: List[str]
+        :param include_title_keywords: only include titles with these keywords (optional)
+        :type include_title_keywords: List[str]
+        :param exclude_title_keywords: exclude titles with these keywords (optional)
+        :type exclude_title_keywords: List[str]
+        :param query: filter query, ie `org:apache AND NOT type:PR` (optional)
+        :type query: str
         """
+        res = self._fetched_notifications(kwargs)
+        if self.pipeline:
+            res = self.pipeline.finish(res)
+        return res
 
-        def rarg(arg_name):
-            return kwargs.get(arg_name) or self.notifications_kwargs.reconcile(arg_name)
+    def iter_notifications(self, **kwargs) -> Iterator[Notification]:
+        """
+        Streams notifications for user, most recently updated first.
+        Takes the same kwargs as `get_notifications`, for results that
+        may not fit in memory, ie exporting a huge backlog.
+
+        Pages aren't cached by the client, and results are yielded as
+        their pages are fetched, since Github returns notifications most
+        recently updated first. Score stages of the pipeline don't run,
+        since they would reorder results, and sink stages run on chunks
+        of results within `memory_budget_mb` from config (64MB by
+        default).
+
+        :return: Iterator[Notification]
+        """
+        budget = self.config.memory_budget_mb
+        if budget is None:
+            budget = self.default_memory_budget_mb
+        budget_bytes = budget * 2**20
+        chunk, chunk_bytes = [], 0
+        for page in self._filtered_pages(self.client.fetch_notifications_page, kwargs):
+            if not self.pipeline:
+                yield from page
+                continue
+            chunk.extend(page)
+            chunk_bytes += sum(_size(n) for n in page)
+            if chunk_bytes >= budget_bytes:
+                yield from self.pipeline.finish(chunk, score=False)
+                chunk, chunk_bytes = [], 0
+        if self.store is not None:
+            self.store.mark_synced()
+        if chunk:
+            yield from self.pipeline.finish(chunk, score=False)
 
+    def get_stored_notifications(self, **kwargs) -> List[Notification]:
+        """
+        Gets notifications from the local store, without hitting
+        Github's API. Takes the same kwargs as `get_notifications`,
+        except `participating`, which isn't known for stored
+        notifications and is ignored.
+
+        :return: List[Notification]
+        """
+        res = self._stored_notifications(kwargs)
+        if self.pipeline:
+            res = self.pipeline.finish(res)
+        return res
+
+    def _fetched_notifications(self, kwargs: dict) -> List[Notification]:
+        """
+        Fetches notifications for `get_notifications`, without running
+        score and sink stages on them.
+        """
+        res = []
+        for page in self._filtered_pages(self.client.get_notifications_page, kwargs):
+            res.extend(page)
+        if self.store is not None:
+            self.store.mark_synced()
+        return res
+
+    def _stored_notifications(self, kwargs: dict) -> List[Notification]:
+        """
+        Gets notifications for `get_stored_notifications`, without
+        running score and sink stages on them.
+        """
+        if self.store is None:
+            return []
+        rarg = self._reconciler(kwargs)
         num_results = rarg("num_results")
+        all = rarg("all")
+        since = rarg("since")
+        before = rarg("before")
+        filters = self.notification_filters(**kwargs)
+        res = []
+        page = []
+        since = as_utc(since) if since is not None else None
+        before = as_utc(before) if before is not None else None
+        for n in self.store.notifications():
+            if not all and not n.unread:
+                continue
+            if since is not None and as_utc(n.updated_at) < since:
+                continue
+            if before is not None and as_utc(n.updated_at) > before:
+                continue
+            if not filters.include(n):
+                continue
+            if not self.pipeline:
+                res.append(n)
+                if len(res) >= num_results:
+                    break
+                continue
+            page.append(n)
+            if len(page) >= self.stored_page_size:
+                res.extend(self.pipeline.process_page(page))
+                page = []
+                if len(res) >= num_results:
+                    break
+        if page:
+            res.extend(self.pipeline.process_page(page))
+        return res[:num_results]
+
+    def get_ranked_notifications(
+        self, pool: int = 1000, stored: bool = False, **kwargs
+    ) -> List[Notification]:
+        """
+        Gets the highest scoring notifications (see `scorer`) out of
+        the `pool` most recent ones. Takes the same kwargs as
+        `get_notifications`, where `num_results` is how many to rank.
+        Score stages of the pipeline don't run, since the scorer decides
+        the order, and sink stages run on the ranked notifications.
+
+        :param pool: number of recent notifications to rank
+        :type pool: int
+        :param stored: whether to rank notifications from the local store
+                       instead of fetching them from Github
+        :type stored: bool
+        :return: List[Notification], best first
+        """
+        num_results = self._reconciler(kwargs)("num_results")
+        kwargs = dict(kwargs, num_results=max(pool, num_results))
+        if stored:
+            candidates = self._stored_notifications(kwargs)
+        else:
+            candidates = self._fetched_notifications(kwargs)
+        res = self.scorer().top(candidates, num_results)
+        if self.pipeline:
+            res = self.pipeline.finish(res, score=False)
+        return res
+
+    def scorer(self) -> NotificationScorer:
+        """
+        Creates scorer with weights from config.
+
+        :return: NotificationScorer
+        """
+        return NotificationScorer(
+            reason_weights=self.config.reason_weights,
+            repo_weights=self.config.repo_weights,
+            half_life_hours=self.config.score_half_life_hours,
+        )
+
+    def refresh_notifications(
+        self, deadline: float, **kwargs
+    ) -> Optional[List[Notification]]:
+        """
+        Calls `get_notifications` on a background thread, waiting at
+        most `deadline` seconds for it. Takes the same kwargs as
+        `get_notifications`.
+
+        :param deadline: max seconds to wait
+        :type deadline: float
+        :raises Exception: whatever `get_notifications` raised, if it
+                           failed before the deadline
+        :return: Optional[List[Notification]], None if not finished in time
+        """
+        result = {}
+
+        def fetch():
+            try:
+                result["notifications"] = self.get_notifications(**kwargs)
+            except Exception as e:
+                result["error"] = e
+
+        worker = threading.Thread(target=fetch, daemon=True)
+        worker.start()
+        worker.join(deadline)
+        if "error" in result:
+            raise result["error"]
+        return result.get("notifications")
+
+    def notification_filters(self, **kwargs) -> AggregateFilter:
+        """
+        Builds filters for notifications from kwargs, falling back
+        to config. Takes the same kwargs as `get_notifications`.
+
+        :return: AggregateFilter
+        """
+        rarg = self._reconciler(kwargs)
         include_repos = rarg("include_repos")
         include_orgs = rarg("include_orgs")
         include_reasons = rarg("include_reasons")
         exclude_repos = rarg("exclude_repos")
         exclude_orgs = rarg("exclude_orgs")
         exclude_reasons = rarg("exclude_reasons")
-        all = rarg("all")
-        participating = rarg("participating")
-        since = rarg("since")
-        before = rarg("before")
         show_issues = rarg("show_issues")
         show_prs = rarg("show_prs")
+        include_repo_globs = rarg("include_repo_globs")
+        exclude_repo_globs = rarg("exclude_repo_globs")
+        exclude_org_globs = rarg("exclude_org_globs")
+        exclude_title_regexes = rarg("exclude_title_regexes")
+        include_title_keywords = rarg("include_title_keywords")
+        exclude_title_keywords = rarg("exclude_title_keywords")
+        query = rarg("query")
         n_filters = []
         if include_repos is not None:
             n_filters.append(NotificationReposFilter(include_repos))
@@ -111,33 +360,198 @@ class GithubController(BaseController):
         if include_reasons is not None:
             n_filters.append(NotificationReasonsFilter(include_reasons))
         if exclude_reasons is not None:
-            n_filters.append(NotificationReasonsFilter(exclude_reasons), exclude=True)
+            n_filters.append(NotificationReasonsFilter(exclude_reasons, exclude=True))
+        if include_repo_globs is not None:
+            n_filters.append(NotificationGlobFilter(include_repo_globs))
+        if exclude_repo_globs is not None:
+            n_filters.append(NotificationGlobFilter(exclude_repo_globs, exclude=True))
+        if exclude_org_globs is not None:
+            n_filters.append(
+                NotificationGlobFilter(exclude_org_globs, field="org", exclude=True)
+            )
+        if exclude_title_regexes is not None:
+            n_filters.append(
+                NotificationRegexFilter(exclude_title_regexes, exclude=True)
+            )
+        if include_title_keywords is not None:
+            n_filters.append(NotificationTitleKeywordsFilter(include_title_keywords))
+        if exclude_title_keywords is not None:
+            n_filters.append(
+                NotificationTitleKeywordsFilter(exclude_title_keywords, exclude=True)
+            )
+        if query is not None:
+            n_filters.append(QueryFilter(query))
         n_filters.append(
             NotificationPrIssuesFilter(get_prs=show_prs, get_issues=show_issues)
         )
         filters = AggregateFilter(n_filters)
-        res = []
-        page = 1
-        per_page = 100  # TODO: maybe add this to config?
-        while len(res) < num_results:
-            pre_filtered_results = self.client.get_notifications(
+        return filters
+
+    def _filtered_pages(
+        self, fetch_page: Callable[..., NotificationsPage], kwargs: dict
+    ) -> Iterator[List[Notification]]:
+        """
+        Fetches pages of notifications with `fetch_page`, saving them to
+        the store and yielding the ones passing filters, until there are
+        `num_results` of them or no pages are left.
+        """
+        rarg = self._reconciler(kwargs)
+        num_results = rarg("num_results")
+        all = rarg("all")
+        participating = rarg("participating")
+        since = rarg("since")
+        before = rarg("before")
+        filters = self.notification_filters(**kwargs)
+        max_per_page = self.client.max_per_page
+        remaining = num_results
+        offset = 0
+        seen, passed = 0, 0
+        # Ids of the last notifications fetched, to drop them when a
+        # bigger page overlaps ones already fetched
+        recent_ids = deque(maxlen=max_per_page)
+        # Until a page has been seen, assume everything passes if there
+        # are no filters, and that little does otherwise
+        filters_locally = (self.read_state is not None and not all) or (
+            self.pipeline is not None and self.pipeline.filters
+        )
+        passes_everything = _passes_everything(filters) and not filters_locally
+        selectivity = 1.0 if passes_everything else 0.0
+        # Whether every unread notification is fetched, so stored ones
+        # that aren't were read elsewhere
+        unread_sync = (
+            self.store is not None
+            and not all
+            and not participating
+            and since is None
+            and before is None
+        )
+        started_at = datetime.datetime.now(datetime.timezone.utc)
+        unread_ids = set()
+        per_page = 0
+        while remaining > 0:
+            per_page = _page_size(
+                remaining, selectivity, max_per_page, minimum=per_page
+            )
+            page_number = offset // per_page + 1
+            start = (page_number - 1) * per_page
+            result = fetch_page(
                 all=all,
                 participating=participating,
                 since=since,
                 before=before,
-                page=page,
+                page=page_number,
                 per_page=per_page,
             )
+            pre_filtered_results = [
+                n
+                for n in result.notifications[offset - start :]  # noqa
+                if n.thread_id not in recent_ids
+            ]
+            recent_ids.extend(n.thread_id for n in pre_filtered_results)
+            if unread_sync:
+                unread_ids.update(n.thread_id for n in result.notifications)
+            fetched = len(pre_filtered_results)
+            if self.read_state is not None:
+                pre_filtered_results = self.read_state.reconcile(pre_filtered_results)
+            if self.store is not None:
+                self.store.save(pre_filtered_results)
+            if self.read_state is not None and not all:
+                # Read locally, but Github doesn't know yet
+                pre_filtered_results = [n for n in pre_filtered_results if n.unread]
             filtered_results = filters.apply(pre_filtered_results)
-            if len(filtered_results) > num_results:
-                filtered_results = filtered_results[0:num_results]
-                num_results = 0
-            else:
-                num_results = num_results - len(filtered_results)
-            res.extend(filtered_results)
-            if len(pre_filtered_results) < per_page:
+            if self.pipeline:
+                filtered_results = self.pipeline.process_page(filtered_results)
+            seen += fetched
+            passed += len(filtered_results)
+            # Nothing passing in a page means the estimate is way off
+            selectivity = passed / seen if seen and filtered_results else 0.0
+            page = filtered_results[0:remaining]
+            remaining -= len(page)
+            yield page
+            end = start + len(result.notifications)
+            if result.next_page is None and unread_sync:
+                self._mark_read_elsewhere(unread_ids, started_at)
+            if result.next_page is None or end <= offset:
                 break
-            if num_results <= 0:
-                break
-            page += 1
-        return res
+            offset = end
+
+    def _mark_read_elsewhere(self, unread_ids: set, started_at: datetime.datetime):
+        """
+        Marks stored notifications read if they weren't in a complete
+        fetch of unread notifications, ie read on Github's website or
+        another device. Ones updated since the fetch started, or made
+        from webhooks, are left alone.
+        """
+        read = [
+            n
+            for n in self.store.unread_notifications()
+            if n.thread_id not in unread_ids
+            and not is_provisional(n)
+            and (n.updated_at is None or as_utc(n.updated_at) < started_at)
+        ]
+        for n in read:
+            n.unread = False
+        self.store.save(read)
+
+    def _reconciler(self, kwargs):
+        """
+        Gets function that looks up kwarg, falling back to config
+        and then default values.
+        """
+        reconciler = self.notifications_kwargs
+
+        def rarg(arg_name):
+            return kwargs.get(arg_name) or reconciler.reconcile(arg_name)
+
+        return rarg
+
+
+def _passes_everything(filters: AggregateFilter) -> bool:
+    """
+    Whether filters are just the default, which includes everything.
+    """
+    return all(
+        isinstance(f, NotificationPrIssuesFilter) and f.get_prs and f.get_issues
+        for f in filters.filters
+    )
+
+
+def _page_size(
+    remaining: int, selectivity: float, max_per_page: int, minimum: int = 1
+) -> int:
+    """
+    Picks page size for next request: big enough to get `remaining`
+    results given the fraction of notifications that pass filters
+    so far, with some headroom, but no bigger.
+
+    Page sizes are limited to divisors of `max_per_page`. When a bigger
+    page than the last one is needed, the page containing the next
+    notification is fetched and notifications already fetched are
+    dropped, rather than shrinking pages to line up with the last one.
+
+    :param remaining: number of results still needed
+    :type remaining: int
+    :param selectivity: fraction of notifications passing filters
+    :type selectivity: float
+    :param max_per_page: max page size allowed by client
+    :type max_per_page: int
+    :param minimum: smallest page size to pick, ie the last one, so
+                    pages don't shrink as results run out
+    :type minimum: int
+    :return: int
+    """
+    if selectivity <= 0:
+        return max_per_page
+    wanted = max(math.ceil(remaining / selectivity * 1.25), minimum)
+    sizes = [d for d in range(1, max_per_page + 1) if max_per_page % d == 0]
+    big_enough = [d for d in sizes if d >= wanted]
+    return min(big_enough) if big_enough else max_per_page
+
+
+def _size(notification: Notification) -> int:
+    """
+    Estimates bytes taken by a notification: its fields, and the values
+    in them.
+    """
+    getsizeof = sys.getsizeof
+    return getsizeof(notification) + sum(getsizeof(v) for v in notification.to_record())
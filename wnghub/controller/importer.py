@@ -0,0 +1,173 @@
+import os
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, List, Optional
+
+from wnghub.client.github import GithubApiClient
+from wnghub.config.config import Config
+from wnghub.controller.base import BaseController
+from wnghub.model.notification import Notification
+from wnghub.store.base import BaseNotificationStore
+
+
+def parse_notifications_page(raw: str) -> List[tuple]:
+    """
+    Parses raw notifications page into compact records (see
+    `Notification.record_fields`). Runs in worker processes, so
+    only plain tuples are sent back to the parent.
+
+    :param raw: response body from Github's notifications endpoint
+    :type raw: str
+    :return: List[tuple]
+    """
+    return [n.to_record() for n in Notification.load_from_json_str(raw)]
+
+
+@dataclass
+class ImportResult:
+    """
+    Summary of an import.
+
+    :param pages: number of pages fetched
+    :type pages: int
+    :param notifications: number of notifications imported
+    :type notifications: int
+    :param changed: number of notifications that were new or changed
+    :type changed: int
+    """
+
+    pages: int = 0
+    notifications: int = 0
+    changed: int = 0
+
+
+class NotificationImportController(BaseController):
+    """
+    Imports a user's notification history into the local store.
+
+    Pages are fetched concurrently on a thread pool and parsed on a
+    process pool, which sends back compact records rather than
+    `Notification` objects. Parsed pages are saved to the store as
+    they arrive, with at most `fetch_workers * 2` pages in flight.
+
+    :param client: client used to fetch raw pages
+    :type client: GithubApiClient
+    :param config: the app config
+    :type config: Config
+    :param store: store to import into
+    :type store: BaseNotificationStore
+    :param fetch_workers: number of concurrent page fetches
+    :type fetch_workers: int
+    :param parse_workers: number of parsing processes. By default, one
+                          per CPU. With 0, pages are parsed in this process
+    :type parse_workers: Optional[int]
+    """
+
+    _per_page = 100
+
+    def __init__(
+        self,
+        client: GithubApiClient,
+        config: Config,
+        store: BaseNotificationStore,
+        fetch_workers: int = 8,
+        parse_workers: Optional[int] = None,
+    ):
+        self.client = client
+        self.store = store
+        self.fetch_workers = max(fetch_workers, 1)
+        if parse_workers is None:
+            parse_workers = os.cpu_count() or 1
+        self.parse_workers = parse_workers
+        BaseController.__init__(self, config)
+
+    def run(
+        self,
+        all: bool = True,
+        participating: bool = False,
+        since: Optional[datetime] = None,
+        before: Optional[datetime] = None,
+        progress: Optional[Callable[[ImportResult], None]] = None,
+    ) -> ImportResult:
+        """
+        Imports every page of notifications matching params.
+
+        :param all: whether to import read notifications too
+        :type all: bool
+        :param participating: only import notifications user is participating in
+        :type participating: bool
+        :param since: optional start of range to import
+        :type since: Optional[datetime]
+        :param before: optional end of range to import
+        :type before: Optional[datetime]
+        :param progress: optional function called after each page is saved
+        :type progress: Optional[Callable[[ImportResult], None]]
+        :return: ImportResult
+        """
+        result = ImportResult()
+
+        def fetch(page):
+            return self.client.get_raw_notifications_page(
+                all=all,
+                participating=participating,
+                since=since,
+                before=before,
+                page=page,
+                per_page=self._per_page,
+            )
+
+        def save(future: Future):
+            records = future.result()
+            delta = self.store.save([Notification.from_record(r) for r in records])
+            result.pages += 1
+            result.notifications += len(records)
+            result.changed += len(delta)
+            if progress is not None:
+                progress(result)
+
+        raw, next_page, last_page = fetch(1)
+        window = self.fetch_workers * 2
+        with ThreadPoolExecutor(self.fetch_workers) as fetchers:
+            with self._parsers() as parsers:
+                previous = [parsers.submit(parse_notifications_page, raw)]
+                page = next_page
+                while page is not None:
+                    end = page + window
+                    if last_page is not None:
+                        end = min(end, last_page + 1)
+                    pages = list(range(page, end))
+                    page = end if last_page is None or end <= last_page else None
+                    current = []
+                    for raw, next_page, _ in fetchers.map(fetch, pages):
+                        current.append(parsers.submit(parse_notifications_page, raw))
+                        if next_page is None:
+                            page = None
+                            break
+                    # Save previous window while this one is still being parsed
+                    for future in previous:
+                        save(future)
+                    previous = current
+                for future in previous:
+                    save(future)
+        self.store.mark_synced()
+        return result
+
+    def _parsers(self) -> Executor:
+        if self.parse_workers <= 0:
+            return _InlineExecutor()
+        return ProcessPoolExecutor(self.parse_workers)
+
+
+class _InlineExecutor(Executor):
+    """
+    Executor that runs functions immediately, in this process.
+    """
+
+    def submit(self, fn, *args, **kwargs) -> Future:
+        future = Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except Exception as e:
+            future.set_exception(e)
+        return future
@@ -0,0 +1,298 @@
+"""
+Pipeline of custom stages that notifications go through after being
+fetched and filtered by config, so in-house rules can be plugged in
+without forking wnghub.
+
+Stages are registered by installed packages under the
+`wnghub.stages` entry point group, ie in their setup.py:
+
+    entry_points={
+        "wnghub.stages": ["drop-bots = mypackage.stages:DropBots"],
+    }
+
+where `DropBots` is a `BatchStage` or `ItemStage` subclass, or any
+callable taking the app config and returning one. Stages that fail to
+load are skipped and reported (see `Pipeline.errors`). Stages run in
+order of kind:
+
+    enrich -> filter -> score -> sink
+
+Enrich and filter stages run on every page fetched, score and sink
+stages once on the final results. Batch stages are called once with
+a whole page (or the results), so they pay no per item call overhead.
+Consecutive item stages of a kind are fused into one loop over the
+page.
+"""
+import sys
+from abc import ABC, abstractmethod
+from itertools import groupby
+from typing import Callable, List, Optional
+
+from wnghub.config.config import Config
+from wnghub.model.notification import Notification
+
+if sys.version_info >= (3, 8):
+    from importlib import metadata
+else:  # pragma: no cover
+    try:
+        import importlib_metadata as metadata
+    except ImportError:
+        metadata = None
+
+
+ENTRY_POINT_GROUP = "wnghub.stages"
+
+"""
+Kinds of stages, in the order they run.
+"""
+ENRICH = "enrich"
+
+FILTER = "filter"
+
+SCORE = "score"
+
+SINK = "sink"
+
+STAGE_KINDS = (ENRICH, FILTER, SCORE, SINK)
+
+
+class Stage(ABC):
+    """
+    Base class for pipeline stages. Subclass `BatchStage` or
+    `ItemStage` and set `kind`:
+
+        - enrich: return the notifications, changed or replaced
+        - filter: return the notifications to keep
+        - score: return the notifications reordered, or for item stages
+          a number to sort by, highest first
+        - sink: ie write notifications somewhere. Return values are
+          ignored
+
+    :param config: the app config
+    :type config: Optional[Config]
+    """
+
+    kind: str = FILTER
+
+    name: str = ""
+
+    def __init__(self, config: Optional[Config] = None):
+        self.config = config
+
+
+class BatchStage(Stage):
+    """
+    Stage called once per page of notifications (or the results).
+    """
+
+    @abstractmethod
+    def process(self, notifications: List[Notification]) -> List[Notification]:
+        pass
+
+
+class ItemStage(Stage):
+    """
+    Stage called once per notification.
+    """
+
+    @abstractmethod
+    def process_item(self, notification: Notification):
+        pass
+
+
+class Pipeline(object):
+    """
+    Runs stages on notifications.
+
+    :param stages: stages to run, in any order
+    :type stages: List[Stage]
+    """
+
+    def __init__(self, stages: Optional[List[Stage]] = None):
+        stages = list(stages or [])
+        for stage in stages:
+            _check_stage(stage)
+        stages.sort(key=lambda s: STAGE_KINDS.index(s.kind))
+        self.stages = stages
+        self.errors: List[str] = []
+        self._page_steps = self._compile(ENRICH, FILTER)
+        self._score_steps = self._compile(SCORE)
+        self._sink_steps = self._compile(SINK)
+
+    @classmethod
+    def discover(cls, config: Optional[Config] = None):
+        """
+        Creates pipeline of stages registered under `ENTRY_POINT_GROUP`
+        by installed packages, except those named in config's
+        `disabled_stages`. Stages that fail to load or be created are
+        skipped, with why recorded in `errors` of the pipeline.
+
+        :param config: the app config
+        :type config: Optional[Config]
+        :return: Pipeline
+        """
+        disabled = set((config.disabled_stages if config else None) or [])
+        stages = []
+        errors = []
+        for entry_point in _entry_points():
+            if entry_point.name in disabled:
+                continue
+            try:
+                stage = entry_point.load()(config)
+                _check_stage(stage)
+                if not stage.name:
+                    stage.name = entry_point.name
+            except Exception as e:
+                # A broken plugin shouldn't stop notifications being shown
+                errors.append("Skipped stage {}: {}".format(entry_point.name, e))
+                continue
+            stages.append(stage)
+        pipeline = cls(stages)
+        pipeline.errors = errors
+        return pipeline
+
+    def __bool__(self):
+        return bool(self.stages)
+
+    @property
+    def filters(self) -> bool:
+        """
+        Whether pages may lose notifications going through the pipeline.
+        :type: bool
+        """
+        return bool(self._page_steps)
+
+    def process_page(self, notifications: List[Notification]) -> List[Notification]:
+        """
+        Runs enrich and filter stages on a page of notifications.
+
+        :param notifications: the page
+        :type notifications: List[Notification]
+        :return: List[Notification]
+        """
+        for step in self._page_steps:
+            if not notifications:
+                break
+            notifications = step(notifications)
+        return notifications
+
+    def finish(
+        self, notifications: List[Notification], score: bool = True
+    ) -> List[Notification]:
+        """
+        Runs score and sink stages on final results.
+
+        :param notifications: the results
+        :type notifications: List[Notification]
+        :param score: whether to run score stages, ie not when results
+                      are streamed in chunks that must keep their order
+        :type score: bool
+        :return: List[Notification]
+        """
+        if score:
+            for step in self._score_steps:
+                notifications = step(notifications)
+        for step in self._sink_steps:
+            notifications = step(notifications)
+        return notifications
+
+    def _compile(self, *kinds: str) -> List[Callable[[list], list]]:
+        """
+        Turns stages of given kinds into functions over lists, fusing
+        runs of item stages of the same kind into one function.
+        """
+        steps = []
+        stages = [s for s in self.stages if s.kind in kinds]
+        for (kind, batch), group in groupby(
+            stages, lambda s: (s.kind, isinstance(s, BatchStage))
+        ):
+            group = list(group)
+            if batch:
+                steps.extend(_batch_step(s) for s in group)
+            else:
+                steps.append(_item_step(kind, [s.process_item for s in group]))
+        return steps
+
+
+def _check_stage(stage: Stage):
+    name = getattr(stage, "name", None) or type(stage).__name__
+    if not isinstance(stage, (BatchStage, ItemStage)):
+        raise PipelineError(
+            "Stage {} is neither a BatchStage nor an ItemStage".format(name)
+        )
+    if stage.kind not in STAGE_KINDS:
+        raise PipelineError(
+            "Unknown kind of stage {}: {}. Possible values: {}".format(
+                name, stage.kind, STAGE_KINDS
+            )
+        )
+
+
+def _batch_step(stage: BatchStage) -> Callable[[list], list]:
+    if stage.kind != SINK:
+        return stage.process
+
+    def sink(notifications):
+        stage.process(notifications)
+        return notifications
+
+    return sink
+
+
+def _item_step(kind: str, fns: list) -> Callable[[list], list]:
+    if kind == ENRICH:
+
+        def enrich(notifications):
+            res = []
+            append = res.append
+            for n in notifications:
+                for fn in fns:
+                    n = fn(n)
+                append(n)
+            return res
+
+        return enrich
+    if kind == FILTER:
+        if len(fns) == 1:
+            fn = fns[0]
+
+            def keep(notifications):
+                return [n for n in notifications if fn(n)]
+
+        else:
+
+            def keep(notifications):
+                return [n for n in notifications if all(fn(n) for fn in fns)]
+
+        return keep
+    if kind == SCORE:
+
+        def score(notifications):
+            if len(fns) == 1:
+                return sorted(notifications, key=fns[0], reverse=True)
+            return sorted(
+                notifications, key=lambda n: tuple(fn(n) for fn in fns), reverse=True
+            )
+
+        return score
+
+    def sink(notifications):
+        for n in notifications:
+            for fn in fns:
+                fn(n)
+        return notifications
+
+    return sink
+
+
+def _entry_points():
+    if metadata is None:
+        return []
+    entry_points = metadata.entry_points()
+    if hasattr(entry_points, "select"):
+        return list(entry_points.select(group=ENTRY_POINT_GROUP))
+    return list(entry_points.get(ENTRY_POINT_GROUP, []))
+
+
+class PipelineError(Exception):
+    pass
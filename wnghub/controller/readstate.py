@@ -0,0 +1,200 @@
+import dataclasses
+import datetime
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from wnghub.client.github import BaseGithubClient
+from wnghub.config.config import Config
+from wnghub.controller.actions import ActionQueueController
+from wnghub.controller.base import BaseController
+from wnghub.model.notification import Notification
+from wnghub.store.actions import MARK_READ, Action, SqliteActionQueue
+from wnghub.store.base import BaseNotificationStore
+
+
+class ReadStateController(BaseController):
+    """
+    Local read state, so marking notifications as read never waits
+    on Github.
+
+    `mark_read` applies the change to the local store right away and
+    queues the API call on `actions`, which delivers it in the
+    background with retries. Until Github has caught up, `reconcile` keeps fetched
+    notifications marked as read, unless they were updated after
+    being marked as read, in which case Github's state wins. If the
+    API call keeps failing, the notification is marked unread again.
+
+    :param client: client used to mark notifications as read
+    :type client: BaseGithubClient
+    :param config: the app config
+    :type config: Config
+    :param store: optional local store to apply changes to
+    :type store: Optional[BaseNotificationStore]
+    :param max_attempts: attempts at each API call before giving up
+    :type max_attempts: int
+    :param backoff: seconds to wait after first failed attempt, doubled
+                    after every failed attempt
+    :type backoff: float
+    :param actions: queue to deliver API calls with. By default, one
+                    kept in memory. Calls still pending in a durable
+                    queue are picked up again
+    :type actions: Optional[ActionQueueController]
+    """
+
+    def __init__(
+        self,
+        client: BaseGithubClient,
+        config: Config,
+        store: Optional[BaseNotificationStore] = None,
+        max_attempts: int = 5,
+        backoff: float = 1.0,
+        actions: Optional[ActionQueueController] = None,
+    ):
+        if actions is None:
+            actions = ActionQueueController(
+                client,
+                config,
+                SqliteActionQueue(":memory:"),
+                max_attempts=max_attempts,
+                backoff=backoff,
+            )
+        self.client = client
+        self.store = store
+        self.actions = actions
+        self._lock = threading.Lock()
+        # thread_id -> updated_at of notification when marked as read
+        self._overrides: Dict[str, datetime.datetime] = {}
+        # thread_id -> read copy of notification, if marked in this process
+        self._pending: Dict[str, Optional[Notification]] = {}
+        self._stop = threading.Event()
+        self._listeners: List[Callable[[Notification, Optional[Exception]], None]] = []
+        for action in actions.queue.pending(MARK_READ):
+            updated_at = action.payload.get("updated_at")
+            if updated_at is not None:
+                updated_at = datetime.datetime.fromisoformat(updated_at)
+            self._overrides[action.thread_id] = updated_at
+            self._pending[action.thread_id] = None
+        actions.add_listener(self._on_action)
+        BaseController.__init__(self, config)
+
+    def add_listener(
+        self, listener: Callable[[Notification, Optional[Exception]], None]
+    ):
+        """
+        Registers function to call when Github has been told about a
+        notification being read, or with the error if it couldn't be.
+
+        :param listener: function to call
+        :type listener: Callable[[Notification, Optional[Exception]], None]
+        """
+        self._listeners.append(listener)
+
+    def mark_read(self, notification: Notification) -> Notification:
+        """
+        Marks notification as read locally, and queues marking it as
+        read on Github.
+
+        :param notification: notification to mark as read
+        :type notification: Notification
+        :return: Notification, the read copy of it
+        """
+        read = dataclasses.replace(notification, unread=False)
+        with self._lock:
+            self._overrides[read.thread_id] = read.updated_at
+            self._pending[read.thread_id] = read
+        if self.store is not None:
+            self.store.save([read])
+        updated_at = None
+        if isinstance(read.updated_at, datetime.datetime):
+            updated_at = read.updated_at.isoformat()
+        self.actions.enqueue(read.thread_id, MARK_READ, {"updated_at": updated_at})
+        self.actions.start()
+        return read
+
+    def pending(self) -> List[str]:
+        """
+        Gets ids of threads not yet marked as read on Github.
+
+        :return: List[str]
+        """
+        with self._lock:
+            return list(self._pending)
+
+    def reconcile(self, notifications: List[Notification]) -> List[Notification]:
+        """
+        Applies local read state to notifications fetched from Github.
+        Once Github reports a notification as read, its local state
+        is no longer needed and is dropped.
+
+        :param notifications: notifications fetched from Github
+        :type notifications: List[Notification]
+        :return: List[Notification]
+        """
+        res = []
+        with self._lock:
+            for n in notifications:
+                marked_at = self._overrides.get(n.thread_id)
+                if marked_at is None:
+                    res.append(n)
+                elif not n.unread or _is_newer(n.updated_at, marked_at):
+                    if n.thread_id not in self._pending:
+                        del self._overrides[n.thread_id]
+                    res.append(n)
+                else:
+                    res.append(dataclasses.replace(n, unread=False))
+        return res
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Waits for queued API calls to be delivered.
+
+        :param timeout: max seconds to wait
+        :type timeout: Optional[float]
+        :return: bool whether every call was delivered (or gave up on)
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                if not self._pending:
+                    return True
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            self._stop.wait(0.01)
+
+    def stop(self):
+        self._stop.set()
+        self.actions.stop()
+
+    def _on_action(self, action: Action, error: Optional[Exception]):
+        if action.name != MARK_READ:
+            return
+        with self._lock:
+            notification = self._pending.get(action.thread_id)
+        if notification is None:
+            notification = Notification(thread_id=action.thread_id, unread=False)
+        self._finish(notification, error)
+
+    def _finish(self, notification: Notification, error: Optional[Exception]):
+        with self._lock:
+            known = self._pending.pop(notification.thread_id, None) is not None
+            if error is not None:
+                self._overrides.pop(notification.thread_id, None)
+        if error is not None and known and self.store is not None:
+            # Couldn't tell Github, so it is still unread there
+            self.store.save([dataclasses.replace(notification, unread=True)])
+        for listener in self._listeners:
+            listener(notification, error)
+
+
+def _is_newer(a, b) -> bool:
+    """
+    Compares notification timestamps, which may be naive or aware.
+    """
+    if not isinstance(a, datetime.datetime) or not isinstance(b, datetime.datetime):
+        return False
+    if a.tzinfo is None:
+        a = a.replace(tzinfo=datetime.timezone.utc)
+    if b.tzinfo is None:
+        b = b.replace(tzinfo=datetime.timezone.utc)
+    return a > b
@@ -0,0 +1,165 @@
+import datetime
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from wnghub.config.config import Config
+from wnghub.controller.base import BaseController
+from wnghub.store.base import BaseNotificationStore
+
+
+"""
+Buckets of how long review requests have been waiting, as (max age
+in days, label). The last bucket has no max.
+"""
+REVIEW_BACKLOG_BUCKETS = [
+    (1, "< 1 day"),
+    (7, "1-7 days"),
+    (30, "7-30 days"),
+    (None, "30+ days"),
+]
+
+
+@dataclass
+class RepositoryStats:
+    """
+    Activity of a repository over the stats window.
+    """
+
+    repository: str
+    total: int
+    per_day: float
+    last_7_days: int
+    busiest_day: str
+    busiest: int
+
+
+@dataclass
+class NotificationStats:
+    """
+    Metrics over notification history, from `StatsController.compute`.
+    Latencies are in seconds.
+    """
+
+    since: datetime.date
+    before: datetime.date
+    repositories: List[RepositoryStats]
+    review_backlog: Dict[str, int]
+    oldest_review_request: Optional[int]
+    reads: int
+    mean_read_latency: Optional[float]
+    max_read_latency: Optional[float]
+
+
+class StatsController(BaseController):
+    """
+    Computes metrics over notifications saved locally, without
+    hitting Github's API:
+        - notifications per repository per day, counting notifications
+          on every day they were updated
+        - age of unread review requests, since they were requested
+        - how long notifications stay unread
+
+    Metrics are computed from the store's daily aggregates (see
+    `BaseNotificationStore.daily_counts`), so the work depends on the
+    number of days and repositories, not notifications.
+
+    :param config: the app config
+    :type config: Config
+    :param store: store to compute metrics over
+    :type store: BaseNotificationStore
+    """
+
+    def __init__(self, config: Config, store: BaseNotificationStore):
+        self.store = store
+        BaseController.__init__(self, config)
+
+    def compute(
+        self,
+        since: Optional[datetime.date] = None,
+        before: Optional[datetime.date] = None,
+        days: int = 30,
+        today: Optional[datetime.date] = None,
+    ) -> NotificationStats:
+        """
+        Computes metrics for notifications updated in a window of days.
+        The review backlog always covers every stored review request.
+
+        :param since: first day of window. By default, `only_include_since`
+                      from config, or `days` before `before`
+        :type since: Optional[datetime.date]
+        :param before: day after last day of window. By default,
+                       `only_include_before` from config, or tomorrow
+        :type before: Optional[datetime.date]
+        :param days: length of window, if `since` isn't set
+        :type days: int
+        :param today: the current day (UTC), by default today
+        :type today: Optional[datetime.date]
+        :return: NotificationStats
+        """
+        if today is None:
+            today = datetime.datetime.now(datetime.timezone.utc).date()
+        if before is None:
+            before = _as_date(self.config.only_include_before)
+        if before is None:
+            before = today + datetime.timedelta(days=1)
+        if since is None:
+            since = _as_date(self.config.only_include_since)
+        if since is None:
+            since = before - datetime.timedelta(days=days)
+        window = max((before - since).days, 1)
+        week_start = (before - datetime.timedelta(days=7)).isoformat()
+
+        repositories: Dict[str, RepositoryStats] = {}
+        per_day: Dict[tuple, int] = {}
+        for count in self.store.daily_counts(since=since, before=before):
+            key = "{}/{}".format(count.org, count.repository)
+            stats = repositories.get(key)
+            if stats is None:
+                stats = repositories[key] = RepositoryStats(key, 0, 0.0, 0, "", 0)
+            stats.total += count.n
+            if count.day >= week_start:
+                stats.last_7_days += count.n
+            # Counts are per reason too, so sum them up per day
+            n = per_day[key, count.day] = per_day.get((key, count.day), 0) + count.n
+            if n > stats.busiest:
+                stats.busiest, stats.busiest_day = n, count.day
+        for stats in repositories.values():
+            stats.per_day = stats.total / window
+
+        backlog = {label: 0 for _, label in REVIEW_BACKLOG_BUCKETS}
+        oldest = None
+        for requested_at in self.store.review_requested_at():
+            age = max((today - _as_date(requested_at)).days, 0)
+            oldest = age if oldest is None else max(oldest, age)
+            for max_age, label in REVIEW_BACKLOG_BUCKETS:
+                if max_age is None or age < max_age:
+                    backlog[label] += 1
+                    break
+
+        latencies = self.store.read_latencies(since=since, before=before)
+        reads = sum(latency.n for latency in latencies)
+        mean_latency, max_latency = None, None
+        if reads:
+            mean_latency = sum(latency.total_seconds for latency in latencies) / reads
+            max_latency = max(latency.max_seconds for latency in latencies)
+
+        return NotificationStats(
+            since=since,
+            before=before,
+            repositories=sorted(
+                repositories.values(), key=lambda s: (-s.total, s.repository)
+            ),
+            review_backlog=backlog,
+            oldest_review_request=oldest,
+            reads=reads,
+            mean_read_latency=mean_latency,
+            max_read_latency=max_latency,
+        )
+
+
+def _as_date(value) -> Optional[datetime.date]:
+    if isinstance(value, datetime.datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone(datetime.timezone.utc)
+        return value.date()
+    return value
@@ -0,0 +1,369 @@
+import curses
+import queue
+import threading
+import webbrowser
+from typing import Callable, List, Optional
+
+from wnghub.config.config import Config
+from wnghub.controller.base import BaseController
+from wnghub.controller.github import GithubController
+from wnghub.model.notification import Notification
+from wnghub.store.view import MaterializedViews
+
+
+class Viewport(object):
+    """
+    Tracks the cursor and scroll position over a list of
+    items, so that only the rows currently on screen need
+    to be formatted.
+
+    :param height: number of rows visible at once
+    :type height: int
+    """
+
+    def __init__(self, height: int = 1):
+        self.height = max(height, 1)
+        self.size = 0
+        self.cursor = 0
+        self.top = 0
+
+    def resize(self, height: int, size: Optional[int] = None):
+        """
+        Updates visible height and, optionally, number of items.
+        Keeps the cursor within bounds and on screen.
+        """
+        self.height = max(height, 1)
+        if size is not None:
+            self.size = size
+        self.move(0)
+
+    def move(self, delta: int):
+        """
+        Moves the cursor by `delta` rows, scrolling if needed.
+        """
+        if self.size == 0:
+            self.cursor, self.top = 0, 0
+            return
+        self.cursor = min(max(self.cursor + delta, 0), self.size - 1)
+        if self.cursor < self.top:
+            self.top = self.cursor
+        elif self.cursor >= self.top + self.height:
+            self.top = self.cursor - self.height + 1
+        self.top = max(min(self.top, self.size - self.height), 0)
+
+    def page(self, pages: int):
+        self.move(pages * self.height)
+
+    def visible(self) -> range:
+        """
+        Indices of the items currently on screen.
+        """
+        return range(self.top, min(self.top + self.height, self.size))
+
+
+class NotificationTuiController(BaseController):
+    """
+    Full-screen, interactive view of notifications built on
+    `curses`.
+
+    Notifications are refreshed on a background thread so input
+    is never blocked. Only the rows currently on screen are
+    formatted, and only lines that changed since the last frame
+    are redrawn.
+
+    Keys:
+        - j / k, arrows: move cursor
+        - PgUp / PgDn, g / G: page, jump to top or bottom
+        - /: filter by text in title, repo, org or reason
+        - v: switch between saved views
+        - r: mark notification under cursor as read
+        - o / enter: open notification in browser
+        - R: refresh now
+        - q: quit
+
+    :param controller: the controller used to fetch notifications
+    :type controller: GithubController
+    :param config: the app config
+    :type config: Config
+    :param all: whether to show read notifications
+    :type all: bool
+    :param num_results: max number of notifications to load
+    :type num_results: int
+    :param refresh_interval: seconds between background refreshes
+    :type refresh_interval: float
+    :param open_url: function to call to open url in browser
+    :type open_url: Callable[[str], None]
+    :param views: optional saved views, kept up to date with local store
+    :type views: Optional[MaterializedViews]
+    """
+
+    _poll_ms = 100
+
+    _help = "j/k move  / filter  v view  r read  o open  R refresh  q quit"
+
+    def __init__(
+        self,
+        controller: GithubController,
+        config: Config,
+        all: bool = False,
+        num_results: int = 1000,
+        refresh_interval: float = 60.0,
+        open_url: Callable[[str], None] = webbrowser.open,
+        views: Optional[MaterializedViews] = None,
+    ):
+        self.controller = controller
+        self.all = all
+        self.num_results = num_results
+        self.refresh_interval = refresh_interval
+        self.open_url = open_url
+        self.views = views
+        self.view_name: Optional[str] = None
+        self.fetched: List[Notification] = []
+        self.notifications: List[Notification] = []
+        self.visible_items: List[Notification] = []
+        self.filter_text = ""
+        self.status = "Loading..."
+        self.viewport = Viewport()
+        self._updates = queue.Queue()
+        self._refresh_now = threading.Event()
+        self._stop = threading.Event()
+        self._drawn: List[Optional[tuple]] = []
+        read_state = getattr(controller, "read_state", None)
+        if read_state is not None:
+            read_state.add_listener(self._on_read_delivered)
+        BaseController.__init__(self, config)
+
+    def run(self):
+        """
+        Starts the interface. Returns when user quits.
+        """
+        curses.wrapper(self._main)
+
+    def set_notifications(self, notifications: List[Notification]):
+        """
+        Replaces current notifications, keeping the cursor on
+        the same notification if it is still present.
+        """
+        current = self.current()
+        self.notifications = list(notifications)
+        self.apply_filter(self.filter_text)
+        if current is not None:
+            for i, n in enumerate(self.visible_items):
+                if n.thread_id == current.thread_id:
+                    self.viewport.cursor = i
+                    break
+            self.viewport.move(0)
+
+    def switch_view(self, name: Optional[str] = None):
+        """
+        Shows notifications in saved view `name`, or the fetched
+        notifications if `name` is None. Views are materialized, so
+        switching does not refetch or refilter notifications.
+        """
+        self.view_name = name
+        if name is None:
+            self.set_notifications(self.fetched)
+        else:
+            self.set_notifications(self.views.get(name).notifications())
+
+    def next_view(self):
+        """
+        Cycles through fetched notifications and each saved view.
+        """
+        if self.views is None:
+            return
+        names = [None] + self.views.names()
+        self.switch_view(names[(names.index(self.view_name) + 1) % len(names)])
+
+    def apply_filter(self, text: str):
+        """
+        Only shows notifications whose title, repo, org or reason
+        contains `text` (case insensitive).
+        """
+        self.filter_text = text
+        needle = text.lower()
+        if needle == "":
+            self.visible_items = self.notifications
+        else:
+            self.visible_items = [
+                n
+                for n in self.notifications
+                if needle in n.title.lower()
+                or needle in n.repository.lower()
+                or needle in n.org.lower()
+                or needle in n.reason.lower()
+            ]
+        self.viewport.resize(self.viewport.height, len(self.visible_items))
+
+    def current(self) -> Optional[Notification]:
+        if not self.visible_items:
+            return None
+        return self.visible_items[self.viewport.cursor]
+
+    def mark_read(self):
+        """
+        Marks notification under cursor as read. The API call
+        happens on a background thread, or is queued by the
+        controller's read state if it has one.
+        """
+        notification = self.current()
+        if notification is None:
+            return
+        if not self.all:
+            self.fetched = [n for n in self.fetched if n is not notification]
+            self.set_notifications(
+                [n for n in self.notifications if n is not notification]
+            )
+        read_state = getattr(self.controller, "read_state", None)
+        if read_state is not None:
+            read_state.mark_read(notification)
+            self.status = "Marked '{}' as read.".format(notification.title)
+            return
+        self.status = "Marking '{}' as read...".format(notification.title)
+        threading.Thread(
+            target=self._mark_read_worker, args=(notification,), daemon=True
+        ).start()
+
+    def format_row(self, notification: Notification, width: int) -> str:
+        """
+        Formats a single notification as one line of `width` chars.
+        """
+        repo = "{}/{}".format(notification.org, notification.repository)
+        line = "{:<2} {:<30.30} {}".format(notification.type, repo, notification.title)
+        return line[:width].ljust(width)
+
+    def _mark_read_worker(self, notification: Notification):
+        try:
+            self.controller.client.update_notification_status(notification)
+            self._updates.put(("status", "Marked as read."))
+        except Exception as e:
+            self._updates.put(("status", "Failed to mark as read: {}".format(e)))
+
+    def _on_read_delivered(self, notification: Notification, error):
+        if error is not None:
+            self._updates.put(("status", "Failed to mark as read: {}".format(error)))
+
+    def _refresh_worker(self):
+        while not self._stop.is_set():
+            try:
+                self.controller.client.clear_cache()
+                res = self.controller.get_notifications(
+                    all=self.all, num_results=self.num_results
+                )
+                self._updates.put(("notifications", res))
+            except Exception as e:
+                self._updates.put(("status", "Refresh failed: {}".format(e)))
+            self._refresh_now.wait(self.refresh_interval)
+            self._refresh_now.clear()
+
+    def _drain_updates(self):
+        while True:
+            try:
+                kind, value = self._updates.get_nowait()
+            except queue.Empty:
+                return
+            if kind == "notifications":
+                self.fetched = value
+                self.switch_view(self.view_name)
+                self.status = "{} notifications".format(len(self.notifications))
+            else:
+                self.status = value
+
+    def _main(self, stdscr):
+        curses.curs_set(0)
+        stdscr.timeout(self._poll_ms)
+        refresher = threading.Thread(target=self._refresh_worker, daemon=True)
+        refresher.start()
+        try:
+            while True:
+                self._drain_updates()
+                self._draw(stdscr)
+                key = stdscr.getch()
+                if key == -1:
+                    continue
+                if not self._handle_key(stdscr, key):
+                    break
+        finally:
+            self._stop.set()
+            self._refresh_now.set()
+
+    def _handle_key(self, stdscr, key) -> bool:
+        if key in (ord("q"), 27):
+            return False
+        elif key in (ord("j"), curses.KEY_DOWN):
+            self.viewport.move(1)
+        elif key in (ord("k"), curses.KEY_UP):
+            self.viewport.move(-1)
+        elif key == curses.KEY_NPAGE:
+            self.viewport.page(1)
+        elif key == curses.KEY_PPAGE:
+            self.viewport.page(-1)
+        elif key == ord("g"):
+            self.viewport.move(-self.viewport.size)
+        elif key == ord("G"):
+            self.viewport.move(self.viewport.size)
+        elif key == ord("/"):
+            self.apply_filter(self._prompt(stdscr, "/"))
+        elif key == ord("v"):
+            self.next_view()
+        elif key == ord("r"):
+            self.mark_read()
+        elif key in (ord("o"), 10, curses.KEY_ENTER):
+            notification = self.current()
+            if notification is not None:
+                self.open_url(notification.html_url)
+        elif key == ord("R"):
+            self.status = "Refreshing..."
+            self._refresh_now.set()
+        elif key == curses.KEY_RESIZE:
+            self._drawn = []
+        return True
+
+    def _prompt(self, stdscr, prefix: str) -> str:
+        height, width = stdscr.getmaxyx()
+        stdscr.timeout(-1)
+        curses.echo()
+        curses.curs_set(1)
+        try:
+            stdscr.move(height - 1, 0)
+            stdscr.clrtoeol()
+            stdscr.addnstr(height - 1, 0, prefix, width - 1)
+            text = stdscr.getstr(height - 1, len(prefix), max(width - 2, 1))
+        finally:
+            curses.noecho()
+            curses.curs_set(0)
+            stdscr.timeout(self._poll_ms)
+        self._drawn = []
+        return text.decode("utf-8", "replace")
+
+    def _draw(self, stdscr):
+        height, width = stdscr.getmaxyx()
+        if len(self._drawn) != height:
+            stdscr.erase()
+            self._drawn = [None] * height
+        self.viewport.resize(height - 1, len(self.visible_items))
+        lines = []
+        rows = self.viewport.visible()
+        for i in rows:
+            selected = i == self.viewport.cursor
+            lines.append((self.format_row(self.visible_items[i], width - 1), selected))
+        for _ in range(height - 1 - len(rows)):
+            lines.append(("", False))
+        status = "{}  [{}{}]  {}".format(
+            self.status,
+            "" if self.view_name is None else "view:{} ".format(self.view_name),
+            self.filter_text,
+            self._help,
+        )
+        lines.append((status[: width - 1], True))
+        for y, line in enumerate(lines):
+            if self._drawn[y] == line:
+                continue
+            text, highlighted = line
+            stdscr.move(y, 0)
+            stdscr.clrtoeol()
+            stdscr.addnstr(
+                y, 0, text, width - 1, curses.A_REVERSE if highlighted else 0
+            )
+            self._drawn[y] = line
+        stdscr.refresh()
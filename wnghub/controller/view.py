@@ -1,13 +1,15 @@
+import datetime
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
 from wnghub.config.config import Config
+from wnghub.controller.stats import NotificationStats
+from wnghub.model.digest import NotificationGroup
 from wnghub.model.notification import Notification
 from wnghub.controller.base import BaseController
-from typing import List, Optional, Callable
+from wnghub.util.table import TableRenderer, terminal_columns
+from typing import List, Optional, Callable, Sequence
 
 import click
-import os
-from prettytable import PrettyTable
 
 
 @dataclass
@@ -16,6 +18,7 @@ class Attribute:
     field_name: str
     min_size: Optional[int] = None
     max_size: Optional[int] = None
+    shrink: bool = False
 
 
 class BaseNotificationViewController(BaseController, ABC):
@@ -30,12 +33,14 @@ class BaseNotificationViewController(BaseController, ABC):
 
     _no_notifications_msg = "No new matching notifications!"
 
+    _snapshot_msg = "*** Saved {} ago. {} ***"
+
     _fields_index = 0
 
     _headers_index = 1
 
     _default_attributes = [
-        Attribute("abbrev_title", "Title"),
+        Attribute("title", "Title", shrink=True),
         Attribute("html_url", "url"),
         Attribute("repository", "Repo", min_size=114),
         Attribute("type", "Type", min_size=121),
@@ -60,21 +65,127 @@ class BaseNotificationViewController(BaseController, ABC):
             return
         if attributes is None:
             attributes = self._default_attributes
-        attributes = self._remove_attributes_for_terminal_size(attributes)
+        columns = self._terminal_columns()
+        attributes = self._remove_attributes_for_terminal_size(attributes, columns)
         headers, fields = self._unpack_attributes(attributes)
+        shrinkable = [i for i, attr in enumerate(attributes) if attr.shrink]
         n_table = [[n.get(field) for field in fields] for n in notifications]
-        self._display_table(headers, n_table)
+        self._display_table(headers, n_table, shrinkable, columns)
+
+    def display_digest(
+        self, groups: List[NotificationGroup], by: str, expand: Sequence[str] = ()
+    ):
+        """
+        Displays one row per group, followed by the notifications of
+        groups whose keys are in `expand`.
+
+        :param groups: groups to display, ie from `group_notifications`
+        :type groups: List[NotificationGroup]
+        :param by: what notifications were grouped by, used as header
+        :type by: str
+        :param expand: keys of groups to list notifications of
+        :type expand: Sequence[str]
+        """
+        if len(groups) < 1:
+            self._write_stdout(self._no_notifications_msg)
+            return
+        now = datetime.datetime.now(datetime.timezone.utc)
+        rows = [
+            [g.key, g.count, g.unread, _format_latest(g.latest, now), g.latest_title]
+            for g in groups
+        ]
+        headers = [by.capitalize(), "Count", "Unread", "Latest", "Latest title"]
+        self._display_table(headers, rows, [4], self._terminal_columns())
+        expand = set(expand)
+        for g in groups:
+            if g.key in expand:
+                self._write_stdout("")
+                self._write_stdout("{} ({}):".format(g.key, g.count))
+                self.display(g.notifications)
+
+    def display_stats(self, stats: NotificationStats, num_repositories: int = 10):
+        """
+        Displays metrics over notification history.
+
+        :param stats: metrics, ie from `StatsController.compute`
+        :type stats: NotificationStats
+        :param num_repositories: max repositories to show
+        :type num_repositories: int
+        """
+        columns = self._terminal_columns()
+        last_day = stats.before - datetime.timedelta(days=1)
+        self._write_stdout(
+            "Notifications per repository, {} to {} (counted on every day they "
+            "were updated):".format(stats.since, last_day)
+        )
+        if stats.repositories:
+            rows = [
+                [
+                    r.repository,
+                    r.total,
+                    "{:.1f}".format(r.per_day),
+                    r.last_7_days,
+                    "{} ({})".format(r.busiest_day, r.busiest),
+                ]
+                for r in stats.repositories[:num_repositories]
+            ]
+            headers = ["Repo", "Total", "Per day", "Last 7 days", "Busiest day"]
+            self._display_table(headers, rows, [0], columns)
+        else:
+            self._write_stdout(self._no_notifications_msg)
+        waiting = sum(stats.review_backlog.values())
+        self._write_stdout("")
+        if waiting:
+            self._write_stdout(
+                "Review requests waiting: {} (oldest requested {} days ago)".format(
+                    waiting, stats.oldest_review_request
+                )
+            )
+            rows = [[label, n] for label, n in stats.review_backlog.items()]
+            self._display_table(["Waiting", "Count"], rows, [], columns)
+        else:
+            self._write_stdout("Review requests waiting: 0")
+        self._write_stdout("")
+        if stats.reads:
+            self._write_stdout(
+                "Read latency: {} on average, {} at most, over {} reads".format(
+                    _format_age(datetime.timedelta(seconds=stats.mean_read_latency)),
+                    _format_age(datetime.timedelta(seconds=stats.max_read_latency)),
+                    stats.reads,
+                )
+            )
+        else:
+            self._write_stdout("Read latency: no reads seen yet")
+
+    def display_snapshot_age(self, synced_at: Optional[datetime.datetime], status: str):
+        """
+        Displays how old the notifications from the local store are.
+
+        :param synced_at: when notifications were last fetched
+        :type synced_at: Optional[datetime.datetime]
+        :param status: what is happening with the refresh
+        :type status: str
+        """
+        if synced_at is None:
+            self._write_stdout("*** {} ***".format(status))
+            return
+        age = datetime.datetime.now(datetime.timezone.utc) - synced_at
+        self._write_stdout(self._snapshot_msg.format(_format_age(age), status))
+
+    def _terminal_columns(self) -> Optional[int]:
+        return terminal_columns()
 
     @abstractmethod
-    def _display_table(self, headers, notifications_table):
+    def _display_table(self, headers, notifications_table, shrinkable, columns):
         pass
 
     @abstractmethod
     def _write_stdout(self, str_to_write: str):
         pass
 
-    def _remove_attributes_for_terminal_size(self, attributes):
-        cols = os.get_terminal_size().columns
+    def _remove_attributes_for_terminal_size(self, attributes, cols=None):
+        if cols is None:
+            return attributes
         result_attr = []
         for attr in attributes:
             if attr.min_size is None or cols >= attr.min_size:
@@ -94,11 +205,12 @@ class BaseNotificationViewController(BaseController, ABC):
 
 class NotificationViewController(BaseNotificationViewController):
     """
-    Class for viewing notifications via CLI. Uses `prettytable`
-    to create table with field names and headers.
+    Class for viewing notifications via CLI. Uses `TableRenderer`
+    to create table with field names and headers, truncating the
+    title to fit the terminal width.
 
     By default, the following fields will be displayed:
-        - abbreviated title
+        - title
         - repo name (not including org)
         - type (either pr or issue)
         - html url to what the notification is referencing
@@ -114,21 +226,48 @@ class NotificationViewController(BaseNotificationViewController):
     :type config: Config
     :param write_stdout: function to call with what to display to user
     :type write_stdout: Callable[[str], None]
+    :param get_columns: function returning width of the terminal to
+                        display in, or None if it isn't a terminal
+    :type get_columns: Callable[[], Optional[int]]
     """
 
     def __init__(
-        self, config: Config, write_stdout: Callable[[str], None] = click.echo
+        self,
+        config: Config,
+        write_stdout: Callable[[str], None] = click.echo,
+        get_columns: Callable[[], Optional[int]] = terminal_columns,
     ):
         self.stdout = write_stdout
+        self.get_columns = get_columns
         BaseNotificationViewController.__init__(self, config)
 
-    def _display_table(self, headers, notifications_table):
-        table = PrettyTable()
-        table.field_names = headers
-        table.add_rows(notifications_table)
-        self._write_stdout(table.get_string())
+    def _display_table(self, headers, notifications_table, shrinkable, columns):
+        renderer = TableRenderer(max_width=columns)
+        renderer.write(
+            headers, notifications_table, self._write_stdout, shrinkable=shrinkable
+        )
         if self._excluded_for_terminal:
             self._write_stdout(self._expand_terminal_msg)
 
+    def _terminal_columns(self) -> Optional[int]:
+        return self.get_columns()
+
     def _write_stdout(self, str_to_write: str):
         self.stdout(str_to_write)
+
+
+def _format_latest(latest: Optional[datetime.datetime], now: datetime.datetime) -> str:
+    if not isinstance(latest, datetime.datetime):
+        return ""
+    if latest.tzinfo is None:
+        latest = latest.replace(tzinfo=datetime.timezone.utc)
+    return "{} ago".format(_format_age(now - latest))
+
+
+def _format_age(age: datetime.timedelta) -> str:
+    seconds = max(int(age.total_seconds()), 0)
+    for unit, size in (("day", 86400), ("hour", 3600), ("minute", 60)):
+        if seconds >= size:
+            n = seconds // size
+            return "{} {}{}".format(n, unit, "" if n == 1 else "s")
+    return "{} second{}".format(seconds, "" if seconds == 1 else "s")
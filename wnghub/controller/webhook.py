@@ -0,0 +1,123 @@
+import datetime
+from typing import List, Optional
+
+from wnghub.config.config import Config
+from wnghub.controller.base import BaseController
+from wnghub.model.notification import Notification
+from wnghub.model.webhook import (
+    PROVISIONAL_PREFIX,
+    is_provisional,
+    notification_from_event,
+)
+from wnghub.store.base import BaseNotificationStore
+from wnghub.util.dates import as_utc
+
+
+class WebhookController(BaseController):
+    """
+    Saves notifications made from Github webhook payloads to the
+    local store (see `wnghub.model.webhook`).
+
+    Notifications already stored for the same issue or pull request
+    are updated in place, keeping their thread id and Github's reason.
+    Others are saved with a provisional thread id, and deleted once
+    the thread is saved from the notifications API, by any process,
+    so they never show up twice. Provisional notifications Github
+    never notified about, ie for repositories the user only gets
+    webhooks from, are deleted once a reconciliation poll has covered
+    them (see `expire`).
+
+    :param config: the app config
+    :type config: Config
+    :param store: store to save notifications to
+    :type store: BaseNotificationStore
+    :param login: Github login of the user. By default, `github_login`
+                  from config
+    :type login: Optional[str]
+    """
+
+    def __init__(
+        self,
+        config: Config,
+        store: BaseNotificationStore,
+        login: Optional[str] = None,
+    ):
+        self.store = store
+        self.login = login or config.github_login
+        BaseController.__init__(self, config)
+        store.add_listener(self.reconcile)
+
+    def handle(self, event: str, payload: dict) -> List[Notification]:
+        """
+        Saves notification for a webhook payload.
+
+        :param event: name of event, from the `X-GitHub-Event` header
+        :type event: str
+        :param payload: the payload
+        :type payload: dict
+        :return: List[Notification] that were new or changed
+        """
+        n = notification_from_event(event, payload, login=self.login)
+        if n is None:
+            return []
+        matches = self.store.by_html_url([n.html_url]).get(n.html_url, [])
+        real = [m for m in matches if not is_provisional(m)]
+        if real:
+            n.thread_id = real[0].thread_id
+            n.reason = real[0].reason
+        elif matches and n.reason == "subscribed":
+            n.reason = matches[0].reason
+        return self.store.save([n])
+
+    def reconcile(self, notifications: Optional[List[Notification]] = None):
+        """
+        Deletes provisional notifications replaced by threads from the
+        notifications API. Called after every save to the store, and
+        after every reconciliation poll, since the threads may have been
+        saved by another process.
+
+        :param notifications: notifications that were just saved. Unused,
+                              since every provisional notification is checked
+        :type notifications: Optional[List[Notification]]
+        :return: int number of notifications deleted
+        """
+        provisional = self.store.with_thread_id_prefix(PROVISIONAL_PREFIX)
+        if not provisional:
+            return 0
+        matches = self.store.by_html_url(list({n.html_url for n in provisional}))
+        replaced = {
+            url
+            for url, notifications in matches.items()
+            if any(not is_provisional(m) for m in notifications)
+        }
+        return self.store.delete(
+            [n.thread_id for n in provisional if n.html_url in replaced]
+        )
+
+    def expire(
+        self,
+        before: datetime.datetime,
+        since: Optional[datetime.datetime] = None,
+    ) -> int:
+        """
+        Deletes provisional notifications updated in a range that a
+        reconciliation poll fetched every notification for. Github
+        didn't notify the user about them, or their threads would have
+        replaced them.
+
+        :param before: end of range, ie when the poll started
+        :type before: datetime.datetime
+        :param since: start of range, or None if the poll covered
+                      everything before `before`
+        :type since: Optional[datetime.datetime]
+        :return: int number of notifications deleted
+        """
+        before = as_utc(before)
+        since = as_utc(since) if since is not None else None
+        expired = [
+            n.thread_id
+            for n in self.store.with_thread_id_prefix(PROVISIONAL_PREFIX)
+            if as_utc(n.updated_at) < before
+            and (since is None or as_utc(n.updated_at) >= since)
+        ]
+        return self.store.delete(expired)
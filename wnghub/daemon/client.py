@@ -0,0 +1,118 @@
+"""
+Thin client for `NotificationDaemon`. Only uses the standard
+library, so `wnghub` can answer from the daemon without paying
+for importing click, marshmallow or requests.
+"""
+import json
+import os
+import socket
+from typing import List, Optional
+
+DEFAULT_SOCKET_PATH = "~/wnghub.sock"
+
+"""
+Environment variable overriding where the daemon's socket is.
+"""
+SOCKET_PATH_ENV = "WNGHUB_SOCKET"
+
+
+def socket_path(path: Optional[str] = None) -> str:
+    """
+    Resolves path of daemon's socket.
+
+    :param path: explicit path, by default from `SOCKET_PATH_ENV`
+                 or `DEFAULT_SOCKET_PATH`
+    :type path: Optional[str]
+    :return: str
+    """
+    return os.path.expanduser(
+        path or os.environ.get(SOCKET_PATH_ENV) or DEFAULT_SOCKET_PATH
+    )
+
+
+def request(
+    message: dict, path: Optional[str] = None, timeout: float = 1.0
+) -> Optional[dict]:
+    """
+    Sends request to daemon and waits for its response.
+
+    :param message: the request
+    :type message: dict
+    :param path: path of daemon's socket
+    :type path: Optional[str]
+    :param timeout: seconds to wait for daemon
+    :type timeout: float
+    :return: Optional[dict] response, or None if daemon isn't running
+    """
+    path = socket_path(path)
+    if not os.path.exists(path):
+        return None
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(timeout)
+    try:
+        sock.connect(path)
+        sock.sendall(json.dumps(message).encode("utf-8") + b"\n")
+        chunks = []
+        while True:
+            chunk = sock.recv(65536)
+            if not chunk:
+                break
+            chunks.append(chunk)
+        return json.loads(b"".join(chunks).decode("utf-8"))
+    except (OSError, ValueError):
+        return None
+    finally:
+        sock.close()
+
+
+def show_request(argv: List[str]) -> Optional[dict]:
+    """
+    Converts `wnghub` command line args into a request for the
+    daemon, if the daemon can answer them.
+
+    :param argv: args after the program name
+    :type argv: List[str]
+    :return: Optional[dict] request, or None if the full CLI is needed
+    """
+    res = {"cmd": "show", "all": False, "query": None}
+    args = iter(argv)
+    for arg in args:
+        if arg == "-A":
+            res["all"] = True
+        elif arg == "--only-unread":
+            res["all"] = False
+        elif arg in ("-q", "--query"):
+            res["query"] = next(args, None)
+            if res["query"] is None:
+                return None
+        elif arg.startswith("--query="):
+            res["query"] = arg[len("--query=") :]  # noqa
+        else:
+            return None
+    return res
+
+
+def try_show(argv: List[str], stdout) -> bool:
+    """
+    Answers `wnghub` invocation from the daemon, if it is running
+    and can answer it.
+
+    :param argv: args after the program name
+    :type argv: List[str]
+    :param stdout: stream to write output to
+    :return: bool whether the daemon answered
+    """
+    message = show_request(argv)
+    if message is None:
+        return False
+    try:
+        columns = os.get_terminal_size(stdout.fileno()).columns
+    except (AttributeError, ValueError, OSError):
+        columns = None
+    message["columns"] = columns
+    response = request(message)
+    if response is None or not response.get("ok"):
+        return False
+    stdout.write(response["output"])
+    stdout.flush()
+    return True
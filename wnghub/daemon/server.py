@@ -0,0 +1,317 @@
+import json
+import os
+import socket
+import socketserver
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from wnghub.config.config import Config
+from wnghub.controller.github import GithubController
+from wnghub.controller.view import NotificationViewController
+from wnghub.daemon.client import socket_path
+from wnghub.model.notification import Notification
+
+
+class NotificationDaemon(object):
+    """
+    Background process that owns the Github client and polls for
+    notifications, so `wnghub` invocations can be answered from
+    memory over a Unix domain socket (see `wnghub.daemon.client`)
+    instead of each one reading config and hitting Github.
+
+    Results are kept per (all, query) that has been asked for, and
+    refreshed every `interval` seconds. Only the `max_keys` most
+    recently asked for are kept, and those not asked for within
+    `key_ttl` seconds are dropped instead of refreshed. Rendered
+    tables are kept per terminal width until the next refresh. Config
+    is re-read when its file changes.
+
+    Results asked for the first time are fetched in the background. If
+    they aren't fetched within `first_fetch_wait` seconds, the request
+    is answered with an error, so the client falls back to the CLI
+    instead of timing out, and later requests are answered from them.
+
+    Requests are single JSON lines:
+
+        {"cmd": "show", "all": false, "query": null, "columns": 120}
+        {"cmd": "stop"}
+
+    and responses are JSON objects with `ok` and, for `show`, `output`.
+
+    :param controller: controller to fetch notifications with
+    :type controller: GithubController
+    :param config: the app config
+    :type config: Config
+    :param path: path of socket. By default, see `socket_path`
+    :type path: Optional[str]
+    :param interval: seconds between refreshes
+    :type interval: float
+    """
+
+    """
+    Seconds a request waits for results that haven't been fetched yet.
+    Less than the client's timeout.
+    """
+    first_fetch_wait = 0.5
+
+    """
+    Max number of (all, query) to keep results for.
+    """
+    max_keys = 16
+
+    """
+    Seconds after which results nobody asked for stop being refreshed.
+    """
+    key_ttl = 3600.0
+
+    def __init__(
+        self,
+        controller: GithubController,
+        config: Config,
+        path: Optional[str] = None,
+        interval: float = 60.0,
+    ):
+        self.controller = controller
+        self.config = config
+        self.path = socket_path(path)
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._results: Dict[Tuple[bool, Optional[str]], List[Notification]] = {}
+        self._rendered: Dict[Tuple[bool, Optional[str], Optional[int]], str] = {}
+        # (all, query) -> when it was last asked for, least recent first
+        self._asked: "OrderedDict[Tuple[bool, Optional[str]], float]" = OrderedDict()
+        self._fetching: Dict[Tuple[bool, Optional[str]], threading.Event] = {}
+        self._errors: Dict[Tuple[bool, Optional[str]], Exception] = {}
+        self._stopped = threading.Event()
+        self._config_mtime = self._read_config_mtime()
+        self._server: Optional[socketserver.UnixStreamServer] = None
+
+    def start(self):
+        """
+        Starts serving and polling on background threads.
+        """
+        self._remove_stale_socket()
+        self._server = _Server(self.path, _handler(self))
+        os.chmod(self.path, 0o600)
+        threading.Thread(
+            target=self._server.serve_forever, args=(0.05,), daemon=True
+        ).start()
+        threading.Thread(target=self._poll, daemon=True).start()
+        return self
+
+    def serve_forever(self):
+        """
+        Starts daemon and blocks until it is stopped.
+        """
+        self.start()
+        try:
+            self._stopped.wait()
+        finally:
+            self.stop()
+
+    def stop(self):
+        self._stopped.set()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+            try:
+                os.unlink(self.path)
+            except FileNotFoundError:
+                pass
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def show(self, all: bool = False, query: Optional[str] = None, columns=None) -> str:
+        """
+        Renders notifications, fetching them first if they haven't
+        been asked for before.
+
+        :raises NotCachedError: if they're still being fetched
+
+        :param all: whether to show read notifications too
+        :type all: bool
+        :param query: optional filter query
+        :type query: Optional[str]
+        :param columns: width of terminal, or None if not a terminal
+        :type columns: Optional[int]
+        :return: str
+        """
+        key = (all, query)
+        with self._lock:
+            self._touch(key)
+            rendered = self._rendered.get(key + (columns,))
+            results = self._results.get(key)
+        if rendered is not None:
+            return rendered
+        if results is None:
+            done = self._fetch_in_background(key)
+            done.wait(self.first_fetch_wait)
+            with self._lock:
+                error = self._errors.pop(key, None)
+                results = self._results.get(key)
+            if error is not None:
+                raise error
+            if results is None:
+                raise NotCachedError("Still fetching notifications")
+        lines = []
+        view = NotificationViewController(
+            self.config, write_stdout=lines.append, get_columns=lambda: columns
+        )
+        view.display(results)
+        rendered = "".join(line + "\n" for line in lines)
+        with self._lock:
+            self._rendered[key + (columns,)] = rendered
+        return rendered
+
+    def refresh(self):
+        """
+        Refetches every set of results that has been asked for within
+        `key_ttl` seconds, dropping the others.
+        """
+        self._reload_config()
+        self.controller.client.clear_cache()
+        now = time.monotonic()
+        with self._lock:
+            for key, asked in list(self._asked.items()):
+                if now - asked > self.key_ttl:
+                    del self._asked[key]
+                    self._forget(key)
+            keys = [key for key in self._asked if key in self._results]
+        results = {key: self._fetch(*key) for key in keys}
+        with self._lock:
+            self._results.update(
+                (key, res) for key, res in results.items() if key in self._asked
+            )
+            self._rendered.clear()
+
+    def _fetch(self, all: bool, query: Optional[str]) -> List[Notification]:
+        return self.controller.get_notifications(all=all, query=query)
+
+    def _fetch_in_background(self, key: Tuple[bool, Optional[str]]) -> threading.Event:
+        """
+        Starts fetching results for key, unless already fetching them.
+
+        :return: threading.Event set once fetched
+        """
+        with self._lock:
+            done = self._fetching.get(key)
+            if done is not None:
+                return done
+            done = self._fetching[key] = threading.Event()
+
+        def fetch():
+            results = error = None
+            try:
+                results = self._fetch(*key)
+            except Exception as e:
+                error = e
+            with self._lock:
+                if key in self._asked:
+                    if error is None:
+                        self._results[key] = results
+                    else:
+                        self._errors[key] = error
+                del self._fetching[key]
+            done.set()
+
+        threading.Thread(target=fetch, daemon=True).start()
+        return done
+
+    def _touch(self, key: Tuple[bool, Optional[str]]):
+        """
+        Records key as just asked for, dropping the least recently asked
+        for results past `max_keys`. Called with lock held.
+        """
+        self._asked[key] = time.monotonic()
+        self._asked.move_to_end(key)
+        while len(self._asked) > self.max_keys:
+            old, _ = self._asked.popitem(last=False)
+            self._forget(old)
+
+    def _forget(self, key: Tuple[bool, Optional[str]]):
+        self._results.pop(key, None)
+        self._errors.pop(key, None)
+        for rendered_key in [k for k in self._rendered if k[:2] == key]:
+            del self._rendered[rendered_key]
+
+    def _poll(self):
+        while not self._stopped.wait(self.interval):
+            try:
+                self.refresh()
+            except Exception:
+                # Keep serving the last results until Github is back
+                pass
+
+    def _read_config_mtime(self) -> Optional[float]:
+        try:
+            return os.path.getmtime(self.config.config_path())
+        except OSError:
+            return None
+
+    def _reload_config(self):
+        mtime = self._read_config_mtime()
+        if mtime == self._config_mtime:
+            return
+        self._config_mtime = mtime
+        self.config = Config.read()
+        self.controller.config = self.config
+
+    def _remove_stale_socket(self):
+        if not os.path.exists(self.path):
+            return
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.connect(self.path)
+        except OSError:
+            os.unlink(self.path)
+            return
+        finally:
+            sock.close()
+        raise DaemonRunningError("Daemon already running on {}".format(self.path))
+
+    def _handle(self, message: dict) -> dict:
+        cmd = message.get("cmd")
+        if cmd == "show":
+            output = self.show(
+                all=bool(message.get("all")),
+                query=message.get("query"),
+                columns=message.get("columns"),
+            )
+            return {"ok": True, "output": output}
+        if cmd == "stop":
+            self._stopped.set()
+            return {"ok": True}
+        return {"ok": False, "error": "Unknown command: {}".format(cmd)}
+
+
+class _Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def _handler(daemon: NotificationDaemon):
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            try:
+                message = json.loads(self.rfile.readline().decode("utf-8"))
+                response = daemon._handle(message)
+            except Exception as e:
+                # ie Github is unreachable, let client fall back to CLI
+                response = {"ok": False, "error": str(e)}
+            self.wfile.write(json.dumps(response).encode("utf-8"))
+
+    return Handler
+
+
+class DaemonRunningError(Exception):
+    pass
+
+
+class NotCachedError(Exception):
+    pass
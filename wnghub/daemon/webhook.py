@@ -0,0 +1,199 @@
+import datetime
+import hashlib
+import hmac
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+from wnghub.controller.github import GithubController
+from wnghub.controller.webhook import WebhookController
+from wnghub.util.dates import as_utc
+
+
+class WebhookReceiver(object):
+    """
+    HTTP server receiving Github webhooks (`issues`, `pull_request`,
+    reviews and comments), saving notifications made from them to the
+    local store as soon as they arrive. Point a repository or org
+    webhook with content type `application/json` at it.
+
+    Polling the notifications API becomes a slow fallback: every
+    `reconcile_interval` seconds, notifications updated since the last
+    poll are fetched, which replaces provisional notifications with
+    real threads and picks up anything webhooks don't cover, ie
+    notifications read elsewhere. Provisional notifications updated in
+    the range the poll covered, from the previous poll until
+    `notification_delay` seconds before this one started, that still
+    have no thread are expired.
+
+    :param controller: controller to save notifications with
+    :type controller: WebhookController
+    :param host: host to listen on
+    :type host: str
+    :param port: port to listen on, or 0 for any free port
+    :type port: int
+    :param secret: webhook secret. If set, payloads without a valid
+                   `X-Hub-Signature-256` are rejected
+    :type secret: Optional[str]
+    :param github: controller to reconcile with, or None not to poll
+    :type github: Optional[GithubController]
+    :param reconcile_interval: seconds between reconciliation polls
+    :type reconcile_interval: float
+    :param reconcile_max: max notifications to fetch per poll
+    :type reconcile_max: int
+    """
+
+    """
+    Seconds Github may take to create a notification after the activity
+    a webhook was sent for.
+    """
+    notification_delay = 60.0
+
+    """
+    Name of the store's watermark for reconciliation polls. Kept apart
+    from `synced_at`, which partial fetches, ie `wnghub -n 5`, move too.
+    """
+    watermark_key = "webhook_reconciled_at"
+
+    def __init__(
+        self,
+        controller: WebhookController,
+        host: str = "127.0.0.1",
+        port: int = 8787,
+        secret: Optional[str] = None,
+        github: Optional[GithubController] = None,
+        reconcile_interval: float = 900.0,
+        reconcile_max: int = 1000,
+    ):
+        self.controller = controller
+        self.secret = secret
+        self.github = github
+        self.reconcile_interval = reconcile_interval
+        self.reconcile_max = reconcile_max
+        self._stopped = threading.Event()
+        self._server = ThreadingHTTPServer((host, port), _handler(self))
+        self._server.daemon_threads = True
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[0:2]
+        return "http://{}:{}".format(host, port)
+
+    def start(self):
+        """
+        Starts receiving and reconciling on background threads.
+        """
+        threading.Thread(
+            target=self._server.serve_forever, args=(0.05,), daemon=True
+        ).start()
+        if self.github is not None:
+            threading.Thread(target=self._poll, daemon=True).start()
+        return self
+
+    def serve_forever(self):
+        """
+        Starts receiver and blocks until it is stopped.
+        """
+        self.start()
+        try:
+            self._stopped.wait()
+        finally:
+            self.stop()
+
+    def stop(self):
+        self._stopped.set()
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def reconcile(self):
+        """
+        Fetches notifications updated since the last reconciliation poll,
+        read or not, then deletes provisional notifications that were
+        replaced, or that the poll covered and Github didn't notify about.
+        """
+        store = self.github.store
+        started_at = datetime.datetime.now(datetime.timezone.utc)
+        since = store.synced_at(self.watermark_key) if store is not None else None
+        self.github.client.clear_cache()
+        res = self.github.get_notifications(
+            all=True, since=since, num_results=self.reconcile_max
+        )
+        self.controller.reconcile()
+        # Only notifications updated since `since` were fetched
+        covered_since = since
+        if res and len(res) >= self.reconcile_max:
+            # Nor ones older than the last one fetched
+            oldest = min(as_utc(n.updated_at) for n in res)
+            covered_since = oldest if since is None else max(since, oldest)
+        covered_before = started_at - datetime.timedelta(
+            seconds=self.notification_delay
+        )
+        self.controller.expire(covered_before, since=covered_since)
+        if store is not None:
+            store.mark_synced(covered_before, key=self.watermark_key)
+
+    def verify(self, body: bytes, signature: Optional[str]) -> bool:
+        """
+        Checks `X-Hub-Signature-256` of a payload against the secret.
+
+        :param body: raw payload
+        :type body: bytes
+        :param signature: value of header, ie `sha256=<hex digest>`
+        :type signature: Optional[str]
+        :return: bool, always True without a secret
+        """
+        if not self.secret:
+            return True
+        expected = hmac.new(self.secret.encode("utf-8"), body, hashlib.sha256)
+        return hmac.compare_digest("sha256=" + expected.hexdigest(), signature or "")
+
+    def _poll(self):
+        # Catch up on anything missed while not running first
+        delay = 0.0
+        while not self._stopped.wait(delay):
+            delay = self.reconcile_interval
+            try:
+                self.reconcile()
+            except Exception:
+                # Webhooks keep coming in until Github is back
+                pass
+
+
+def _handler(receiver: WebhookReceiver):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            body = self.rfile.read(length) if length else b""
+            if not receiver.verify(body, self.headers.get("X-Hub-Signature-256")):
+                return self._send(401, {"message": "Bad signature"})
+            event = self.headers.get("X-GitHub-Event") or ""
+            try:
+                payload = json.loads(body.decode("utf-8"))
+            except ValueError:
+                return self._send(400, {"message": "Payload is not JSON"})
+            if not isinstance(payload, dict):
+                return self._send(400, {"message": "Payload is not an object"})
+            saved = receiver.controller.handle(event, payload)
+            return self._send(202, {"event": event, "saved": len(saved)})
+
+        def _send(self, status, body):
+            raw = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(raw)))
+            self.end_headers()
+            self.wfile.write(raw)
+
+    return Handler
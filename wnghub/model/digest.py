@@ -0,0 +1,96 @@
+"""
+Groups notifications into a digest, ie one row per repository with
+how many notifications it has and when the latest was updated, so
+hundreds of notifications fit in a short table.
+
+Grouping is a single pass over the notifications. Each group keeps
+its notifications, so it can be expanded without fetching them again.
+"""
+import datetime
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from wnghub.model.notification import Notification
+from wnghub.util.dates import timestamp
+
+
+"""
+Maps names notifications can be grouped by to notification
+attributes. `repo` groups by "<org>/<repository>".
+"""
+GROUP_FIELDS = {
+    "repo": "repository",
+    "org": "org",
+    "reason": "reason",
+    "type": "type",
+}
+
+
+@dataclass
+class NotificationGroup:
+    """
+    Notifications sharing a repository, org, reason or type.
+
+    :param key: value shared by notifications in the group
+    :type key: str
+    :param count: number of notifications
+    :type count: int
+    :param unread: number of unread notifications
+    :type unread: int
+    :param latest: most recent `updated_at` of notifications
+    :type latest: Optional[datetime.datetime]
+    :param latest_title: title of most recently updated notification
+    :type latest_title: str
+    :param notifications: the notifications, in the order given
+    :type notifications: List[Notification]
+    """
+
+    key: str
+    count: int = 0
+    unread: int = 0
+    latest: Optional[datetime.datetime] = None
+    latest_title: str = ""
+    notifications: List[Notification] = field(default_factory=list)
+
+
+def group_notifications(
+    notifications: List[Notification], by: str = "repo"
+) -> List[NotificationGroup]:
+    """
+    Groups notifications, most recently updated group first.
+
+    :param notifications: notifications to group, ie after filtering
+    :type notifications: List[Notification]
+    :param by: one of `GROUP_FIELDS`
+    :type by: str
+    :return: List[NotificationGroup]
+    """
+    attr = GROUP_FIELDS.get(by)
+    if attr is None:
+        raise UnknownGroupError(
+            "Can't group by: {}. Possible values: {}".format(by, list(GROUP_FIELDS))
+        )
+    groups: Dict[str, NotificationGroup] = {}
+    latest: Dict[str, float] = {}
+    for n in notifications:
+        key = getattr(n, attr)
+        if by == "repo":
+            key = "{}/{}".format(n.org, key)
+        group = groups.get(key)
+        if group is None:
+            group = groups[key] = NotificationGroup(key)
+            latest[key] = float("-inf")
+        group.count += 1
+        if n.unread:
+            group.unread += 1
+        group.notifications.append(n)
+        ts = timestamp(n.updated_at, missing=float("-inf"))
+        if ts > latest[key]:
+            latest[key] = ts
+            group.latest = n.updated_at
+            group.latest_title = n.title
+    return sorted(groups.values(), key=lambda g: (-latest[g.key], g.key))
+
+
+class UnknownGroupError(Exception):
+    pass
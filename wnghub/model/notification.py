@@ -1,5 +1,8 @@
 import datetime
-from typing import List
+import fnmatch
+import re
+from abc import abstractmethod
+from typing import Callable, List, Optional
 
 from wnghub.model.model import BaseModel
 from wnghub.model.filter import BaseFilter
@@ -27,6 +30,7 @@ class Notification(BaseModel):
     is_issue: bool = False
     updated_at: datetime.datetime = datetime.MINYEAR
     thread_id: str = ""
+    unread: bool = True
 
     _pull_type = "PullRequest"
     _pull_type_name = "PR"
@@ -35,9 +39,47 @@ class Notification(BaseModel):
     _abbrev_title_len = 20
     _thread_base_url = "https://api.github.com/notifications/threads/"
 
+    """
+    Order of fields in the compact tuple form of a notification,
+    used when persisting or passing notifications between processes.
+    """
+    record_fields = (
+        "thread_id",
+        "title",
+        "abbrev_title",
+        "repository",
+        "org",
+        "html_url",
+        "reason",
+        "type",
+        "is_pull",
+        "is_issue",
+        "updated_at",
+        "unread",
+    )
+
     def get(self, field):
         return self.__getattribute__(field)
 
+    def to_record(self) -> tuple:
+        """
+        Converts notification to a tuple ordered by `record_fields`.
+
+        :return: tuple
+        """
+        return tuple(self.__getattribute__(f) for f in self.record_fields)
+
+    @staticmethod
+    def from_record(record: tuple):
+        """
+        Creates notification from a tuple ordered by `record_fields`.
+
+        :param record: the record to load
+        :type record: tuple
+        :return: Notification
+        """
+        return Notification(**dict(zip(Notification.record_fields, record)))
+
     class NotificationSchema(Schema):
         title = fields.Str()
         abbrev_title = fields.Str()
@@ -50,6 +92,7 @@ class Notification(BaseModel):
         updated_at = fields.DateTime()
         type = fields.Str()
         thread_id = fields.Str()
+        unread = fields.Bool()
 
         @pre_load
         def is_issue_or_pr(self, data, **kwargs):
@@ -93,6 +136,7 @@ class Notification(BaseModel):
         def parse_thread_id(self, data, **kwargs):
             subs_url = data.get("subscription_url")
             thread_id = subs_url.replace(Notification._thread_base_url, "")
+            thread_id = thread_id.split("/", 1)[0]
             data["thread_id"] = thread_id
             return data
 
@@ -218,3 +262,163 @@ class NotificationOrgsFilter(BaseFilter):
         elif self.exclude:
             return True
         return False
+
+
+class NotificationPatternFilter(BaseFilter):
+    """
+    Base class for filtering Notifications by matching one of
+    their fields against a list of patterns.
+
+    All patterns are compiled into one combined matcher up front,
+    so the cost of checking a notification does not grow with
+    the number of patterns.
+
+    By default will only include notifications matching any
+    of the patterns. Optionally, exclude them instead.
+
+    :param patterns: list of patterns
+    :type patterns: List[str]
+    :param field: name of notification field to match against
+    :type field: str
+    :param exclude: whether to exclude or include matches
+    :type exclude: bool
+    """
+
+    def __init__(self, patterns: List[str], field: str, exclude: bool = False):
+        self.patterns = [p for p in patterns if p]
+        self.field = field
+        self.exclude = exclude
+        self.matcher = self._compile(self.patterns) if self.patterns else None
+
+    def include(self, obj: Notification) -> bool:
+        matched = self.matcher is not None and (
+            self.matcher(obj.__getattribute__(self.field)) is not None
+        )
+        return matched != self.exclude
+
+    @abstractmethod
+    def _compile(self, patterns: List[str]) -> Callable[[str], Optional[object]]:
+        """
+        Compiles patterns into one function, returning None if
+        there is no match.
+        """
+        pass
+
+
+class NotificationGlobFilter(NotificationPatternFilter):
+    """
+    Filters Notifications by shell-style wildcards, ie `*-bot`,
+    matched against the whole value of `field` (by default, the
+    repository name).
+    """
+
+    def __init__(
+        self, patterns: List[str], field: str = "repository", exclude: bool = False
+    ):
+        NotificationPatternFilter.__init__(self, patterns, field, exclude=exclude)
+
+    def _compile(self, patterns):
+        return re.compile("|".join(fnmatch.translate(p) for p in patterns)).match
+
+
+class NotificationRegexFilter(NotificationPatternFilter):
+    """
+    Filters Notifications by regular expressions searched for
+    anywhere in `field` (by default, the title).
+    """
+
+    def __init__(
+        self, patterns: List[str], field: str = "title", exclude: bool = False
+    ):
+        NotificationPatternFilter.__init__(self, patterns, field, exclude=exclude)
+
+    def _compile(self, patterns):
+        combined, separate, names = [], [], set()
+        for pattern in patterns:
+            flags = _LEADING_FLAGS.match(pattern)
+            if flags is not None:
+                pattern = "(?{}:{})".format(*flags.groups())
+            pattern_names = set(_GROUP_NAMES.findall(pattern))
+            if (
+                _GLOBAL_FLAGS.search(pattern)
+                or _NUMBERED_BACKREFERENCE.search(pattern)
+                or pattern_names & names
+            ):
+                # Would change meaning, or not compile, inside the alternation
+                separate.append(re.compile(pattern).search)
+            else:
+                names |= pattern_names
+                combined.append("(?:{})".format(pattern))
+        searches = separate
+        if combined:
+            searches = [re.compile("|".join(combined)).search] + separate
+        if len(searches) == 1:
+            return searches[0]
+
+        def search(value):
+            for pattern_search in searches:
+                match = pattern_search(value)
+                if match is not None:
+                    return match
+            return None
+
+        return search
+
+
+"""
+Leading global flags which can be scoped to a group instead, ie `(?i)`
+"""
+_LEADING_FLAGS = re.compile(r"^\(\?([ims]+)\)(.*)$", re.DOTALL)
+
+"""
+Global flags anywhere else, which only apply to a whole pattern
+"""
+_GLOBAL_FLAGS = re.compile(r"\(\?[aiLmsux]+\)")
+
+"""
+Backreferences by number, which other patterns' groups would renumber
+"""
+_NUMBERED_BACKREFERENCE = re.compile(r"\\[1-9]|\(\?\(\d")
+
+"""
+Named groups, which must be unique in the alternation
+"""
+_GROUP_NAMES = re.compile(r"\(\?P<(\w+)>")
+
+
+class NotificationTitleKeywordsFilter(NotificationPatternFilter):
+    """
+    Filters Notifications by keywords appearing anywhere in the
+    title, ignoring case.
+
+    Keywords are compiled into a single trie-shaped regex, so
+    keywords sharing a prefix share the work of matching it.
+    """
+
+    def __init__(self, keywords: List[str], exclude: bool = False):
+        NotificationPatternFilter.__init__(self, keywords, "title", exclude=exclude)
+
+    def _compile(self, patterns):
+        trie = {}
+        for keyword in patterns:
+            node = trie
+            for char in keyword.lower():
+                node = node.setdefault(char, {})
+            node[""] = {}
+        return re.compile(_trie_pattern(trie), re.IGNORECASE).search
+
+
+def _trie_pattern(node: dict) -> str:
+    """
+    Converts trie of characters into a regex matching any word
+    in the trie. An empty key marks the end of a word.
+    """
+    branches = [
+        re.escape(char) + _trie_pattern(node[char]) for char in sorted(node) if char
+    ]
+    if not branches:
+        return ""
+    optional = "" in node
+    if len(branches) == 1 and not optional:
+        return branches[0]
+    return "(?:{}){}".format("|".join(branches), "?" if optional else "")
@@ -0,0 +1,388 @@
+"""
+Small query language for filtering notifications, ie:
+
+    org:apache AND (type:PR OR reason:review_requested) AND NOT repo:docs
+
+- `field:value` matches a field exactly. Values with `*` or `?` are
+  matched as wildcards, and `field:a,b` matches either value.
+- Values containing spaces can be quoted: `title:"flaky test"`
+- `title:` and bare words match (case insensitive) anywhere in the title.
+- Terms are combined with AND, OR, NOT (or `-term`) and parentheses.
+  Terms next to each other are combined with AND.
+
+Queries are parsed into an AST, optimized, and then compiled into a
+single Python function.
+"""
+import fnmatch
+import re
+from dataclasses import dataclass
+from typing import Callable, FrozenSet, List, Tuple
+
+from wnghub.model.filter import BaseFilter
+from wnghub.model.model import BaseModel
+
+
+class Node(object):
+    """
+    Base class for query AST nodes.
+    """
+
+    cost = 1
+
+
+@dataclass(frozen=True)
+class Const(Node):
+    value: bool
+    cost = 0
+
+
+@dataclass(frozen=True)
+class In(Node):
+    """
+    Field is equal to one of `values`.
+    """
+
+    field: str
+    values: FrozenSet[str]
+    cost = 1
+
+
+@dataclass(frozen=True)
+class Contains(Node):
+    """
+    Field contains `value`, ignoring case.
+    """
+
+    field: str
+    value: str
+    cost = 2
+
+
+@dataclass(frozen=True)
+class Glob(Node):
+    """
+    Field matches shell-style wildcard `pattern`.
+    """
+
+    field: str
+    pattern: str
+    cost = 3
+
+
+@dataclass(frozen=True)
+class Not(Node):
+    child: Node
+
+    @property
+    def cost(self):
+        return self.child.cost
+
+
+@dataclass(frozen=True)
+class And(Node):
+    children: Tuple[Node, ...]
+
+    @property
+    def cost(self):
+        return sum(c.cost for c in self.children)
+
+
+@dataclass(frozen=True)
+class Or(Node):
+    children: Tuple[Node, ...]
+
+    @property
+    def cost(self):
+        return sum(c.cost for c in self.children)
+
+
+"""
+Maps field names usable in queries to notification attributes.
+"""
+FIELDS = {
+    "org": "org",
+    "repo": "repository",
+    "repository": "repository",
+    "reason": "reason",
+    "type": "type",
+    "title": "title",
+}
+
+"""
+Aliases for values of `type:`, mapped to values of `Notification.type`.
+"""
+TYPE_ALIASES = {
+    "pr": "PR",
+    "pull": "PR",
+    "pullrequest": "PR",
+    "is": "IS",
+    "issue": "IS",
+}
+
+_token_re = re.compile(
+    r'\s*(?:(?P<paren>[()])|(?P<word>(?:[^\s()":]+:)?"(?:[^"\\]|\\.)*"|[^\s()]+))'
+)
+
+
+def tokenize(query: str) -> List[str]:
+    """
+    Splits query into parentheses and words.
+
+    :param query: query to split
+    :type query: str
+    :return: List[str]
+    """
+    tokens = []
+    pos = 0
+    query = query.rstrip()
+    while pos < len(query):
+        match = _token_re.match(query, pos)
+        if match is None:
+            raise QuerySyntaxError("Unexpected input at: {}".format(query[pos:]))
+        tokens.append(match.group("paren") or match.group("word"))
+        pos = match.end()
+    return tokens
+
+
+def parse(query: str) -> Node:
+    """
+    Parses query into AST.
+
+    :param query: query to parse
+    :type query: str
+    :raises QuerySyntaxError: if query is invalid
+    :return: Node
+    """
+    parser = _Parser(tokenize(query))
+    if not parser.tokens:
+        return Const(True)
+    node = parser.parse_or()
+    if parser.pos != len(parser.tokens):
+        raise QuerySyntaxError("Unexpected token: {}".format(parser.tokens[parser.pos]))
+    return node
+
+
+def optimize(node: Node) -> Node:
+    """
+    Simplifies AST: flattens nested AND/OR, removes double
+    negation, folds constants, merges exact matches on the same
+    field into one set lookup, and orders terms so the cheapest
+    are checked first.
+
+    :param node: AST to optimize
+    :type node: Node
+    :return: Node
+    """
+    if isinstance(node, Not):
+        child = optimize(node.child)
+        if isinstance(child, Not):
+            return child.child
+        if isinstance(child, Const):
+            return Const(not child.value)
+        return Not(child)
+    if not isinstance(node, (And, Or)):
+        return node
+    is_and = isinstance(node, And)
+    children = []
+    for child in (optimize(c) for c in node.children):
+        if isinstance(child, type(node)):
+            children.extend(child.children)
+        elif isinstance(child, Const):
+            if child.value != is_and:
+                return Const(child.value)
+        else:
+            children.append(child)
+    merged = {}
+    others = []
+    for child in children:
+        if isinstance(child, In):
+            if child.field not in merged:
+                merged[child.field] = child.values
+            elif is_and:
+                merged[child.field] = merged[child.field] & child.values
+            else:
+                merged[child.field] = merged[child.field] | child.values
+        elif child not in others:
+            others.append(child)
+    children = [In(field, values) for field, values in merged.items()] + others
+    if is_and and any(isinstance(c, In) and not c.values for c in children):
+        return Const(False)
+    if not children:
+        return Const(is_and)
+    if len(children) == 1:
+        return children[0]
+    children.sort(key=lambda c: c.cost)
+    return type(node)(tuple(children))
+
+
+def compile_query(node: Node) -> Callable[[BaseModel], bool]:
+    """
+    Compiles AST into a single function that takes a notification
+    and returns whether it matches.
+
+    :param node: AST to compile
+    :type node: Node
+    :return: Callable[[BaseModel], bool]
+    """
+    constants = {}
+
+    def constant(value):
+        name = "_c{}".format(len(constants))
+        constants[name] = value
+        return name
+
+    def source(n):
+        if isinstance(n, Const):
+            return "True" if n.value else "False"
+        if isinstance(n, In):
+            if len(n.values) == 1:
+                return "(n.{} == {})".format(n.field, constant(next(iter(n.values))))
+            return "(n.{} in {})".format(n.field, constant(n.values))
+        if isinstance(n, Contains):
+            return "({} in n.{}.lower())".format(constant(n.value.lower()), n.field)
+        if isinstance(n, Glob):
+            matcher = re.compile(fnmatch.translate(n.pattern)).match
+            return "({}(n.{}) is not None)".format(constant(matcher), n.field)
+        if isinstance(n, Not):
+            return "(not {})".format(source(n.child))
+        if isinstance(n, And):
+            return "({})".format(" and ".join(source(c) for c in n.children))
+        if isinstance(n, Or):
+            return "({})".format(" or ".join(source(c) for c in n.children))
+        raise QuerySyntaxError("Unknown node: {}".format(n))
+
+    body = source(node)
+    constants["__builtins__"] = {}
+    return eval("lambda n: {}".format(body), constants)
+
+
+class QueryFilter(BaseFilter):
+    """
+    Filters models with a query, ie
+    `org:apache AND (type:PR OR reason:review_requested)`.
+
+    The query is parsed, optimized and compiled once, when the
+    filter is created.
+
+    :param query: the query to filter with
+    :type query: str
+    :raises QuerySyntaxError: if query is invalid
+    """
+
+    def __init__(self, query: str):
+        self.query = query
+        self.ast = optimize(parse(query))
+        self.predicate = compile_query(self.ast)
+
+    def apply(self, objs: List[BaseModel]) -> List[BaseModel]:
+        predicate = self.predicate
+        return [obj for obj in objs if predicate(obj)]
+
+    def include(self, obj: BaseModel) -> bool:
+        return self.predicate(obj)
+
+
+class _Parser(object):
+    """
+    Recursive descent parser for queries.
+
+    or_expr  := and_expr (OR and_expr)*
+    and_expr := not_expr ([AND] not_expr)*
+    not_expr := NOT not_expr | -term | atom
+    atom     := ( or_expr ) | term
+    """
+
+    def __init__(self, tokens: List[str]):
+        self.tokens = tokens
+        self.pos = 0
+
+    def peek(self):
+        if self.pos < len(self.tokens):
+            return self.tokens[self.pos]
+        return None
+
+    def next(self):
+        token = self.peek()
+        if token is None:
+            raise QuerySyntaxError("Unexpected end of query")
+        self.pos += 1
+        return token
+
+    def keyword(self, token, keyword):
+        return token is not None and token.upper() == keyword
+
+    def parse_or(self) -> Node:
+        children = [self.parse_and()]
+        while self.keyword(self.peek(), "OR"):
+            self.next()
+            children.append(self.parse_and())
+        return children[0] if len(children) == 1 else Or(tuple(children))
+
+    def parse_and(self) -> Node:
+        children = [self.parse_not()]
+        while True:
+            token = self.peek()
+            if token is None or token == ")" or self.keyword(token, "OR"):
+                break
+            if self.keyword(token, "AND"):
+                self.next()
+            children.append(self.parse_not())
+        return children[0] if len(children) == 1 else And(tuple(children))
+
+    def parse_not(self) -> Node:
+        token = self.peek()
+        if self.keyword(token, "NOT"):
+            self.next()
+            return Not(self.parse_not())
+        if token is not None and token.startswith("-") and len(token) > 1:
+            self.next()
+            return Not(self.term(token[1:]))
+        return self.parse_atom()
+
+    def parse_atom(self) -> Node:
+        token = self.next()
+        if token == "(":
+            node = self.parse_or()
+            if self.next() != ")":
+                raise QuerySyntaxError("Expected )")
+            return node
+        if token == ")" or self.keyword(token, "AND") or self.keyword(token, "OR"):
+            raise QuerySyntaxError("Unexpected token: {}".format(token))
+        return self.term(token)
+
+    def term(self, token: str) -> Node:
+        if ":" not in token or token.startswith('"'):
+            return Contains("title", _unquote(token))
+        name, value = token.split(":", 1)
+        field = FIELDS.get(name.lower())
+        if field is None:
+            raise QuerySyntaxError(
+                "Unknown field: {}. Possible values: {}".format(name, list(FIELDS))
+            )
+        if value.startswith('"'):
+            values = [_unquote(value)]
+        else:
+            values = [v for v in value.split(",") if v != ""]
+        if not values:
+            raise QuerySyntaxError("Missing value for field: {}".format(name))
+        nodes = [self.match(field, v) for v in values]
+        return nodes[0] if len(nodes) == 1 else Or(tuple(nodes))
+
+    def match(self, field: str, value: str) -> Node:
+        if field == "title":
+            return Contains(field, value)
+        if field == "type":
+            value = TYPE_ALIASES.get(value.lower(), value)
+        if any(c in value for c in "*?["):
+            return Glob(field, value)
+        return In(field, frozenset([value]))
+
+
+def _unquote(token: str) -> str:
+    if len(token) >= 2 and token.startswith('"') and token.endswith('"'):
+        return re.sub(r"\\(.)", r"\1", token[1:-1])
+    return token
+
+
+class QuerySyntaxError(Exception):
+    pass
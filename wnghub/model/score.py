@@ -0,0 +1,162 @@
+"""
+Ranks notifications by how much they likely matter, rather than by
+when they were updated. A notification's score is
+
+    (reason weight * repo weight + participation bonus) * age decay
+
+where the age decay halves every `half_life_hours`.
+
+Scores are computed for a whole batch at once, column by column,
+looking weights up once per distinct reason and repository. Only the
+best `k` are then picked with a heap, instead of sorting everything.
+"""
+import datetime
+import heapq
+import math
+from typing import Dict, List, Optional
+
+from wnghub.model.notification import Notification
+from wnghub.util.dates import timestamp
+
+
+DEFAULT_REASON_WEIGHTS = {
+    "review_requested": 5.0,
+    "mention": 4.0,
+    "assign": 3.0,
+    "team_mention": 3.0,
+    "author": 2.0,
+    "comment": 2.0,
+    "state_change": 1.5,
+    "subscribed": 1.0,
+    "ci_activity": 0.5,
+}
+
+"""
+Reasons meaning the user is directly involved in the thread, which
+get the participation bonus.
+"""
+PARTICIPATING_REASONS = {
+    "assign",
+    "author",
+    "comment",
+    "mention",
+    "review_requested",
+    "state_change",
+    "team_mention",
+}
+
+
+class NotificationScorer(object):
+    """
+    Scores notifications for a ranked inbox.
+
+    :param reason_weights: weight per reason, merged over
+                           `DEFAULT_REASON_WEIGHTS`. Unknown reasons weigh 1
+    :type reason_weights: Optional[Dict[str, float]]
+    :param repo_weights: weight per "<org>/<repo>", repo or org, looked
+                         up in that order. Others weigh 1
+    :type repo_weights: Optional[Dict[str, float]]
+    :param half_life_hours: hours for a score to halve with age
+    :type half_life_hours: float
+    :param participating_bonus: added for `PARTICIPATING_REASONS`
+    :type participating_bonus: float
+    """
+
+    def __init__(
+        self,
+        reason_weights: Optional[Dict[str, float]] = None,
+        repo_weights: Optional[Dict[str, float]] = None,
+        half_life_hours: float = 24.0,
+        participating_bonus: float = 1.0,
+    ):
+        self.reason_weights = dict(DEFAULT_REASON_WEIGHTS, **(reason_weights or {}))
+        self.repo_weights = dict(repo_weights or {})
+        self.half_life_hours = half_life_hours
+        self.participating_bonus = participating_bonus
+
+    def scores(
+        self,
+        notifications: List[Notification],
+        now: Optional[datetime.datetime] = None,
+    ) -> List[float]:
+        """
+        Scores notifications.
+
+        :param notifications: notifications to score
+        :type notifications: List[Notification]
+        :param now: time to compute ages at, by default now
+        :type now: Optional[datetime.datetime]
+        :return: List[float], in the same order as `notifications`
+        """
+        exp = math.exp
+        return [exp(s) for s in self.log_scores(notifications, now=now)]
+
+    def log_scores(
+        self,
+        notifications: List[Notification],
+        now: Optional[datetime.datetime] = None,
+    ) -> List[float]:
+        """
+        Scores notifications on a log scale, which orders them the same
+        as `scores` but doesn't underflow to 0 for old notifications.
+
+        :param notifications: notifications to score
+        :type notifications: List[Notification]
+        :param now: time to compute ages at, by default now
+        :type now: Optional[datetime.datetime]
+        :return: List[float], in the same order as `notifications`
+        """
+        if now is None:
+            now = datetime.datetime.now(datetime.timezone.utc)
+        now_ts = timestamp(now)
+        bases = {}
+        for n in notifications:
+            key = (n.reason, n.org, n.repository)
+            if key not in bases:
+                weight, bonus = self._reason_base(n.reason)
+                base = weight * self._repo_weight(n.org, n.repository) + bonus
+                bases[key] = math.log(base) if base > 0 else float("-inf")
+        # Decay per second of age, so it is a subtraction per notification
+        rate = (
+            math.log(2) / (self.half_life_hours * 3600) if self.half_life_hours else 0
+        )
+        res = []
+        append = res.append
+        for n in notifications:
+            age = now_ts - timestamp(n.updated_at)
+            append(
+                bases[n.reason, n.org, n.repository] - rate * (age if age > 0 else 0)
+            )
+        return res
+
+    def top(
+        self,
+        notifications: List[Notification],
+        k: int,
+        now: Optional[datetime.datetime] = None,
+    ) -> List[Notification]:
+        """
+        Gets the `k` highest scoring notifications, best first. Ties
+        keep the order notifications were given in.
+
+        :param notifications: notifications to rank
+        :type notifications: List[Notification]
+        :param k: number of notifications to get
+        :type k: int
+        :param now: time to compute ages at, by default now
+        :type now: Optional[datetime.datetime]
+        :return: List[Notification]
+        """
+        scores = self.log_scores(notifications, now=now)
+        best = heapq.nlargest(k, range(len(scores)), key=scores.__getitem__)
+        return [notifications[i] for i in best]
+
+    def _reason_base(self, reason: str) -> tuple:
+        bonus = self.participating_bonus if reason in PARTICIPATING_REASONS else 0.0
+        return self.reason_weights.get(reason, 1.0), bonus
+
+    def _repo_weight(self, org: str, repository: str) -> float:
+        for key in ("{}/{}".format(org, repository), repository, org):
+            if key in self.repo_weights:
+                return self.repo_weights[key]
+        return 1.0
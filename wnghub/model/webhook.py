@@ -0,0 +1,147 @@
+"""
+Converts Github webhook payloads into notifications, so activity can
+be saved locally as soon as Github sends it, instead of waiting for
+the next poll of the notifications API.
+
+Webhooks don't carry notification thread ids, so notifications made
+from them get a provisional id (see `provisional_thread_id`) until the
+notifications API returns the real thread, which then replaces them.
+Neither do they say why the user would be notified, so the reason is
+worked out from the user's login, if known, falling back to
+`subscribed`.
+
+:see: https://docs.github.com/en/developers/webhooks-and-events/webhook-events-and-payloads
+"""
+import datetime
+import re
+from typing import Optional
+
+from wnghub.model.notification import Notification
+
+
+"""
+Webhook events that are converted into notifications. Others, ie
+`ping` or `push`, are ignored.
+"""
+SUPPORTED_EVENTS = {
+    "issues",
+    "issue_comment",
+    "pull_request",
+    "pull_request_review",
+    "pull_request_review_comment",
+}
+
+"""
+Prefix of thread ids of notifications made from webhooks.
+"""
+PROVISIONAL_PREFIX = "webhook:"
+
+_number_url = re.compile(r"^https://github\.com/([^/]+)/([^/]+)/(?:pull|issues)/(\d+)")
+
+
+def notification_from_event(
+    event: str, payload: dict, login: Optional[str] = None
+) -> Optional[Notification]:
+    """
+    Converts a webhook payload into a notification.
+
+    :param event: name of event, from the `X-GitHub-Event` header
+    :type event: str
+    :param payload: the payload
+    :type payload: dict
+    :param login: Github login of the user, to tell why they'd be
+                  notified and skip their own activity
+    :type login: Optional[str]
+    :return: Optional[Notification], None if the event isn't supported
+             or Github wouldn't notify the user about it
+    """
+    if event not in SUPPORTED_EVENTS:
+        return None
+    subject = payload.get("pull_request") or payload.get("issue")
+    repository = payload.get("repository")
+    if not subject or not repository:
+        return None
+    if login is not None and _login(payload.get("sender")) == login:
+        # Github doesn't notify users about their own activity
+        return None
+    is_pull = "pull_request" in payload or "pull_request" in subject
+    title = subject.get("title") or ""
+    activity = payload.get("comment") or payload.get("review") or subject
+    updated_at = _parse_time(
+        activity.get("submitted_at")
+        or activity.get("updated_at")
+        or activity.get("created_at")
+        or subject.get("updated_at")
+    )
+    html_url = subject.get("html_url") or ""
+    thread_id = provisional_thread_id(html_url)
+    if thread_id is None:
+        return None
+    return Notification(
+        title=title,
+        abbrev_title="{}...".format(title[0 : Notification._abbrev_title_len]),  # noqa
+        repository=repository.get("name") or "",
+        org=_login(repository.get("owner")) or "",
+        html_url=html_url,
+        reason=_reason(payload, subject, activity, login),
+        type=Notification._pull_type_name if is_pull else Notification._issue_type_name,
+        is_pull=is_pull,
+        is_issue=not is_pull,
+        updated_at=updated_at,
+        thread_id=thread_id,
+        unread=True,
+    )
+
+
+def provisional_thread_id(html_url: str) -> Optional[str]:
+    """
+    Gets thread id given to notifications made from webhooks, from the
+    URL of their issue or pull request, ie `webhook:apache/spark#12`.
+
+    :param html_url: URL of issue or pull request
+    :type html_url: str
+    :return: Optional[str], None if not an issue or pull request URL
+    """
+    match = _number_url.match(html_url or "")
+    if match is None:
+        return None
+    return "{}{}/{}#{}".format(PROVISIONAL_PREFIX, *match.groups())
+
+
+def is_provisional(notification: Notification) -> bool:
+    """
+    Whether notification was made from a webhook, and hasn't been
+    replaced by the thread from the notifications API yet.
+
+    :return: bool
+    """
+    return notification.thread_id.startswith(PROVISIONAL_PREFIX)
+
+
+def _reason(payload: dict, subject: dict, activity: dict, login: Optional[str]) -> str:
+    if login is None:
+        return "subscribed"
+    action = payload.get("action")
+    if (
+        action == "review_requested"
+        and _login(payload.get("requested_reviewer")) == login
+    ):
+        return "review_requested"
+    if action == "assigned" and _login(payload.get("assignee")) == login:
+        return "assign"
+    mention = re.compile(r"(?<![\w-])@{}(?![\w-])".format(re.escape(login)), re.I)
+    if mention.search(activity.get("body") or ""):
+        return "mention"
+    if _login(subject.get("user")) == login:
+        return "author"
+    return "subscribed"
+
+
+def _login(user: Optional[dict]) -> Optional[str]:
+    return user.get("login") if user else None
+
+
+def _parse_time(value: Optional[str]) -> datetime.datetime:
+    if not value:
+        return datetime.datetime.now(datetime.timezone.utc)
+    return datetime.datetime.fromisoformat(value.replace("Z", "+00:00"))
@@ -0,0 +1,269 @@
+import json
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+from wnghub.config.base import config_path
+
+
+"""
+Names of actions that can be queued.
+"""
+MARK_READ = "mark_read"
+
+IGNORE_THREAD = "ignore_thread"
+
+UNWATCH_REPOSITORY = "unwatch_repository"
+
+
+@dataclass
+class Action:
+    """
+    Write to make to Github for a notification thread.
+
+    :param thread_id: thread the action is for, or "<org>/<repository>"
+                      for actions on repositories
+    :type thread_id: str
+    :param name: what to do, ie `MARK_READ`
+    :type name: str
+    :param payload: anything else needed to perform the action
+    :type payload: dict
+    :param attempts: number of failed attempts so far
+    :type attempts: int
+    :param error: error from last failed attempt
+    :type error: Optional[str]
+    """
+
+    thread_id: str
+    name: str
+    payload: dict = field(default_factory=dict)
+    attempts: int = 0
+    error: Optional[str] = None
+
+
+class SqliteActionQueue(object):
+    """
+    Durable queue of actions waiting to be made on Github, so they
+    survive restarts and offline periods.
+
+    There is at most one queued action per thread and action name:
+    queueing an action that is already queued only updates its payload.
+    Actions are claimed with a lease, so if a process dies while making
+    them, another process picks them up once the lease runs out.
+
+    :param path: location of database file. By default, `DEFAULT_QUEUE_PATH`
+    :type path: Optional[str]
+    """
+
+    DEFAULT_QUEUE_PATH = "~/wnghub.db"
+
+    _pending = "pending"
+
+    _failed = "failed"
+
+    _schema = [
+        """
+        CREATE TABLE IF NOT EXISTS actions (
+            thread_id TEXT,
+            name TEXT,
+            payload TEXT,
+            status TEXT,
+            attempts INTEGER DEFAULT 0,
+            error TEXT,
+            not_before REAL DEFAULT 0,
+            leased_until REAL DEFAULT 0,
+            created_at REAL,
+            PRIMARY KEY (thread_id, name)
+        )
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS actions_due
+        ON actions (status, not_before)
+        """,
+    ]
+
+    def __init__(self, path: Optional[str] = None):
+        if path is None:
+            path = self.DEFAULT_QUEUE_PATH
+        if path != ":memory:":
+            path = str(config_path(path))
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        with self._conn:
+            for statement in self._schema:
+                self._conn.execute(statement)
+
+    def enqueue(
+        self, thread_id: str, name: str, payload: Optional[dict] = None
+    ) -> bool:
+        """
+        Queues action, coalescing it with any queued action with the
+        same thread and name. Actions that failed for good are queued
+        again from scratch.
+
+        :param thread_id: thread the action is for
+        :type thread_id: str
+        :param name: what to do, ie `MARK_READ`
+        :type name: str
+        :param payload: anything else needed to perform the action
+        :type payload: Optional[dict]
+        :return: bool False if it was coalesced with a pending action
+        """
+        payload = json.dumps(payload or {})
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT status FROM actions WHERE thread_id = ? AND name = ?",
+                (thread_id, name),
+            ).fetchone()
+            if row is not None and row[0] == self._pending:
+                self._conn.execute(
+                    "UPDATE actions SET payload = ? WHERE thread_id = ? AND name = ?",
+                    (payload, thread_id, name),
+                )
+                return False
+            self._conn.execute(
+                "INSERT OR REPLACE INTO actions "
+                "(thread_id, name, payload, status, created_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (thread_id, name, payload, self._pending, time.time()),
+            )
+        return True
+
+    def claim(self, limit: int, lease: float = 60.0) -> List[Action]:
+        """
+        Claims actions that are due, oldest first. Claimed actions
+        aren't handed out again until `lease` seconds have passed,
+        unless they are retried.
+
+        :param limit: max number of actions to claim
+        :type limit: int
+        :param lease: seconds to hold claimed actions for
+        :type lease: float
+        :return: List[Action]
+        """
+        now = time.time()
+        with self._lock, self._conn:
+            rows = self._conn.execute(
+                "SELECT thread_id, name, payload, attempts, error FROM actions "
+                "WHERE status = ? AND not_before <= ? AND leased_until <= ? "
+                "ORDER BY created_at LIMIT ?",
+                (self._pending, now, now, limit),
+            ).fetchall()
+            self._conn.executemany(
+                "UPDATE actions SET leased_until = ? WHERE thread_id = ? AND name = ?",
+                [(now + lease, row[0], row[1]) for row in rows],
+            )
+        return [self._action(row) for row in rows]
+
+    def complete(self, action: Action):
+        """
+        Removes action that was made successfully.
+        """
+        with self._lock, self._conn:
+            self._conn.execute(
+                "DELETE FROM actions WHERE thread_id = ? AND name = ?",
+                (action.thread_id, action.name),
+            )
+
+    def retry(self, action: Action, error: str, delay: float):
+        """
+        Records failed attempt at action, making it due again after `delay`.
+        """
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE actions SET attempts = attempts + 1, error = ?, "
+                "not_before = ?, leased_until = 0 WHERE thread_id = ? AND name = ?",
+                (error, time.time() + delay, action.thread_id, action.name),
+            )
+
+    def fail(self, action: Action, error: str):
+        """
+        Gives up on action. It is kept, so it can be seen and retried.
+        """
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE actions SET status = ?, attempts = attempts + 1, error = ?, "
+                "leased_until = 0 WHERE thread_id = ? AND name = ?",
+                (self._failed, error, action.thread_id, action.name),
+            )
+
+    def retry_failed(self) -> int:
+        """
+        Queues every action that was given up on again.
+
+        :return: int number of actions queued again
+        """
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "UPDATE actions SET status = ?, attempts = 0, not_before = 0 "
+                "WHERE status = ?",
+                (self._pending, self._failed),
+            )
+        return cursor.rowcount
+
+    def pending(self, name: Optional[str] = None) -> List[Action]:
+        """
+        Gets actions still to be made, optionally only those named `name`.
+
+        :return: List[Action]
+        """
+        return self._select(self._pending, name)
+
+    def failed(self) -> List[Action]:
+        """
+        Gets actions that were given up on.
+
+        :return: List[Action]
+        """
+        return self._select(self._failed, None)
+
+    def count(self) -> int:
+        """
+        Counts actions still to be made.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT COUNT(*) FROM actions WHERE status = ?", (self._pending,)
+            ).fetchone()
+        return row[0]
+
+    def next_due(self) -> Optional[float]:
+        """
+        Gets seconds until the next pending action is due, or None if
+        there are no pending actions.
+
+        :return: Optional[float]
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT MIN(MAX(not_before, leased_until)) FROM actions "
+                "WHERE status = ?",
+                (self._pending,),
+            ).fetchone()
+        if row[0] is None:
+            return None
+        return max(row[0] - time.time(), 0.0)
+
+    def close(self):
+        self._conn.close()
+
+    def _select(self, status: str, name: Optional[str]) -> List[Action]:
+        statement = (
+            "SELECT thread_id, name, payload, attempts, error FROM actions "
+            "WHERE status = ?"
+        )
+        params = (status,)
+        if name is not None:
+            statement += " AND name = ?"
+            params = (status, name)
+        with self._lock:
+            rows = self._conn.execute(statement + " ORDER BY created_at", params)
+            return [self._action(row) for row in rows.fetchall()]
+
+    @staticmethod
+    def _action(row: tuple) -> Action:
+        thread_id, name, payload, attempts, error = row
+        return Action(thread_id, name, json.loads(payload or "{}"), attempts, error)
@@ -0,0 +1,352 @@
+import bisect
+import datetime
+import json
+import mmap
+import os
+import struct
+import threading
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from marshmallow import EXCLUDE
+
+from wnghub.config.base import config_path
+from wnghub.model.notification import Notification
+from wnghub.util.dates import timestamp
+
+
+class RawPageArchive(object):
+    """
+    Append-only archive of raw notification pages, as returned by
+    Github's notifications endpoint.
+
+    Pages are appended to a data file as length-prefixed entries,
+    and read back through a memory map so only the notifications
+    that are asked for get decoded. A separate index file records
+    the byte range of every notification within the data file,
+    along with its `thread_id` and `updated_at`, so history can be
+    re-parsed (ie for new fields or views) without refetching it
+    and without loading the whole archive into memory.
+
+    After each page, the index records the number of pages and the
+    length of the data file indexed so far. If the index file is
+    missing, it is rebuilt from the data file, and if it is behind
+    the data file (ie after a crash between writing the two), pages
+    past the recorded length are indexed on open.
+
+    :param path: location of data file. By default, `DEFAULT_ARCHIVE_PATH`.
+                 The index is kept next to it, in `<path>.idx`
+    :type path: Optional[str]
+    """
+
+    DEFAULT_ARCHIVE_PATH = "~/wnghub.archive"
+
+    _header = struct.Struct(">I")
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = str(config_path(path or self.DEFAULT_ARCHIVE_PATH))
+        self.index_path = self.path + ".idx"
+        self._lock = threading.RLock()
+        # thread_id -> (updated_at, offset, length) of latest version
+        self._latest: Dict[str, Tuple[float, int, int]] = {}
+        # (updated_at, thread_id) of latest versions, in order
+        self._by_time: List[Tuple[float, str]] = []
+        self._pages = 0
+        self._map: Optional[mmap.mmap] = None
+        self._data = open(self.path, "ab+")
+        if os.path.exists(self.index_path):
+            self._load_index()
+        else:
+            self._rebuild_index()
+
+    def append(self, raw: str) -> int:
+        """
+        Appends raw page to archive and indexes its notifications.
+
+        :param raw: response body from Github's notifications endpoint
+        :type raw: str
+        :return: int offset of page in data file
+        """
+        body = raw.encode("utf-8")
+        with self._lock:
+            self._data.seek(0, os.SEEK_END)
+            offset = self._data.tell()
+            self._data.write(self._header.pack(len(body)))
+            self._data.write(body)
+            self._data.flush()
+            entries = _index_page(body, offset + self._header.size)
+            self._pages += 1
+            self._write_index(entries, self._data.tell())
+            self._add_entries(entries)
+        return offset
+
+    def pages(self, start: int = 0) -> Iterator[memoryview]:
+        """
+        Iterates over raw pages in archive, oldest first. Pages are
+        views of the memory map, not copies.
+
+        :param start: offset in data file to start from
+        :type start: int
+        :return: Iterator[memoryview]
+        """
+        for offset, length in self._page_ranges(start):
+            yield self._view()[offset : offset + length]  # noqa
+
+    def raw(self, thread_id: str) -> Optional[memoryview]:
+        """
+        Gets latest raw JSON for a notification, or None if it isn't
+        archived. Only the notification's own bytes are read, through
+        a view of the memory map.
+
+        :param thread_id: the notification's thread id
+        :type thread_id: str
+        :return: Optional[memoryview]
+        """
+        with self._lock:
+            entry = self._latest.get(thread_id)
+            if entry is None:
+                return None
+            _, offset, length = entry
+            return self._view()[offset : offset + length]  # noqa
+
+    def get(self, thread_id: str) -> Optional[Notification]:
+        """
+        Gets latest archived version of a notification.
+
+        :param thread_id: the notification's thread id
+        :type thread_id: str
+        :return: Optional[Notification]
+        """
+        raw = self.raw(thread_id)
+        if raw is None:
+            return None
+        return Notification.SCHEMA().loads(str(raw, "utf-8"), unknown=EXCLUDE)
+
+    def thread_ids(
+        self,
+        since: Optional[datetime.datetime] = None,
+        before: Optional[datetime.datetime] = None,
+    ) -> List[str]:
+        """
+        Gets ids of archived notifications updated in range, most
+        recently updated first.
+
+        :param since: optional start of range
+        :type since: Optional[datetime.datetime]
+        :param before: optional end of range
+        :type before: Optional[datetime.datetime]
+        :return: List[str]
+        """
+        with self._lock:
+            lo = 0
+            hi = len(self._by_time)
+            if since is not None:
+                lo = bisect.bisect_left(self._by_time, (timestamp(since), ""))
+            if before is not None:
+                hi = bisect.bisect_left(self._by_time, (timestamp(before), ""))
+            return [thread_id for _, thread_id in reversed(self._by_time[lo:hi])]
+
+    def notifications(
+        self,
+        since: Optional[datetime.datetime] = None,
+        before: Optional[datetime.datetime] = None,
+    ) -> Iterator[Notification]:
+        """
+        Lazily decodes latest version of every archived notification
+        updated in range, most recently updated first.
+
+        :param since: optional start of range
+        :type since: Optional[datetime.datetime]
+        :param before: optional end of range
+        :type before: Optional[datetime.datetime]
+        :return: Iterator[Notification]
+        """
+        for thread_id in self.thread_ids(since=since, before=before):
+            notification = self.get(thread_id)
+            if notification is not None:
+                yield notification
+
+    @property
+    def num_pages(self) -> int:
+        return self._pages
+
+    def __len__(self) -> int:
+        return len(self._latest)
+
+    def close(self):
+        with self._lock:
+            if self._map is not None:
+                try:
+                    self._map.close()
+                except BufferError:
+                    # Views returned by pages() or raw() are still in use,
+                    # the map is closed once they're released
+                    pass
+                self._map = None
+            self._data.close()
+            self._index.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _mapped(self) -> Optional[mmap.mmap]:
+        """
+        Gets memory map of data file, remapping it if it has grown
+        since it was last mapped.
+        """
+        size = os.path.getsize(self.path)
+        if size == 0:
+            return None
+        if self._map is None or len(self._map) < size:
+            # Old map isn't closed, since readers may still be using it
+            self._map = mmap.mmap(self._data.fileno(), size, access=mmap.ACCESS_READ)
+        return self._map
+
+    def _view(self) -> memoryview:
+        with self._lock:
+            return memoryview(self._mapped() or b"")
+
+    def _page_ranges(self, start: int = 0) -> Iterator[Tuple[int, int]]:
+        """
+        Walks the length headers of pages from `start`, yielding the
+        offset and length of each complete page without reading it.
+        """
+        with self._lock:
+            buf = self._mapped()
+        offset = start
+        while buf is not None and offset + self._header.size <= len(buf):
+            (length,) = self._header.unpack_from(buf, offset)
+            body_start = offset + self._header.size
+            if body_start + length > len(buf):
+                # Partially written page, ie from a crash
+                return
+            yield body_start, length
+            offset = body_start + length
+
+    def _add_entries(self, entries: List[Tuple[str, float, int, int]]):
+        for thread_id, updated_at, offset, length in entries:
+            previous = self._latest.get(thread_id)
+            if previous is not None:
+                if previous[0] > updated_at:
+                    continue
+                i = bisect.bisect_left(self._by_time, (previous[0], thread_id))
+                del self._by_time[i]
+            self._latest[thread_id] = (updated_at, offset, length)
+            bisect.insort(self._by_time, (updated_at, thread_id))
+
+    def _write_index(self, entries: List[Tuple[str, float, int, int]], end: int):
+        """
+        Appends entries of a page to the index, followed by the number
+        of pages and length of data indexed so far.
+        """
+        self._index.writelines("{}\t{}\t{}\t{}\n".format(*entry) for entry in entries)
+        self._index.write("#\t{}\t{}\n".format(self._pages, end))
+        self._index.flush()
+
+    def _load_index(self):
+        entries = []
+        pending = []
+        indexed = None
+        line = "\n"
+        with open(self.index_path) as f:
+            for line in f:
+                parts = line.rstrip("\n").split("\t")
+                if len(parts) == 3 and parts[0] == "#":
+                    entries.extend(pending)
+                    pending = []
+                    self._pages = int(parts[1])
+                    indexed = int(parts[2])
+                elif len(parts) == 4:
+                    thread_id, updated_at, offset, length = parts
+                    pending.append(
+                        (thread_id, float(updated_at), int(offset), int(length))
+                    )
+                # Otherwise a partially written line, ie from a crash
+        if indexed is None:
+            # Index from before lengths were recorded
+            self._rebuild_index()
+            return
+        # Entries after the last recorded length are indexed again below
+        self._add_entries(entries)
+        self._index = open(self.index_path, "a")
+        if not line.endswith("\n"):
+            # Finish partially written line, so it's skipped on next open
+            self._index.write("\n")
+        self._index_tail(indexed)
+
+    def _rebuild_index(self):
+        self._pages = 0
+        self._index = open(self.index_path, "w")
+        self._index_tail(0)
+
+    def _index_tail(self, start: int):
+        """
+        Indexes pages of data file from `start`, dropping any partially
+        written page at the end, so the next one is appended after the
+        last complete page.
+        """
+        end = start
+        for offset, length in self._page_ranges(start):
+            page = self._view()[offset : offset + length]  # noqa
+            entries = _index_page(page, offset)
+            self._pages += 1
+            end = offset + length
+            self._write_index(entries, end)
+            self._add_entries(entries)
+        if os.path.getsize(self.path) > end:
+            if self._map is not None:
+                try:
+                    self._map.close()
+                except BufferError:
+                    pass
+                self._map = None
+            self._data.truncate(end)
+
+
+def _index_page(body, start: int) -> List[Tuple[str, float, int, int]]:
+    """
+    Finds the byte range of each notification in a raw page.
+
+    :param body: raw page, a JSON array of notifications
+    :type body: Union[bytes, memoryview]
+    :param start: offset of page in data file
+    :type start: int
+    :return: List[Tuple[str, float, int, int]] of thread id, updated
+             at timestamp, offset and length of each notification
+    """
+    text = str(body, "utf-8")
+    decoder = json.JSONDecoder()
+    res = []
+    i = _skip(text, 0)
+    if text[i : i + 1] != "[":  # noqa
+        return res
+    i = _skip(text, i + 1)
+    # Offsets are tracked in bytes, since titles may not be ASCII
+    byte_pos = len(text[:i].encode("utf-8"))
+    while i < len(text) and text[i] != "]":
+        obj, end = decoder.raw_decode(text, i)
+        length = len(text[i:end].encode("utf-8"))
+        thread_id = str(obj.get("id", ""))
+        if thread_id:
+            updated_at = timestamp(_parse_time(obj.get("updated_at")))
+            res.append((thread_id, updated_at, start + byte_pos, length))
+        j = _skip(text, end)
+        if text[j : j + 1] == ",":  # noqa
+            j = _skip(text, j + 1)
+        byte_pos += length + len(text[end:j].encode("utf-8"))
+        i = j
+    return res
+
+
+def _skip(text: str, i: int) -> int:
+    while i < len(text) and text[i] in " \t\r\n":
+        i += 1
+    return i
+
+
+def _parse_time(value: Optional[str]) -> Optional[datetime.datetime]:
+    if not value:
+        return None
+    return datetime.datetime.fromisoformat(value.replace("Z", "+00:00"))
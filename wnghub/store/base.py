@@ -0,0 +1,285 @@
+import datetime
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterator, List, Optional
+
+from wnghub.model.notification import Notification
+
+
+@dataclass
+class DailyCount:
+    """
+    Number of stored notifications updated on a day (UTC), for a
+    repository and reason, and how many of those were last updated on
+    that day and are still unread. A notification updated on several
+    days is counted on each of them.
+    """
+
+    day: str
+    org: str
+    repository: str
+    reason: str
+    n: int
+    unread: int
+
+
+@dataclass
+class ReadLatency:
+    """
+    Notifications seen going from unread to read on a day (UTC), and
+    how long after their last update that was, in seconds.
+    """
+
+    day: str
+    n: int
+    total_seconds: float
+    max_seconds: float
+
+
+class BaseNotificationStore(ABC):
+    """
+    Base class for local storage of notifications. Allows
+    notifications to be searched and displayed without
+    hitting Github's API.
+
+    Listeners can be registered to be called with the notifications
+    that were new or changed each time notifications are saved.
+    """
+
+    def __init__(self):
+        self._listeners: List[Callable[[List[Notification]], None]] = []
+
+    def add_listener(self, listener: Callable[[List[Notification]], None]):
+        """
+        Registers function to call with new or changed notifications
+        after every save.
+
+        :param listener: function to call
+        :type listener: Callable[[List[Notification]], None]
+        """
+        self._listeners.append(listener)
+
+    def save(self, notifications: List[Notification]) -> List[Notification]:
+        """
+        Inserts new notifications and updates changed ones.
+
+        :param notifications: notifications to save
+        :type notifications: List[Notification]
+        :return: List[Notification] that were new or changed
+        """
+        delta = self._save(notifications)
+        if delta:
+            for listener in self._listeners:
+                listener(delta)
+        return delta
+
+    @abstractmethod
+    def _save(self, notifications: List[Notification]) -> List[Notification]:
+        pass
+
+    @abstractmethod
+    def notifications(self, limit: Optional[int] = None) -> List[Notification]:
+        """
+        Gets stored notifications, most recently updated first.
+
+        :param limit: max number of notifications to return
+        :type limit: Optional[int]
+        :return: List[Notification]
+        """
+        pass
+
+    def unread_notifications(self) -> List[Notification]:
+        """
+        Gets stored notifications that are unread, most recently
+        updated first. By default, goes through every stored
+        notification.
+
+        :return: List[Notification]
+        """
+        return [n for n in self.notifications() if n.unread]
+
+    def record_batches(self, batch_size: int = 10000) -> Iterator[List[tuple]]:
+        """
+        Gets every stored notification as records (see
+        `Notification.to_record`), in batches, without loading them all
+        at once. By default, loads every notification first.
+
+        :param batch_size: max records per batch
+        :type batch_size: int
+        :return: Iterator[List[tuple]]
+        """
+        notifications = self.notifications()
+        for i in range(0, len(notifications), batch_size):
+            yield [n.to_record() for n in notifications[i : i + batch_size]]  # noqa
+
+    @abstractmethod
+    def search(self, query: str, limit: int = 20) -> List[Notification]:
+        """
+        Full text search over stored notifications.
+
+        :param query: search query
+        :type query: str
+        :param limit: max number of notifications to return
+        :type limit: int
+        :return: List[Notification]
+        """
+        pass
+
+    @abstractmethod
+    def count(self) -> int:
+        pass
+
+    @abstractmethod
+    def delete(self, thread_ids: List[str]) -> int:
+        """
+        Deletes stored notifications. Unknown thread ids are ignored.
+
+        :param thread_ids: thread ids of notifications to delete
+        :type thread_ids: List[str]
+        :return: int number of notifications deleted
+        """
+        pass
+
+    def by_html_url(self, html_urls: List[str]) -> Dict[str, List[Notification]]:
+        """
+        Gets stored notifications by the URL of their issue or pull
+        request. By default, goes through every stored notification.
+
+        :param html_urls: URLs to look up
+        :type html_urls: List[str]
+        :return: Dict[str, List[Notification]], by URL, most recently
+                 updated first
+        """
+        wanted = set(html_urls)
+        res: Dict[str, List[Notification]] = {}
+        for n in self.notifications():
+            if n.html_url in wanted:
+                res.setdefault(n.html_url, []).append(n)
+        return res
+
+    def with_thread_id_prefix(self, prefix: str) -> List[Notification]:
+        """
+        Gets stored notifications whose thread id starts with prefix.
+        By default, goes through every stored notification.
+
+        :param prefix: start of thread ids
+        :type prefix: str
+        :return: List[Notification]
+        """
+        return [n for n in self.notifications() if n.thread_id.startswith(prefix)]
+
+    def unread_counts(self) -> Dict[str, int]:
+        """
+        Counts unread notifications, in total (`unread`), by reason
+        (`reason:<reason>`) and by type (`type:<type>`). By default,
+        goes through every stored notification.
+
+        :return: Dict[str, int]
+        """
+        res: Dict[str, int] = {}
+        for n in self.notifications():
+            if n.unread:
+                for key in ("unread", "reason:" + n.reason, "type:" + n.type):
+                    res[key] = res.get(key, 0) + 1
+        return res
+
+    def daily_counts(
+        self,
+        since: Optional[datetime.date] = None,
+        before: Optional[datetime.date] = None,
+        reason: Optional[str] = None,
+    ) -> List[DailyCount]:
+        """
+        Counts notifications by day they were updated on, repository and
+        reason (see `DailyCount`). By default, goes through every stored
+        notification, so only counts them on the day of their last update.
+
+        :param since: first day to count
+        :type since: Optional[datetime.date]
+        :param before: day after the last day to count
+        :type before: Optional[datetime.date]
+        :param reason: only count notifications with this reason
+        :type reason: Optional[str]
+        :return: List[DailyCount], ordered by day
+        """
+        counts: Dict[tuple, DailyCount] = {}
+        for n in self.notifications():
+            if not isinstance(n.updated_at, datetime.datetime):
+                continue
+            updated_at = n.updated_at
+            if updated_at.tzinfo is not None:
+                updated_at = updated_at.astimezone(datetime.timezone.utc)
+            day = updated_at.date()
+            if (since is not None and day < since) or (
+                before is not None and day >= before
+            ):
+                continue
+            if reason is not None and n.reason != reason:
+                continue
+            key = (day.isoformat(), n.org, n.repository, n.reason)
+            count = counts.get(key)
+            if count is None:
+                count = counts[key] = DailyCount(*key, n=0, unread=0)
+            count.n += 1
+            count.unread += int(n.unread)
+        return sorted(counts.values(), key=lambda c: c.day)
+
+    def review_requested_at(self) -> List[datetime.datetime]:
+        """
+        Gets when unread review requests were made, oldest first: the
+        time of the update that requested the review, not of the last
+        update. By default, goes through every stored notification, so
+        uses the time of their last update.
+
+        :return: List[datetime.datetime]
+        """
+        return sorted(
+            n.updated_at
+            for n in self.unread_notifications()
+            if n.reason == "review_requested"
+            and isinstance(n.updated_at, datetime.datetime)
+        )
+
+    def read_latencies(
+        self,
+        since: Optional[datetime.date] = None,
+        before: Optional[datetime.date] = None,
+    ) -> List[ReadLatency]:
+        """
+        Gets how long notifications stayed unread, by day they were read.
+        By default, not tracked.
+
+        :param since: first day to include
+        :type since: Optional[datetime.date]
+        :param before: day after the last day to include
+        :type before: Optional[datetime.date]
+        :return: List[ReadLatency], ordered by day
+        """
+        return []
+
+    @abstractmethod
+    def synced_at(self, key: str = "synced_at") -> Optional[datetime.datetime]:
+        """
+        Gets when notifications were last successfully fetched
+        from Github, or None if they never were.
+
+        :param key: name of the watermark, for fetches that track their
+                    own, ie webhook reconciliation polls
+        :type key: str
+        :return: Optional[datetime.datetime]
+        """
+        pass
+
+    @abstractmethod
+    def mark_synced(
+        self, at: Optional[datetime.datetime] = None, key: str = "synced_at"
+    ):
+        """
+        Records a successful fetch from Github.
+
+        :param at: time of fetch, by default now
+        :type at: Optional[datetime.datetime]
+        :param key: name of the watermark
+        :type key: str
+        """
+        pass
@@ -0,0 +1,305 @@
+"""
+Exports and imports notification history as columnar Apache Parquet
+or Arrow IPC files, for analysis in other tools, ie a data warehouse.
+
+Notifications are streamed in record batches, so memory use depends
+on the batch size rather than the size of the history. Repository,
+org, reason and type are dictionary encoded, since they have few
+distinct values.
+
+Needs `pyarrow`, ie `pip install wnghub[arrow]`.
+"""
+import datetime
+from typing import Iterable, Iterator, List, Optional
+
+from wnghub.model.notification import Notification
+from wnghub.store.base import BaseNotificationStore
+
+try:
+    import pyarrow
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:  # pragma: no cover - optional dependency
+    pyarrow = None
+
+
+"""
+Formats that can be written, by file extension.
+"""
+PARQUET = "parquet"
+
+ARROW = "arrow"
+
+FORMATS = {
+    ".parquet": PARQUET,
+    ".pq": PARQUET,
+    ".arrow": ARROW,
+    ".feather": ARROW,
+    ".ipc": ARROW,
+}
+
+"""
+Columns that are dictionary encoded.
+"""
+DICTIONARY_FIELDS = {"repository", "org", "reason", "type"}
+
+_bool_fields = {"is_pull", "is_issue", "unread"}
+
+
+def schema():
+    """
+    Arrow schema of exported files, with a column per
+    `Notification.record_fields`.
+
+    :return: pyarrow.Schema
+    """
+    _require_pyarrow()
+    fields = []
+    for name in Notification.record_fields:
+        if name in DICTIONARY_FIELDS:
+            type_ = pyarrow.dictionary(pyarrow.int32(), pyarrow.string())
+        elif name in _bool_fields:
+            type_ = pyarrow.bool_()
+        elif name == "updated_at":
+            type_ = pyarrow.timestamp("us", tz="UTC")
+        else:
+            type_ = pyarrow.string()
+        fields.append(pyarrow.field(name, type_))
+    return pyarrow.schema(fields)
+
+
+def format_for(path: str, fmt: Optional[str] = None) -> str:
+    """
+    Gets format to use for a file, from its extension unless given.
+
+    :param path: path of file
+    :type path: str
+    :param fmt: `PARQUET` or `ARROW`, to override extension
+    :type fmt: Optional[str]
+    :return: str
+    """
+    if fmt is not None:
+        if fmt not in (PARQUET, ARROW):
+            raise ColumnarFormatError("Unknown format: {}".format(fmt))
+        return fmt
+    for extension, res in FORMATS.items():
+        if str(path).endswith(extension):
+            return res
+    raise ColumnarFormatError(
+        "Can't tell format of {}. Use one of: {}".format(path, list(FORMATS))
+    )
+
+
+def export(
+    store: BaseNotificationStore,
+    path: str,
+    fmt: Optional[str] = None,
+    batch_size: int = 10000,
+) -> int:
+    """
+    Writes every stored notification to a Parquet or Arrow file.
+
+    :param store: store to export
+    :type store: BaseNotificationStore
+    :param path: path of file to write
+    :type path: str
+    :param fmt: `PARQUET` or `ARROW`. By default, from extension of path
+    :type fmt: Optional[str]
+    :param batch_size: notifications per record batch (and row group)
+    :type batch_size: int
+    :return: int number of notifications written
+    """
+    return export_records(store.record_batches(batch_size), path, fmt=fmt)
+
+
+def export_records(
+    batches: Iterable[List[tuple]], path: str, fmt: Optional[str] = None
+) -> int:
+    """
+    Writes batches of notification records (see `Notification.to_record`)
+    to a Parquet or Arrow file, ie streamed from Github rather than the
+    store. Each batch is written as a record batch (and row group).
+
+    :param batches: batches of records
+    :type batches: Iterable[List[tuple]]
+    :param path: path of file to write
+    :type path: str
+    :param fmt: `PARQUET` or `ARROW`. By default, from extension of path
+    :type fmt: Optional[str]
+    :return: int number of notifications written
+    """
+    fmt = format_for(path, fmt)
+    arrow_schema = schema()
+    if fmt == PARQUET:
+        writer = pyarrow.parquet.ParquetWriter(str(path), arrow_schema)
+    else:
+        # Dictionaries only grow, so later batches just add to them
+        options = pyarrow.ipc.IpcWriteOptions(emit_dictionary_deltas=True)
+        writer = pyarrow.ipc.new_file(str(path), arrow_schema, options=options)
+    dictionaries = {name: _Dictionary() for name in DICTIONARY_FIELDS}
+    written = 0
+    try:
+        for records in batches:
+            if not records:
+                continue
+            batch = to_record_batch(records, arrow_schema, dictionaries)
+            if fmt == PARQUET:
+                writer.write_table(pyarrow.Table.from_batches([batch]))
+            else:
+                writer.write_batch(batch)
+            written += len(records)
+    finally:
+        writer.close()
+    return written
+
+
+def load(
+    store: BaseNotificationStore,
+    path: str,
+    fmt: Optional[str] = None,
+    batch_size: int = 10000,
+) -> int:
+    """
+    Saves notifications from a Parquet or Arrow file to the store.
+
+    :param store: store to save notifications to
+    :type store: BaseNotificationStore
+    :param path: path of file to read
+    :type path: str
+    :param fmt: `PARQUET` or `ARROW`. By default, from extension of path
+    :type fmt: Optional[str]
+    :param batch_size: max notifications to hold at once
+    :type batch_size: int
+    :return: int number of notifications new or changed
+    """
+    changed = 0
+    for records in read_record_batches(path, fmt=fmt, batch_size=batch_size):
+        changed += len(store.save([Notification.from_record(r) for r in records]))
+    return changed
+
+
+def read_record_batches(
+    path: str, fmt: Optional[str] = None, batch_size: int = 10000
+) -> Iterator[List[tuple]]:
+    """
+    Reads notification records (see `Notification.from_record`) from
+    a Parquet or Arrow file, in batches. Columns missing from the file
+    get the defaults of `Notification`, and extra columns are ignored.
+
+    :return: Iterator[List[tuple]]
+    """
+    fmt = format_for(path, fmt)
+    _require_pyarrow()
+    if fmt == PARQUET:
+        batches = pyarrow.parquet.ParquetFile(str(path)).iter_batches(batch_size)
+        for batch in batches:
+            yield from_record_batch(batch)
+        return
+    with pyarrow.memory_map(str(path)) as source:
+        reader = pyarrow.ipc.open_file(source)
+        for i in range(reader.num_record_batches):
+            batch = reader.get_batch(i)
+            for offset in range(0, batch.num_rows, batch_size):
+                yield from_record_batch(batch.slice(offset, batch_size))
+
+
+def to_record_batch(records: List[tuple], arrow_schema=None, dictionaries=None):
+    """
+    Converts notification records into an Arrow record batch.
+
+    :param records: records ordered by `Notification.record_fields`
+    :type records: List[tuple]
+    :param arrow_schema: schema to use, by default `schema()`
+    :type arrow_schema: Optional[pyarrow.Schema]
+    :param dictionaries: dictionaries of previous batches of the same
+                         file, by field name. Updated with new values
+    :type dictionaries: Optional[Dict[str, _Dictionary]]
+    :return: pyarrow.RecordBatch
+    """
+    if arrow_schema is None:
+        arrow_schema = schema()
+    if dictionaries is None:
+        dictionaries = {name: _Dictionary() for name in DICTIONARY_FIELDS}
+    columns = list(zip(*records)) or [()] * len(Notification.record_fields)
+    arrays = []
+    for field, values in zip(arrow_schema, columns):
+        if field.name == "updated_at":
+            values = [_utc(v) for v in values]
+        if field.name in dictionaries:
+            array = dictionaries[field.name].encode(values)
+        else:
+            array = pyarrow.array(values, field.type)
+        arrays.append(array)
+    return pyarrow.RecordBatch.from_arrays(arrays, schema=arrow_schema)
+
+
+def from_record_batch(batch) -> List[tuple]:
+    """
+    Converts Arrow record batch into notification records.
+
+    :param batch: the record batch
+    :type batch: pyarrow.RecordBatch
+    :return: List[tuple]
+    """
+    defaults = Notification()
+    names = set(batch.schema.names)
+    columns = []
+    for name in Notification.record_fields:
+        if name in names:
+            values = batch.column(batch.schema.get_field_index(name)).to_pylist()
+            if name == "updated_at":
+                values = [_utc(v) for v in values]
+            columns.append(values)
+        else:
+            columns.append([getattr(defaults, name)] * batch.num_rows)
+    return list(zip(*columns))
+
+
+class _Dictionary(object):
+    """
+    Dictionary of a column that is shared by every batch of a file,
+    and only ever appended to.
+    """
+
+    def __init__(self):
+        self.indices = {}
+        self.values = []
+
+    def encode(self, values) -> "pyarrow.DictionaryArray":
+        indices = self.indices
+        encoded = []
+        for value in values:
+            index = indices.get(value)
+            if index is None:
+                index = indices[value] = len(self.values)
+                self.values.append(value)
+            encoded.append(index)
+        return pyarrow.DictionaryArray.from_arrays(
+            pyarrow.array(encoded, pyarrow.int32()),
+            pyarrow.array(self.values, pyarrow.string()),
+        )
+
+
+def _utc(value) -> Optional[datetime.datetime]:
+    # Stores use `datetime.min` for missing timestamps
+    if not isinstance(value, datetime.datetime) or value.year == datetime.MINYEAR:
+        return None
+    if value.tzinfo is None:
+        return value.replace(tzinfo=datetime.timezone.utc)
+    return value
+
+
+def _require_pyarrow():
+    if pyarrow is None:
+        raise ColumnarUnavailableError(
+            "pyarrow is needed for Parquet and Arrow files. "
+            "Install it with `pip install wnghub[arrow]`."
+        )
+
+
+class ColumnarFormatError(Exception):
+    pass
+
+
+class ColumnarUnavailableError(Exception):
+    pass
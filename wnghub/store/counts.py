@@ -0,0 +1,126 @@
+"""
+Tiny state file with counts of unread notifications, for shell
+prompts and status bars. Only uses the standard library, so reading
+it (see `read_counts`) doesn't import the rest of wnghub.
+
+The file has one `<key> <count>` line per counter, where keys are
+`unread`, `reason:<reason>` and `type:<type>`, ie:
+
+    unread 12
+    reason:review_requested 3
+    type:PR 7
+"""
+import os
+from typing import Dict, List, Optional
+
+DEFAULT_COUNTS_PATH = "~/wnghub.counts"
+
+"""
+Environment variable overriding where the counts file is.
+"""
+COUNTS_PATH_ENV = "WNGHUB_COUNTS"
+
+DEFAULT_FORMAT = "{unread} unread, {review_requested} review requests"
+
+
+def counts_path(path: Optional[str] = None) -> str:
+    """
+    Resolves path of counts file.
+
+    :param path: explicit path, by default from `COUNTS_PATH_ENV`
+                 or `DEFAULT_COUNTS_PATH`
+    :type path: Optional[str]
+    :return: str
+    """
+    return os.path.expanduser(
+        path or os.environ.get(COUNTS_PATH_ENV) or DEFAULT_COUNTS_PATH
+    )
+
+
+def write_counts(counts: Dict[str, int], path: Optional[str] = None):
+    """
+    Replaces counts file with given counts.
+
+    :param counts: counts keyed by `unread`, `reason:<reason>`, `type:<type>`
+    :type counts: Dict[str, int]
+    :param path: path of counts file
+    :type path: Optional[str]
+    """
+    path = counts_path(path)
+    tmp = "{}.{}.tmp".format(path, os.getpid())
+    with open(tmp, "w") as f:
+        f.write("".join("{} {}\n".format(k, n) for k, n in counts.items() if n))
+    os.replace(tmp, path)
+
+
+def read_counts(path: Optional[str] = None) -> Optional[Dict[str, int]]:
+    """
+    Reads counts file.
+
+    :param path: path of counts file
+    :type path: Optional[str]
+    :return: Optional[Dict[str, int]], None if there is no counts file
+    """
+    try:
+        with open(counts_path(path)) as f:
+            lines = f.read().splitlines()
+    except FileNotFoundError:
+        return None
+    res = {}
+    for line in lines:
+        key, _, n = line.rpartition(" ")
+        if key:
+            res[key] = int(n)
+    return res
+
+
+def format_counts(counts: Dict[str, int], fmt: str = DEFAULT_FORMAT) -> str:
+    """
+    Formats counts with a `str.format` template. Reasons and types
+    can be used by name, ie `{review_requested}` or `{PR}`, or by
+    key with ":" replaced by "_", ie `{reason_mention}`. Missing
+    counts are 0.
+
+    :param counts: counts read from counts file
+    :type counts: Dict[str, int]
+    :param fmt: the template
+    :type fmt: str
+    :return: str
+    """
+    values = _Counts()
+    for key, n in counts.items():
+        values[key.replace(":", "_")] = n
+        values.setdefault(key.split(":", 1)[-1], n)
+    return fmt.format_map(values)
+
+
+def try_count(argv: List[str], stdout) -> bool:
+    """
+    Answers `wnghub count [--format FMT]` straight from the counts
+    file, if it exists.
+
+    :param argv: args after the program name
+    :type argv: List[str]
+    :param stdout: stream to write output to
+    :return: bool whether it was answered
+    """
+    if not argv or argv[0] != "count":
+        return False
+    fmt = DEFAULT_FORMAT
+    args = argv[1:]
+    if len(args) == 2 and args[0] in ("-f", "--format"):
+        fmt = args[1]
+    elif len(args) == 1 and args[0].startswith("--format="):
+        fmt = args[0][len("--format=") :]  # noqa
+    elif args:
+        return False
+    counts = read_counts()
+    if counts is None:
+        return False
+    stdout.write(format_counts(counts, fmt) + "\n")
+    return True
+
+
+class _Counts(dict):
+    def __missing__(self, key):
+        return 0
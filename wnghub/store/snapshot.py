@@ -0,0 +1,371 @@
+"""
+Compact, versioned binary snapshots of notifications.
+
+A snapshot starts with `MAGIC` and a one byte format version,
+followed by a zlib compressed body holding:
+
+    - the fields in the snapshot, as (name, codec) pairs
+    - a string table, shared by every field with the "t" or "u" codec
+    - the number of notifications
+    - one column per field, in the same order as the fields
+
+Values are stored column by column so each column can be decoded
+in bulk. Fields are looked up by name when loading, so snapshots
+written before a field was added to `Notification` still load (the
+field gets its default), and fields that no longer exist are skipped.
+"""
+import dataclasses
+import datetime
+import sys
+import zlib
+from array import array
+from itertools import accumulate, repeat
+from typing import BinaryIO, Callable, Dict, List, Optional, Tuple
+
+from wnghub.model.notification import Notification
+
+MAGIC = b"WNGHSNAP"
+
+FORMAT_VERSION = 1
+
+"""
+How each field is encoded. Fields not listed are strings.
+
+    s: strings, as a column of lengths followed by their UTF-8 text
+    t: indexes into the string table
+    u: urls, with everything up to the last "/" in the string table
+    a: abbreviated titles, left out if they can be derived from the title
+    d: timestamps, as zigzag varint deltas from the previous one
+    b: booleans, packed into one fixed-width flags column
+"""
+_field_codecs = {
+    "abbrev_title": "a",
+    "repository": "t",
+    "org": "t",
+    "reason": "t",
+    "type": "t",
+    "html_url": "u",
+    "updated_at": "d",
+    "is_pull": "b",
+    "is_issue": "b",
+    "unread": "b",
+}
+
+_compression_level = 6
+
+"""
+Length stored for abbreviated titles that can be derived from the title.
+"""
+_derived = 0xFFFFFFFF
+
+_epoch = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+
+"""
+Stand-in for `Notification.updated_at`'s default, which isn't a datetime.
+"""
+_min_seconds = -(2**62)
+
+
+def dump(notifications: List[Notification], f: BinaryIO):
+    """
+    Writes snapshot of notifications to binary file.
+
+    :param notifications: notifications to write
+    :type notifications: List[Notification]
+    :param f: file to write to
+    :type f: BinaryIO
+    """
+    f.write(dumps(notifications))
+
+
+def dumps(notifications: List[Notification]) -> bytes:
+    """
+    Creates snapshot of notifications.
+
+    :param notifications: notifications to snapshot
+    :type notifications: List[Notification]
+    :return: bytes
+    """
+    fields = [
+        (name, _field_codecs.get(name, "s")) for name in Notification.record_fields
+    ]
+    flags = [name for name, codec in fields if codec == "b"]
+    table: Dict[str, int] = {}
+    columns = bytearray()
+    for name, codec in fields:
+        if codec == "b":
+            # Every boolean field shares the first one's column
+            if name == flags[0]:
+                _write_flags(columns, notifications, flags)
+            continue
+        values = [getattr(n, name) for n in notifications]
+        if codec == "a":
+            abbrev_len = Notification._abbrev_title_len
+            derived = [(n.title or "")[0:abbrev_len] + "..." for n in notifications]
+            _write_strs(columns, values, derived)
+        elif codec == "t":
+            _write_ints(columns, [_intern(table, v or "") for v in values])
+        elif codec == "u":
+            prefixes = []
+            suffixes = []
+            for v in values:
+                v = v or ""
+                split = v.rfind("/") + 1
+                prefixes.append(_intern(table, v[:split]))
+                suffixes.append(v[split:])
+            _write_ints(columns, prefixes)
+            _write_strs(columns, suffixes)
+        elif codec == "d":
+            _write_deltas(columns, [_seconds(v) for v in values])
+        else:
+            _write_strs(columns, values)
+
+    body = bytearray()
+    _write_varint(body, len(fields))
+    for name, codec in fields:
+        _write_str(body, name)
+        body += codec.encode("ascii")
+    _write_varint(body, len(table))
+    for s in table:
+        _write_str(body, s)
+    _write_varint(body, len(notifications))
+    body += columns
+    return MAGIC + bytes([FORMAT_VERSION]) + zlib.compress(body, _compression_level)
+
+
+def load(f: BinaryIO) -> List[Notification]:
+    """
+    Reads snapshot of notifications from binary file.
+
+    :param f: file to read from
+    :type f: BinaryIO
+    :return: List[Notification]
+    :raises SnapshotFormatError: if file isn't a snapshot this version can read
+    """
+    return loads(f.read())
+
+
+def loads(data: bytes) -> List[Notification]:
+    """
+    Loads notifications from snapshot.
+
+    :param data: the snapshot
+    :type data: bytes
+    :return: List[Notification]
+    :raises SnapshotFormatError: if data isn't a snapshot this version can read
+    """
+    if not data.startswith(MAGIC) or len(data) <= len(MAGIC):
+        raise SnapshotFormatError("Not a notifications snapshot.")
+    version = data[len(MAGIC)]
+    reader = _readers.get(version)
+    if reader is None:
+        raise SnapshotFormatError(
+            "Unsupported snapshot version {}. Supported versions: {}".format(
+                version, sorted(_readers)
+            )
+        )
+    try:
+        return reader(zlib.decompress(data[len(MAGIC) + 1 :]))  # noqa
+    except (zlib.error, IndexError, KeyError, ValueError) as e:
+        raise SnapshotFormatError("Corrupt snapshot: {}".format(e))
+
+
+def _load_v1(body: bytes) -> List[Notification]:
+    pos = 0
+    num_fields, pos = _read_varint(body, pos)
+    fields = []
+    for _ in range(num_fields):
+        name, pos = _read_str(body, pos)
+        fields.append((name, chr(body[pos])))
+        pos += 1
+    num_strings, pos = _read_varint(body, pos)
+    table = []
+    for _ in range(num_strings):
+        s, pos = _read_str(body, pos)
+        table.append(s)
+    count, pos = _read_varint(body, pos)
+
+    flags = [name for name, codec in fields if codec == "b"]
+    columns: Dict[str, list] = {}
+    for name, codec in fields:
+        if codec == "b":
+            if name == flags[0]:
+                bits, pos = _read_ints(body, pos, count, _flags_typecode(flags))
+                for i, flag in enumerate(flags):
+                    columns[flag] = [bool(b >> i & 1) for b in bits]
+        elif codec == "a":
+            columns[name], pos = _read_strs(body, pos, count)
+        elif codec == "t":
+            indexes, pos = _read_ints(body, pos, count)
+            columns[name] = [table[i] for i in indexes]
+        elif codec == "u":
+            indexes, pos = _read_ints(body, pos, count)
+            suffixes, pos = _read_strs(body, pos, count)
+            columns[name] = [table[i] + s for i, s in zip(indexes, suffixes)]
+        elif codec == "d":
+            seconds, pos = _read_deltas(body, pos, count)
+            columns[name] = [_datetime(s) for s in seconds]
+        else:
+            columns[name], pos = _read_strs(body, pos, count)
+
+    abbrevs = columns.get("abbrev_title")
+    titles = columns.get("title", [""] * count)
+    if abbrevs is not None:
+        abbrev_len = Notification._abbrev_title_len
+        for i, abbrev in enumerate(abbrevs):
+            if abbrev is None:
+                abbrevs[i] = titles[i][0:abbrev_len] + "..."
+
+    # Passing fields positionally is much faster than by keyword
+    args = []
+    for field in dataclasses.fields(Notification):
+        column = columns.get(field.name)
+        args.append(column if column is not None else repeat(field.default, count))
+    return [Notification(*row) for row in zip(*args)]
+
+
+_readers: Dict[int, Callable[[bytes], List[Notification]]] = {1: _load_v1}
+
+
+def _write_varint(out: bytearray, n: int):
+    while n > 0x7F:
+        out.append(n & 0x7F | 0x80)
+        n >>= 7
+    out.append(n)
+
+
+def _read_varint(data: bytes, pos: int) -> Tuple[int, int]:
+    res = 0
+    shift = 0
+    while True:
+        b = data[pos]
+        pos += 1
+        res |= (b & 0x7F) << shift
+        if b < 0x80:
+            return res, pos
+        shift += 7
+
+
+def _write_str(out: bytearray, s: str):
+    raw = s.encode("utf-8")
+    _write_varint(out, len(raw))
+    out += raw
+
+
+def _read_str(data: bytes, pos: int) -> Tuple[str, int]:
+    length, pos = _read_varint(data, pos)
+    end = pos + length
+    return data[pos:end].decode("utf-8"), end
+
+
+def _write_ints(out: bytearray, values: List[int], typecode: str = "I"):
+    """
+    Writes column of fixed-width unsigned ints, little endian.
+    """
+    column = array(typecode, values)
+    if sys.byteorder == "big":
+        column.byteswap()
+    out += column.tobytes()
+
+
+def _read_ints(
+    data: bytes, pos: int, count: int, typecode: str = "I"
+) -> Tuple[array, int]:
+    column = array(typecode)
+    end = pos + count * column.itemsize
+    if end > len(data):
+        raise IndexError("column out of range")
+    column.frombytes(data[pos:end])
+    if sys.byteorder == "big":
+        column.byteswap()
+    return column, end
+
+
+def _write_strs(out: bytearray, values: List[str], derived: Optional[List[str]] = None):
+    """
+    Writes column of strings as their lengths (in characters) followed
+    by all of their text, so the text is decoded in one go when read.
+    Strings equal to their `derived` value are left out.
+    """
+    values = [v or "" for v in values]
+    if derived is not None:
+        values = [None if v == d else v for v, d in zip(values, derived)]
+    _write_ints(out, [_derived if v is None else len(v) for v in values])
+    raw = "".join(v for v in values if v is not None).encode("utf-8")
+    _write_varint(out, len(raw))
+    out += raw
+
+
+def _read_strs(data: bytes, pos: int, count: int) -> Tuple[list, int]:
+    lengths, pos = _read_ints(data, pos, count)
+    size, pos = _read_varint(data, pos)
+    text = data[pos : pos + size].decode("utf-8")  # noqa
+    res = []
+    start = 0
+    for length in lengths:
+        if length == _derived:
+            res.append(None)
+            continue
+        end = start + length
+        res.append(text[start:end])
+        start = end
+    return res, pos + size
+
+
+def _write_deltas(out: bytearray, values: List[int]):
+    previous = 0
+    for v in values:
+        delta = v - previous
+        previous = v
+        _write_varint(out, delta << 1 if delta >= 0 else (-delta << 1) - 1)
+
+
+def _read_deltas(data: bytes, pos: int, count: int) -> Tuple[List[int], int]:
+    deltas = []
+    for _ in range(count):
+        z = data[pos]
+        pos += 1
+        if z >= 0x80:
+            z, pos = _read_varint(data, pos - 1)
+        deltas.append(-((z + 1) >> 1) if z & 1 else z >> 1)
+    return list(accumulate(deltas)), pos
+
+
+def _write_flags(out: bytearray, notifications: List[Notification], flags: List[str]):
+    bits = []
+    for n in notifications:
+        b = 0
+        for i, name in enumerate(flags):
+            if getattr(n, name):
+                b |= 1 << i
+        bits.append(b)
+    _write_ints(out, bits, _flags_typecode(flags))
+
+
+def _flags_typecode(flags: List[str]) -> str:
+    return "B" if len(flags) <= 8 else "Q"
+
+
+def _intern(table: Dict[str, int], s: str) -> int:
+    i = table.get(s)
+    if i is None:
+        i = table[s] = len(table)
+    return i
+
+
+def _seconds(value) -> int:
+    if not isinstance(value, datetime.datetime):
+        return _min_seconds
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=datetime.timezone.utc)
+    return int((value - _epoch).total_seconds())
+
+
+def _datetime(seconds: int):
+    if seconds == _min_seconds:
+        return datetime.MINYEAR
+    return _epoch + datetime.timedelta(seconds=seconds)
+
+
+class SnapshotFormatError(Exception):
+    pass
@@ -0,0 +1,728 @@
+import datetime
+import sqlite3
+import threading
+from typing import Dict, Iterator, List, Optional
+
+from wnghub.config.base import config_path
+from wnghub.model.notification import Notification
+from wnghub.store.base import BaseNotificationStore, DailyCount, ReadLatency
+
+
+class SqliteNotificationStore(BaseNotificationStore):
+    """
+    Implementation of `BaseNotificationStore` backed by SQLite.
+
+    Notifications are kept in a single table keyed by `thread_id`,
+    with an FTS5 index over title, repository, org and reason that
+    is kept up to date by triggers as notifications are saved.
+
+    :param path: location of database file. By default, `DEFAULT_STORE_PATH`
+    :type path: Optional[str]
+    """
+
+    DEFAULT_STORE_PATH = "~/wnghub.db"
+
+    """
+    Maps query prefixes (ie, `repo:airflow`) to indexed columns.
+    """
+    _search_columns = {
+        "title": "title",
+        "repo": "repository",
+        "repository": "repository",
+        "org": "org",
+        "reason": "reason",
+    }
+
+    _schema = [
+        """
+        CREATE TABLE IF NOT EXISTS notifications (
+            thread_id TEXT PRIMARY KEY,
+            title TEXT,
+            abbrev_title TEXT,
+            repository TEXT,
+            org TEXT,
+            html_url TEXT,
+            reason TEXT,
+            type TEXT,
+            is_pull INTEGER,
+            is_issue INTEGER,
+            updated_at TEXT,
+            unread INTEGER
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS meta (
+            key TEXT PRIMARY KEY,
+            value TEXT
+        )
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS notifications_updated_at
+        ON notifications (updated_at)
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS notifications_html_url
+        ON notifications (html_url)
+        """,
+        """
+        CREATE VIRTUAL TABLE IF NOT EXISTS notifications_fts USING fts5(
+            title, repository, org, reason,
+            content='notifications', content_rowid='rowid'
+        )
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS notifications_ai AFTER INSERT ON notifications
+        BEGIN
+            INSERT INTO notifications_fts (rowid, title, repository, org, reason)
+            VALUES (new.rowid, new.title, new.repository, new.org, new.reason);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS notifications_ad AFTER DELETE ON notifications
+        BEGIN
+            INSERT INTO notifications_fts
+                (notifications_fts, rowid, title, repository, org, reason)
+            VALUES ('delete', old.rowid, old.title, old.repository, old.org, old.reason);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS notifications_au AFTER UPDATE ON notifications
+        BEGIN
+            INSERT INTO notifications_fts
+                (notifications_fts, rowid, title, repository, org, reason)
+            VALUES ('delete', old.rowid, old.title, old.repository, old.org, old.reason);
+            INSERT INTO notifications_fts (rowid, title, repository, org, reason)
+            VALUES (new.rowid, new.title, new.repository, new.org, new.reason);
+        END
+        """,
+    ]
+
+    """
+    Unread counts (see `unread_counts`), kept up to date by triggers
+    so they can be read without scanning notifications. Created after
+    migrations, since they rely on the `unread` column.
+    """
+    _counts_schema = [
+        """
+        CREATE TABLE IF NOT EXISTS counts (
+            key TEXT PRIMARY KEY,
+            n INTEGER
+        )
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS counts_ai AFTER INSERT ON notifications
+        WHEN new.unread = 1
+        BEGIN
+            INSERT INTO counts (key, n)
+            VALUES
+                ('unread', 1),
+                ('reason:' || COALESCE(new.reason, ''), 1),
+                ('type:' || COALESCE(new.type, ''), 1)
+            ON CONFLICT (key) DO UPDATE SET n = n + 1;
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS counts_ad AFTER DELETE ON notifications
+        WHEN old.unread = 1
+        BEGIN
+            UPDATE counts SET n = n - 1
+            WHERE key IN (
+                'unread',
+                'reason:' || COALESCE(old.reason, ''),
+                'type:' || COALESCE(old.type, '')
+            );
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS counts_au_old AFTER UPDATE ON notifications
+        WHEN old.unread = 1
+        BEGIN
+            UPDATE counts SET n = n - 1
+            WHERE key IN (
+                'unread',
+                'reason:' || COALESCE(old.reason, ''),
+                'type:' || COALESCE(old.type, '')
+            );
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS counts_au_new AFTER UPDATE ON notifications
+        WHEN new.unread = 1
+        BEGIN
+            INSERT INTO counts (key, n)
+            VALUES
+                ('unread', 1),
+                ('reason:' || COALESCE(new.reason, ''), 1),
+                ('type:' || COALESCE(new.type, ''), 1)
+            ON CONFLICT (key) DO UPDATE SET n = n + 1;
+        END
+        """,
+    ]
+
+    """
+    Time bucketed aggregates (see `daily_counts` and `read_latencies`),
+    kept up to date by triggers so stats over long histories don't
+    scan notifications. Days are UTC, taken from `updated_at`.
+
+    Every (thread, day) a notification was updated on is recorded in
+    `activity`, so it is counted once on each of those days, not only
+    on the day of its last update. When review requests were made is
+    recorded in `review_requests` (see `review_requested_at`), since
+    later activity on them updates `updated_at` too.
+    """
+    _stats_schema = [
+        """
+        CREATE TABLE IF NOT EXISTS daily_counts (
+            day TEXT,
+            org TEXT,
+            repository TEXT,
+            reason TEXT,
+            n INTEGER,
+            unread INTEGER,
+            PRIMARY KEY (day, org, repository, reason)
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS activity (
+            thread_id TEXT,
+            day TEXT,
+            org TEXT,
+            repository TEXT,
+            reason TEXT,
+            PRIMARY KEY (thread_id, day)
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS review_requests (
+            thread_id TEXT PRIMARY KEY,
+            requested_at TEXT
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS read_latency (
+            day TEXT PRIMARY KEY,
+            n INTEGER,
+            total_seconds REAL,
+            max_seconds REAL
+        )
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS daily_activity_ai AFTER INSERT ON notifications
+        BEGIN
+            INSERT INTO daily_counts (day, org, repository, reason, n, unread)
+            VALUES (
+                COALESCE(date(new.updated_at), ''),
+                COALESCE(new.org, ''),
+                COALESCE(new.repository, ''),
+                COALESCE(new.reason, ''),
+                1,
+                new.unread = 1
+            )
+            ON CONFLICT (day, org, repository, reason) DO UPDATE
+            SET n = n + 1, unread = unread + excluded.unread;
+            INSERT INTO activity (thread_id, day, org, repository, reason)
+            SELECT
+                new.thread_id,
+                COALESCE(date(new.updated_at), ''),
+                COALESCE(new.org, ''),
+                COALESCE(new.repository, ''),
+                COALESCE(new.reason, '')
+            WHERE NOT EXISTS (
+                SELECT 1 FROM activity
+                WHERE thread_id = new.thread_id
+                    AND day = COALESCE(date(new.updated_at), '')
+            );
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS daily_activity_ad AFTER DELETE ON notifications
+        BEGIN
+            UPDATE daily_counts SET unread = unread - (old.unread = 1)
+            WHERE day = COALESCE(date(old.updated_at), '')
+                AND org = COALESCE(old.org, '')
+                AND repository = COALESCE(old.repository, '')
+                AND reason = COALESCE(old.reason, '');
+            UPDATE daily_counts SET n = n - 1
+            WHERE EXISTS (
+                SELECT 1 FROM activity
+                WHERE activity.thread_id = old.thread_id
+                    AND activity.day = daily_counts.day
+                    AND activity.org = daily_counts.org
+                    AND activity.repository = daily_counts.repository
+                    AND activity.reason = daily_counts.reason
+            );
+            DELETE FROM activity WHERE thread_id = old.thread_id;
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS daily_activity_au AFTER UPDATE ON notifications
+        BEGIN
+            UPDATE daily_counts SET unread = unread - (old.unread = 1)
+            WHERE day = COALESCE(date(old.updated_at), '')
+                AND org = COALESCE(old.org, '')
+                AND repository = COALESCE(old.repository, '')
+                AND reason = COALESCE(old.reason, '');
+            INSERT INTO daily_counts (day, org, repository, reason, n, unread)
+            SELECT
+                COALESCE(date(new.updated_at), ''),
+                COALESCE(new.org, ''),
+                COALESCE(new.repository, ''),
+                COALESCE(new.reason, ''),
+                NOT EXISTS (
+                    SELECT 1 FROM activity
+                    WHERE thread_id = new.thread_id
+                        AND day = COALESCE(date(new.updated_at), '')
+                ),
+                new.unread = 1
+            WHERE 1
+            ON CONFLICT (day, org, repository, reason) DO UPDATE
+            SET n = n + excluded.n, unread = unread + excluded.unread;
+            INSERT INTO activity (thread_id, day, org, repository, reason)
+            SELECT
+                new.thread_id,
+                COALESCE(date(new.updated_at), ''),
+                COALESCE(new.org, ''),
+                COALESCE(new.repository, ''),
+                COALESCE(new.reason, '')
+            WHERE NOT EXISTS (
+                SELECT 1 FROM activity
+                WHERE thread_id = new.thread_id
+                    AND day = COALESCE(date(new.updated_at), '')
+            );
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS review_requests_ai AFTER INSERT ON notifications
+        WHEN new.reason = 'review_requested' AND new.unread = 1
+        BEGIN
+            DELETE FROM review_requests WHERE thread_id = new.thread_id;
+            INSERT INTO review_requests (thread_id, requested_at)
+            VALUES (new.thread_id, new.updated_at);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS review_requests_au AFTER UPDATE ON notifications
+        BEGIN
+            DELETE FROM review_requests
+            WHERE thread_id = new.thread_id
+                AND (new.reason != 'review_requested' OR new.unread != 1);
+            INSERT INTO review_requests (thread_id, requested_at)
+            SELECT new.thread_id, new.updated_at
+            WHERE new.reason = 'review_requested' AND new.unread = 1
+                AND NOT EXISTS (
+                    SELECT 1 FROM review_requests WHERE thread_id = new.thread_id
+                );
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS review_requests_ad AFTER DELETE ON notifications
+        BEGIN
+            DELETE FROM review_requests WHERE thread_id = old.thread_id;
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS read_latency_au AFTER UPDATE ON notifications
+        WHEN old.unread = 1 AND new.unread = 0 AND old.updated_at > '1970'
+        BEGIN
+            INSERT INTO read_latency (day, n, total_seconds, max_seconds)
+            VALUES (
+                date('now'),
+                1,
+                MAX((julianday('now') - julianday(old.updated_at)) * 86400, 0),
+                MAX((julianday('now') - julianday(old.updated_at)) * 86400, 0)
+            )
+            ON CONFLICT (day) DO UPDATE SET
+                n = n + 1,
+                total_seconds = total_seconds + excluded.total_seconds,
+                max_seconds = MAX(max_seconds, excluded.max_seconds);
+        END
+        """,
+    ]
+
+    """
+    Triggers of older versions, replaced by the ones above.
+    """
+    _dropped_triggers = ["daily_counts_ai", "daily_counts_ad", "daily_counts_au"]
+
+    """
+    Columns added to `notifications` after it was first created,
+    with their definitions. Added to existing databases on open.
+    """
+    _added_columns = {"unread": "INTEGER DEFAULT 1"}
+
+    def __init__(self, path: Optional[str] = None):
+        if path is None:
+            path = self.DEFAULT_STORE_PATH
+        if path != ":memory:":
+            path = str(config_path(path))
+        self.path = path
+        BaseNotificationStore.__init__(self)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            for statement in self._schema:
+                self._conn.execute(statement)
+            self._migrate()
+            self._create_counts()
+            self._create_stats()
+
+    def _save(self, notifications: List[Notification]) -> List[Notification]:
+        if not notifications:
+            return []
+        columns = ", ".join(Notification.record_fields)
+        placeholders = ", ".join("?" for _ in Notification.record_fields)
+        updates = ", ".join(
+            "{0} = excluded.{0}".format(f) for f in Notification.record_fields[1:]
+        )
+        statement = (
+            "INSERT INTO notifications ({}) VALUES ({}) "
+            "ON CONFLICT (thread_id) DO UPDATE SET {}".format(
+                columns, placeholders, updates
+            )
+        )
+        with self._lock, self._conn:
+            existing = self._existing_records([n.thread_id for n in notifications])
+            delta = []
+            for n in notifications:
+                record = self._dump_record(n.to_record())
+                if existing.get(n.thread_id) != record:
+                    existing[n.thread_id] = record
+                    delta.append(n)
+            self._conn.executemany(
+                statement,
+                [self._dump_record(n.to_record()) for n in delta],
+            )
+        return delta
+
+    def notifications(self, limit: Optional[int] = None) -> List[Notification]:
+        statement = "SELECT {} FROM notifications ORDER BY updated_at DESC".format(
+            ", ".join(Notification.record_fields)
+        )
+        params = ()
+        if limit is not None:
+            statement += " LIMIT ?"
+            params = (limit,)
+        with self._lock:
+            rows = self._conn.execute(statement, params).fetchall()
+        return [Notification.from_record(self._load_record(r)) for r in rows]
+
+    def unread_notifications(self) -> List[Notification]:
+        statement = (
+            "SELECT {} FROM notifications WHERE unread = 1 "
+            "ORDER BY updated_at DESC".format(", ".join(Notification.record_fields))
+        )
+        with self._lock:
+            rows = self._conn.execute(statement).fetchall()
+        return [Notification.from_record(self._load_record(r)) for r in rows]
+
+    def record_batches(self, batch_size: int = 10000) -> Iterator[List[tuple]]:
+        # Pages through rowids, so the lock isn't held between batches
+        statement = (
+            "SELECT rowid, {} FROM notifications WHERE rowid > ? "
+            "ORDER BY rowid LIMIT ?".format(", ".join(Notification.record_fields))
+        )
+        last = -1
+        while True:
+            with self._lock:
+                rows = self._conn.execute(statement, (last, batch_size)).fetchall()
+            if not rows:
+                return
+            last = rows[-1][0]
+            yield [self._load_record(r[1:]) for r in rows]
+
+    def search(self, query: str, limit: int = 20) -> List[Notification]:
+        match = self._match_expression(query)
+        if match == "":
+            return []
+        statement = (
+            "SELECT {} FROM notifications_fts "
+            "JOIN notifications ON notifications.rowid = notifications_fts.rowid "
+            "WHERE notifications_fts MATCH ? "
+            "ORDER BY bm25(notifications_fts), notifications.updated_at DESC "
+            "LIMIT ?".format(
+                ", ".join(
+                    "notifications.{}".format(f) for f in Notification.record_fields
+                )
+            )
+        )
+        with self._lock:
+            rows = self._conn.execute(statement, (match, limit)).fetchall()
+        return [Notification.from_record(self._load_record(r)) for r in rows]
+
+    def count(self) -> int:
+        with self._lock:
+            row = self._conn.execute("SELECT COUNT(*) FROM notifications").fetchone()
+        return row[0]
+
+    def delete(self, thread_ids: List[str]) -> int:
+        deleted = 0
+        with self._lock, self._conn:
+            for i in range(0, len(thread_ids), 500):
+                chunk = thread_ids[i : i + 500]  # noqa
+                cursor = self._conn.execute(
+                    "DELETE FROM notifications WHERE thread_id IN ({})".format(
+                        ", ".join("?" for _ in chunk)
+                    ),
+                    chunk,
+                )
+                deleted += cursor.rowcount
+        return deleted
+
+    def by_html_url(self, html_urls: List[str]) -> Dict[str, List[Notification]]:
+        res: Dict[str, List[Notification]] = {}
+        columns = ", ".join(Notification.record_fields)
+        with self._lock:
+            for i in range(0, len(html_urls), 500):
+                chunk = html_urls[i : i + 500]  # noqa
+                statement = (
+                    "SELECT {} FROM notifications WHERE html_url IN ({}) "
+                    "ORDER BY updated_at DESC".format(
+                        columns, ", ".join("?" for _ in chunk)
+                    )
+                )
+                for row in self._conn.execute(statement, chunk):
+                    n = Notification.from_record(self._load_record(row))
+                    res.setdefault(n.html_url, []).append(n)
+        return res
+
+    def with_thread_id_prefix(self, prefix: str) -> List[Notification]:
+        if not prefix:
+            return self.notifications()
+        # Range over the primary key, unlike LIKE
+        end = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+        statement = "SELECT {} FROM notifications WHERE thread_id >= ? AND thread_id < ?".format(
+            ", ".join(Notification.record_fields)
+        )
+        with self._lock:
+            rows = self._conn.execute(statement, (prefix, end)).fetchall()
+        return [Notification.from_record(self._load_record(r)) for r in rows]
+
+    def unread_counts(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self._conn.execute("SELECT key, n FROM counts WHERE n > 0")
+            return dict(rows.fetchall())
+
+    def daily_counts(
+        self,
+        since: Optional[datetime.date] = None,
+        before: Optional[datetime.date] = None,
+        reason: Optional[str] = None,
+    ) -> List[DailyCount]:
+        statement = (
+            "SELECT day, org, repository, reason, n, unread FROM daily_counts "
+            "WHERE n > 0 AND day != ''"
+        )
+        params = []
+        for clause, value in (
+            (" AND day >= ?", since),
+            (" AND day < ?", before),
+        ):
+            if value is not None:
+                statement += clause
+                params.append(value.isoformat())
+        if reason is not None:
+            statement += " AND reason = ?"
+            params.append(reason)
+        with self._lock:
+            rows = self._conn.execute(statement + " ORDER BY day", params).fetchall()
+        return [DailyCount(*row) for row in rows]
+
+    def review_requested_at(self) -> List[datetime.datetime]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT requested_at FROM review_requests ORDER BY requested_at"
+            ).fetchall()
+        return [datetime.datetime.fromisoformat(row[0]) for row in rows if row[0]]
+
+    def read_latencies(
+        self,
+        since: Optional[datetime.date] = None,
+        before: Optional[datetime.date] = None,
+    ) -> List[ReadLatency]:
+        statement = "SELECT day, n, total_seconds, max_seconds FROM read_latency"
+        clauses, params = [], []
+        if since is not None:
+            clauses.append("day >= ?")
+            params.append(since.isoformat())
+        if before is not None:
+            clauses.append("day < ?")
+            params.append(before.isoformat())
+        if clauses:
+            statement += " WHERE " + " AND ".join(clauses)
+        with self._lock:
+            rows = self._conn.execute(statement + " ORDER BY day", params).fetchall()
+        return [ReadLatency(*row) for row in rows]
+
+    def synced_at(self, key: str = "synced_at") -> Optional[datetime.datetime]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM meta WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        return datetime.datetime.fromisoformat(row[0])
+
+    def mark_synced(
+        self, at: Optional[datetime.datetime] = None, key: str = "synced_at"
+    ):
+        at = at or datetime.datetime.now(datetime.timezone.utc)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                (key, at.isoformat()),
+            )
+
+    def close(self):
+        self._conn.close()
+
+    def _migrate(self):
+        """
+        Adds any columns missing from databases created by older versions.
+        """
+        existing = {
+            row[1] for row in self._conn.execute("PRAGMA table_info(notifications)")
+        }
+        for column, definition in self._added_columns.items():
+            if column not in existing:
+                self._conn.execute(
+                    "ALTER TABLE notifications ADD COLUMN {} {}".format(
+                        column, definition
+                    )
+                )
+
+    def _create_counts(self):
+        """
+        Creates counts table and triggers, counting notifications
+        already stored by versions without them.
+        """
+        exists = self._conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'counts'"
+        ).fetchone()
+        for statement in self._counts_schema:
+            self._conn.execute(statement)
+        if exists:
+            return
+        for prefix, column in (
+            ("", "'unread'"),
+            ("reason:", "reason"),
+            ("type:", "type"),
+        ):
+            self._conn.execute(
+                "INSERT INTO counts (key, n) "
+                "SELECT ? || COALESCE({0}, ''), COUNT(*) FROM notifications "
+                "WHERE unread = 1 GROUP BY 1".format(column),
+                (prefix,),
+            )
+
+    def _create_stats(self):
+        """
+        Creates time bucketed aggregates and their triggers, counting
+        notifications already stored by versions without them. Only
+        the last day those were updated on is known, and how long they
+        took to be read isn't, so isn't counted.
+        """
+        tables = {
+            row[0]
+            for row in self._conn.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'table'"
+            )
+        }
+        for trigger in self._dropped_triggers:
+            self._conn.execute("DROP TRIGGER IF EXISTS {}".format(trigger))
+        for statement in self._stats_schema:
+            self._conn.execute(statement)
+        if "daily_counts" not in tables:
+            self._conn.execute(
+                "INSERT INTO daily_counts (day, org, repository, reason, n, unread) "
+                "SELECT COALESCE(date(updated_at), ''), COALESCE(org, ''), "
+                "COALESCE(repository, ''), COALESCE(reason, ''), COUNT(*), "
+                "SUM(unread = 1) FROM notifications "
+                "GROUP BY 1, 2, 3, 4"
+            )
+        if "activity" not in tables:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO activity (thread_id, day, org, repository, reason) "
+                "SELECT thread_id, COALESCE(date(updated_at), ''), COALESCE(org, ''), "
+                "COALESCE(repository, ''), COALESCE(reason, '') FROM notifications"
+            )
+        if "review_requests" not in tables:
+            self._conn.execute(
+                "INSERT INTO review_requests (thread_id, requested_at) "
+                "SELECT thread_id, updated_at FROM notifications "
+                "WHERE reason = 'review_requested' AND unread = 1"
+            )
+
+    def _existing_records(self, thread_ids: List[str]) -> dict:
+        """
+        Gets stored records for given thread ids, keyed by thread id.
+        """
+        res = {}
+        columns = ", ".join(Notification.record_fields)
+        # Stay under SQLite's default limit on number of bound parameters
+        for i in range(0, len(thread_ids), 500):
+            chunk = thread_ids[i : i + 500]  # noqa
+            statement = "SELECT {} FROM notifications WHERE thread_id IN ({})".format(
+                columns, ", ".join("?" for _ in chunk)
+            )
+            for row in self._conn.execute(statement, chunk):
+                res[row[0]] = tuple(row)
+        return res
+
+    def _match_expression(self, query: str) -> str:
+        """
+        Converts user query into FTS5 match expression. Every term
+        must match (as a prefix), and terms can be limited to a
+        column with `column:term`, ie `repo:airflow flaky test`.
+        """
+        terms = []
+        for token in query.split():
+            column = None
+            if ":" in token:
+                prefix, value = token.split(":", 1)
+                if prefix.lower() in self._search_columns:
+                    column = self._search_columns[prefix.lower()]
+                    token = value
+            if token == "":
+                continue
+            term = '"{}"*'.format(token.replace('"', '""'))
+            if column is not None:
+                term = "{} : {}".format(column, term)
+            terms.append(term)
+        return " AND ".join(terms)
+
+    @staticmethod
+    def _dump_record(record: tuple) -> tuple:
+        """
+        Converts notification record into values for SQLite.
+        """
+        res = list(record)
+        for i, f in enumerate(Notification.record_fields):
+            if f in _bool_fields:
+                res[i] = int(bool(res[i]))
+            elif f in _datetime_fields:
+                res[i] = (
+                    res[i].isoformat() if isinstance(res[i], datetime.datetime) else ""
+                )
+        return tuple(res)
+
+    @staticmethod
+    def _load_record(row: tuple) -> tuple:
+        """
+        Converts row from SQLite back into notification record.
+        """
+        res = list(row)
+        for i, f in enumerate(Notification.record_fields):
+            if f in _bool_fields:
+                res[i] = bool(res[i])
+            elif f in _datetime_fields:
+                res[i] = (
+                    datetime.datetime.fromisoformat(res[i])
+                    if res[i]
+                    else datetime.datetime.min
+                )
+        return tuple(res)
+
+
+_bool_fields = {"is_pull", "is_issue", "unread"}
+
+_datetime_fields = {"updated_at"}
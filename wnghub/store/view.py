@@ -0,0 +1,121 @@
+import threading
+from typing import Dict, List, Optional
+
+from wnghub.model.notification import Notification
+from wnghub.model.query import QueryFilter
+from wnghub.store.base import BaseNotificationStore
+
+
+class MaterializedView(object):
+    """
+    Result set of a saved view's query over locally stored
+    notifications.
+
+    The result set is built once, and then kept up to date by
+    applying the view's query only to notifications that are new
+    or changed, rather than rerunning it over everything.
+
+    :param name: name of the view
+    :type name: str
+    :param query: the view's filter query
+    :type query: str
+    """
+
+    def __init__(self, name: str, query: str):
+        self.name = name
+        self.filter = QueryFilter(query)
+        self._items: Dict[str, Notification] = {}
+        self._sorted: Optional[List[Notification]] = []
+        self._lock = threading.Lock()
+
+    def load(self, notifications: List[Notification]):
+        """
+        Replaces result set with matches from `notifications`.
+
+        :param notifications: all stored notifications
+        :type notifications: List[Notification]
+        """
+        with self._lock:
+            self._items = {n.thread_id: n for n in self.filter.apply(notifications)}
+            self._sorted = None
+
+    def apply_delta(self, delta: List[Notification]):
+        """
+        Updates result set with new or changed notifications.
+
+        :param delta: notifications that are new or changed
+        :type delta: List[Notification]
+        """
+        predicate = self.filter.predicate
+        with self._lock:
+            for n in delta:
+                if predicate(n):
+                    self._items[n.thread_id] = n
+                    self._sorted = None
+                elif self._items.pop(n.thread_id, None) is not None:
+                    self._sorted = None
+
+    def notifications(self, limit: Optional[int] = None) -> List[Notification]:
+        """
+        Gets notifications in view, most recently updated first.
+
+        :param limit: max number of notifications to return
+        :type limit: Optional[int]
+        :return: List[Notification]
+        """
+        with self._lock:
+            if self._sorted is None:
+                self._sorted = sorted(
+                    self._items.values(), key=lambda n: n.updated_at, reverse=True
+                )
+            res = self._sorted
+        return res if limit is None else res[0:limit]
+
+    def __len__(self):
+        return len(self._items)
+
+
+class MaterializedViews(object):
+    """
+    Collection of materialized saved views. When given a store,
+    views are loaded from it and kept up to date every time
+    notifications are saved to it.
+
+    :param views: mapping of view name to query
+    :type views: Dict[str, str]
+    :param store: optional store to load and follow
+    :type store: Optional[BaseNotificationStore]
+    """
+
+    def __init__(
+        self, views: Dict[str, str], store: Optional[BaseNotificationStore] = None
+    ):
+        self.views = {
+            name: MaterializedView(name, query) for name, query in views.items()
+        }
+        if store is not None:
+            self.load(store.notifications())
+            store.add_listener(self.apply_delta)
+
+    def load(self, notifications: List[Notification]):
+        for view in self.views.values():
+            view.load(notifications)
+
+    def apply_delta(self, delta: List[Notification]):
+        for view in self.views.values():
+            view.apply_delta(delta)
+
+    def get(self, name: str) -> MaterializedView:
+        """
+        Gets view by name.
+
+        :raises KeyError: if there is no view with that name
+        """
+        if name not in self.views:
+            raise KeyError(
+                "No saved view: {}. Possible values: {}".format(name, list(self.views))
+            )
+        return self.views[name]
+
+    def names(self) -> List[str]:
+        return list(self.views)
@@ -0,0 +1,137 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, List, Sequence
+
+import click
+
+from wnghub.client.github import GithubApiClient
+from wnghub.testing.server import FakeGithubServer, generate_notifications
+
+
+@dataclass
+class LoadTestResult:
+    """
+    Throughput and latency of the client at one concurrency level.
+    """
+
+    concurrency: int
+    requests: int
+    errors: int
+    seconds: float
+    p50_ms: float
+    p95_ms: float
+
+    @property
+    def requests_per_second(self) -> float:
+        return self.requests / self.seconds if self.seconds > 0 else 0.0
+
+
+def run_load_test(
+    api_url: str,
+    auth_token: str = "token",
+    concurrency_levels: Sequence[int] = (1, 2, 4, 8),
+    requests_per_level: int = 100,
+    per_page: int = 100,
+    pages: int = 10,
+    client_factory: Callable[..., GithubApiClient] = GithubApiClient,
+) -> List[LoadTestResult]:
+    """
+    Measures how many notification pages per second clients can
+    fetch and parse at each concurrency level. Each worker thread
+    gets its own client, and requests cycle through `pages` pages.
+
+    :param api_url: url of the API to test against
+    :type api_url: str
+    :param concurrency_levels: numbers of concurrent workers to test
+    :type concurrency_levels: Sequence[int]
+    :param requests_per_level: number of requests per concurrency level
+    :type requests_per_level: int
+    :param per_page: notifications per page
+    :type per_page: int
+    :param pages: number of distinct pages to cycle through
+    :type pages: int
+    :param client_factory: creates a client from (auth_token, api_url=)
+    :return: List[LoadTestResult]
+    """
+    results = []
+    for concurrency in concurrency_levels:
+        clients = [
+            client_factory(auth_token, api_url=api_url) for _ in range(concurrency)
+        ]
+
+        def fetch(i):
+            client = clients[i % concurrency]
+            client.clear_cache()
+            start = time.perf_counter()
+            try:
+                client.get_notifications(
+                    all=True, page=i % pages + 1, per_page=per_page
+                )
+                error = False
+            except Exception:
+                error = True
+            return time.perf_counter() - start, error
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            timings = list(executor.map(fetch, range(requests_per_level)))
+        seconds = time.perf_counter() - start
+        latencies = sorted(t for t, _ in timings)
+        results.append(
+            LoadTestResult(
+                concurrency=concurrency,
+                requests=len(timings),
+                errors=sum(1 for _, error in timings if error),
+                seconds=seconds,
+                p50_ms=_percentile(latencies, 0.50) * 1000,
+                p95_ms=_percentile(latencies, 0.95) * 1000,
+            )
+        )
+    return results
+
+
+def _percentile(values: List[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    return values[min(int(len(values) * fraction), len(values) - 1)]
+
+
+@click.command(help="Load tests the Github client against a local fake server.")
+@click.option("--notifications", default=1000, help="Notifications to serve.")
+@click.option("--concurrency", default="1,2,4,8", help="Comma separated levels.")
+@click.option("--requests", "num_requests", default=100, help="Requests per level.")
+@click.option("--per-page", default=100, help="Notifications per page.")
+@click.option("--latency", default=0.0, help="Server latency per request (s).")
+@click.option("--failure-rate", default=0.0, help="Fraction of requests failing.")
+def main(notifications, concurrency, num_requests, per_page, latency, failure_rate):
+    levels = [int(c) for c in concurrency.split(",")]
+    with FakeGithubServer(
+        generate_notifications(notifications),
+        latency=latency,
+        failure_rate=failure_rate,
+        rate_limit=len(levels) * num_requests + 1,
+    ) as server:
+        results = run_load_test(
+            server.url,
+            concurrency_levels=levels,
+            requests_per_level=num_requests,
+            per_page=per_page,
+            pages=max(notifications // per_page, 1),
+        )
+    click.echo("concurrency  requests  errors  req/s     p50 ms   p95 ms")
+    for r in results:
+        click.echo(
+            "{:<12} {:<9} {:<7} {:<9.1f} {:<8.1f} {:<8.1f}".format(
+                r.concurrency,
+                r.requests,
+                r.errors,
+                r.requests_per_second,
+                r.p50_ms,
+                r.p95_ms,
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,366 @@
+import datetime
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Set
+from urllib.parse import parse_qs, urlencode, urlparse
+
+
+"""
+Reasons Github counts as the user directly participating in a thread.
+"""
+PARTICIPATING_REASONS = {
+    "assign",
+    "author",
+    "comment",
+    "mention",
+    "review_requested",
+    "state_change",
+    "team_mention",
+}
+
+_reasons = ["subscribed", "mention", "review_requested", "author", "comment"]
+
+
+def generate_notifications(
+    n: int, seed: int = 0, orgs: int = 5, repos_per_org: int = 10
+) -> List[dict]:
+    """
+    Generates `n` notifications shaped like the ones returned by
+    Github's notifications endpoint, most recently updated first.
+
+    :param n: number of notifications to generate
+    :type n: int
+    :param seed: seed for random values
+    :type seed: int
+    :return: List[dict]
+    """
+    rand = random.Random(seed)
+    start = datetime.datetime(2020, 11, 20, tzinfo=datetime.timezone.utc)
+    res = []
+    for i in range(n):
+        org = "org{}".format(rand.randrange(orgs))
+        repo = "repo{}".format(rand.randrange(repos_per_org))
+        is_pull = rand.random() < 0.5
+        number = i + 1
+        thread_id = str(1000000 + i)
+        res.append(
+            {
+                "id": thread_id,
+                "unread": rand.random() < 0.7,
+                "reason": rand.choice(_reasons),
+                "updated_at": (start - datetime.timedelta(minutes=i))
+                .isoformat()
+                .replace("+00:00", "Z"),
+                "last_read_at": None,
+                "subject": {
+                    "title": "Notification number {} in {}/{}".format(i, org, repo),
+                    "url": "https://api.github.com/repos/{}/{}/{}/{}".format(
+                        org, repo, "pulls" if is_pull else "issues", number
+                    ),
+                    "type": "PullRequest" if is_pull else "Issue",
+                },
+                "repository": {
+                    "name": repo,
+                    "full_name": "{}/{}".format(org, repo),
+                    "owner": {"login": org},
+                },
+                "url": "https://api.github.com/notifications/threads/" + thread_id,
+                "subscription_url": "https://api.github.com/notifications/threads/"
+                + thread_id
+                + "/subscription",
+            }
+        )
+    return res
+
+
+class FakeGithubServer(object):
+    """
+    Local stand-in for Github's notifications API, for integration
+    and load testing without hitting the network.
+
+    Implements `GET /notifications` (with `all`, `participating`,
+    `since`, `before`, `page`, `per_page`, `Link` headers and
+    ETags), `PATCH /notifications/threads/{id}`, muting threads with
+    `PUT /notifications/threads/{id}/subscription` and unwatching
+    repositories with `DELETE /repos/{org}/{repo}/subscription`, which
+    hide their notifications from later lists. Every response
+    has rate limit headers, and latency and failures can be injected.
+
+    Usable as a context manager:
+
+        with FakeGithubServer(generate_notifications(500)) as server:
+            client = GithubApiClient("token", api_url=server.url)
+
+    :param notifications: notifications to serve, in Github's format
+    :type notifications: List[dict]
+    :param auth_token: if set, requests with another token get a 401
+    :type auth_token: Optional[str]
+    :param latency: seconds to wait before each response
+    :type latency: float
+    :param failure_rate: fraction of requests that fail with a 500
+    :type failure_rate: float
+    :param rate_limit: number of requests allowed before 403s
+    :type rate_limit: int
+    :param seed: seed for injected failures
+    :type seed: int
+    """
+
+    _max_per_page = 100
+
+    def __init__(
+        self,
+        notifications: Optional[List[dict]] = None,
+        auth_token: Optional[str] = None,
+        latency: float = 0.0,
+        failure_rate: float = 0.0,
+        rate_limit: int = 5000,
+        seed: int = 0,
+    ):
+        self.notifications: Dict[str, dict] = {
+            n["id"]: n for n in (notifications or [])
+        }
+        self.auth_token = auth_token
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.rate_limit = rate_limit
+        self.rate_limit_remaining = rate_limit
+        self.requests: List[tuple] = []
+        self.ignored_threads: Set[str] = set()
+        self.unwatched_repositories: Set[str] = set()
+        self._fail_next = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), _handler(self))
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[0:2]
+        return "http://{}:{}".format(host, port)
+
+    def start(self):
+        """
+        Starts serving on a background thread.
+        """
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, args=(0.05,), daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def fail_next(self, n: int = 1):
+        """
+        Makes the next `n` requests fail with a 500.
+        """
+        with self._lock:
+            self._fail_next += n
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def _before_request(self, method: str, path: str, headers) -> Optional[tuple]:
+        """
+        Records request, applies latency, auth, rate limit and
+        injected failures.
+
+        :return: error response (status, body) or None to continue
+        """
+        with self._lock:
+            self.requests.append((method, path))
+            fail = self._fail_next > 0 or (
+                self.failure_rate > 0 and self._random.random() < self.failure_rate
+            )
+            if self._fail_next > 0:
+                self._fail_next -= 1
+            self.rate_limit_remaining -= 1
+            remaining = self.rate_limit_remaining
+        if self.latency > 0:
+            time.sleep(self.latency)
+        if self.auth_token is not None and headers.get(
+            "Authorization"
+        ) != "token {}".format(self.auth_token):
+            return 401, {"message": "Bad credentials"}
+        if remaining < 0:
+            return 403, {"message": "API rate limit exceeded"}
+        if fail:
+            return 500, {"message": "Server Error"}
+        return None
+
+    def _list(self, query: Dict[str, str]) -> List[dict]:
+        """
+        Gets notifications matching query params, most recent first.
+        """
+        all = query.get("all") == "true"
+        participating = query.get("participating") == "true"
+        since = _parse_time(query.get("since"))
+        before = _parse_time(query.get("before"))
+        with self._lock:
+            notifications = list(self.notifications.values())
+        res = []
+        for n in notifications:
+            updated_at = _parse_time(n["updated_at"])
+            if not all and not n["unread"]:
+                continue
+            if n["id"] in self.ignored_threads:
+                continue
+            if (
+                n["repository"]["full_name"] in self.unwatched_repositories
+                and n["reason"] not in PARTICIPATING_REASONS
+            ):
+                continue
+            if participating and n["reason"] not in PARTICIPATING_REASONS:
+                continue
+            if since is not None and updated_at < since:
+                continue
+            if before is not None and updated_at >= before:
+                continue
+            res.append(n)
+        res.sort(key=lambda n: n["updated_at"], reverse=True)
+        return res
+
+    def _mark_read(self, thread_id: str) -> bool:
+        with self._lock:
+            n = self.notifications.get(thread_id)
+            if n is None:
+                return False
+            n["unread"] = False
+            return True
+
+    def _ignore(self, thread_id: str) -> bool:
+        with self._lock:
+            if thread_id not in self.notifications:
+                return False
+            self.ignored_threads.add(thread_id)
+            return True
+
+    def _unwatch(self, full_name: str):
+        with self._lock:
+            self.unwatched_repositories.add(full_name)
+
+
+def _handler(server: FakeGithubServer):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            error = server._before_request("GET", url.path, self.headers)
+            if error is not None:
+                return self._send(*error)
+            if url.path != "/notifications":
+                return self._send(404, {"message": "Not Found"})
+            query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+            try:
+                page = max(int(query.get("page", 1)), 1)
+                per_page = min(int(query.get("per_page", 50)), server._max_per_page)
+            except ValueError:
+                return self._send(422, {"message": "Validation Failed"})
+            notifications = server._list(query)
+            last_page = max((len(notifications) + per_page - 1) // per_page, 1)
+            body = notifications[(page - 1) * per_page : page * per_page]  # noqa
+            raw = json.dumps(body).encode("utf-8")
+            etag = '"{}"'.format(hashlib.sha1(raw).hexdigest())
+            headers = {"ETag": etag, "Link": self._links(url, query, page, last_page)}
+            if self.headers.get("If-None-Match") == etag:
+                return self._send(304, None, headers)
+            return self._send(200, raw, headers)
+
+        def do_PATCH(self):
+            url = urlparse(self.path)
+            self._read_body()
+            error = server._before_request("PATCH", url.path, self.headers)
+            if error is not None:
+                return self._send(*error)
+            match = re.match(r"^/notifications/threads/([^/]+)$", url.path)
+            if match is None or not server._mark_read(match.group(1)):
+                return self._send(404, {"message": "Not Found"})
+            return self._send(205, None)
+
+        def do_PUT(self):
+            url = urlparse(self.path)
+            self._read_body()
+            error = server._before_request("PUT", url.path, self.headers)
+            if error is not None:
+                return self._send(*error)
+            match = re.match(r"^/notifications/threads/([^/]+)/subscription$", url.path)
+            if match is None or not server._ignore(match.group(1)):
+                return self._send(404, {"message": "Not Found"})
+            return self._send(200, {"subscribed": False, "ignored": True})
+
+        def do_DELETE(self):
+            url = urlparse(self.path)
+            error = server._before_request("DELETE", url.path, self.headers)
+            if error is not None:
+                return self._send(*error)
+            match = re.match(r"^/repos/([^/]+/[^/]+)/subscription$", url.path)
+            if match is None:
+                return self._send(404, {"message": "Not Found"})
+            server._unwatch(match.group(1))
+            return self._send(204, None)
+
+        def _read_body(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            if length:
+                self.rfile.read(length)
+
+        def _links(self, url, query, page, last_page) -> str:
+            def link(p, rel):
+                params = dict(query, page=p)
+                return '<{}{}?{}>; rel="{}"'.format(
+                    server.url, url.path, urlencode(params), rel
+                )
+
+            links = []
+            if page > 1:
+                links.append(link(page - 1, "prev"))
+                links.append(link(1, "first"))
+            if page < last_page:
+                links.append(link(page + 1, "next"))
+                links.append(link(last_page, "last"))
+            return ", ".join(links)
+
+        def _send(self, status, body, headers=None):
+            if isinstance(body, (dict, list)):
+                body = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("X-RateLimit-Limit", str(server.rate_limit))
+            self.send_header(
+                "X-RateLimit-Remaining", str(max(server.rate_limit_remaining, 0))
+            )
+            self.send_header("X-RateLimit-Reset", str(int(time.time()) + 3600))
+            for name, value in (headers or {}).items():
+                if value:
+                    self.send_header(name, value)
+            body = body or b""
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            if body:
+                self.wfile.write(body)
+
+    return Handler
+
+
+def _parse_time(value: Optional[str]) -> Optional[datetime.datetime]:
+    if not value:
+        return None
+    res = datetime.datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if res.tzinfo is None:
+        res = res.replace(tzinfo=datetime.timezone.utc)
+    return res
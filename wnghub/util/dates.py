@@ -0,0 +1,26 @@
+import datetime
+from typing import Optional
+
+
+def as_utc(dt: datetime.datetime) -> datetime.datetime:
+    """
+    Treats naive datetimes as UTC, so they can be compared with
+    the timezone aware datetimes returned by Github.
+    """
+    if dt.tzinfo is None:
+        return dt.replace(tzinfo=datetime.timezone.utc)
+    return dt
+
+
+def timestamp(value: Optional[datetime.datetime], missing: float = 0.0) -> float:
+    """
+    Gets epoch seconds of a datetime which may be naive, aware or
+    missing, treating naive datetimes as UTC.
+
+    :param value: datetime, ie a notification's `updated_at`
+    :param missing: seconds to return if `value` isn't a datetime
+    :return: float
+    """
+    if not isinstance(value, datetime.datetime):
+        return missing
+    return as_utc(value).timestamp()
@@ -0,0 +1,135 @@
+import os
+import sys
+from typing import Callable, Iterator, List, Optional, Sequence
+
+
+def terminal_columns(stream=None) -> Optional[int]:
+    """
+    Gets the width of the terminal attached to `stream`.
+
+    :param stream: stream to check, by default `sys.stdout`
+    :return: number of columns, or None if no terminal is attached
+    """
+    stream = stream or sys.stdout
+    try:
+        if not stream.isatty():
+            return None
+        return os.get_terminal_size(stream.fileno()).columns
+    except (AttributeError, OSError, ValueError):
+        return None
+
+
+class TableRenderer(object):
+    """
+    Renders rows of cells as a bordered text table.
+
+    Column widths are computed in a single pass over the rows,
+    and if `max_width` is set, shrinkable columns are truncated
+    (widest first) so that the table fits. Output is produced
+    line by line so it can be written out in chunks rather
+    than built into one large string.
+
+    :param max_width: max width of rendered table, or None for no limit
+    :type max_width: Optional[int]
+    :param chunk_lines: number of lines to write per call to `write`
+    :type chunk_lines: int
+    """
+
+    _ellipsis = "..."
+
+    _min_col_width = 5
+
+    def __init__(self, max_width: Optional[int] = None, chunk_lines: int = 500):
+        self.max_width = max_width
+        self.chunk_lines = chunk_lines
+
+    def render(
+        self,
+        headers: Sequence[str],
+        rows: Sequence[Sequence],
+        shrinkable: Sequence[int] = (),
+    ) -> Iterator[str]:
+        """
+        Renders table one line at a time.
+
+        :param headers: table headers
+        :type headers: Sequence[str]
+        :param rows: rows of cells. Cells are converted to `str`
+        :type rows: Sequence[Sequence]
+        :param shrinkable: indices of columns that may be truncated
+        :type shrinkable: Sequence[int]
+        :return: Iterator[str]
+        """
+        rows = [["" if c is None else str(c) for c in row] for row in rows]
+        widths = [len(h) for h in headers]
+        for row in rows:
+            for i, cell in enumerate(row):
+                if len(cell) > widths[i]:
+                    widths[i] = len(cell)
+        widths = self._fit_widths(headers, widths, shrinkable)
+        border = "+" + "+".join("-" * (w + 2) for w in widths) + "+"
+        yield border
+        yield self._format_row(headers, widths)
+        yield border
+        for row in rows:
+            yield self._format_row(row, widths)
+        yield border
+
+    def write(
+        self,
+        headers: Sequence[str],
+        rows: Sequence[Sequence],
+        write: Callable[[str], None],
+        shrinkable: Sequence[int] = (),
+    ):
+        """
+        Renders table and passes it to `write` in chunks of
+        `chunk_lines` lines.
+
+        :param write: function to call with each chunk
+        :type write: Callable[[str], None]
+        """
+        chunk: List[str] = []
+        for line in self.render(headers, rows, shrinkable=shrinkable):
+            chunk.append(line)
+            if len(chunk) >= self.chunk_lines:
+                write("\n".join(chunk))
+                chunk = []
+        if chunk:
+            write("\n".join(chunk))
+
+    def _fit_widths(self, headers, widths, shrinkable):
+        """
+        Shrinks widths of shrinkable columns until table fits
+        in `max_width`, always shrinking the widest column first.
+        """
+        if self.max_width is None:
+            return widths
+        excess = sum(widths) + 3 * len(widths) + 1 - self.max_width
+        widths = list(widths)
+        while excess > 0:
+            candidates = [
+                i
+                for i in shrinkable
+                if widths[i] > max(self._min_col_width, len(headers[i]))
+            ]
+            if not candidates:
+                break
+            candidates.sort(key=lambda i: widths[i], reverse=True)
+            widest = candidates[0]
+            floor = max(self._min_col_width, len(headers[widest]))
+            if len(candidates) > 1:
+                floor = max(floor, widths[candidates[1]])
+            step = min(excess, widths[widest] - floor) or 1
+            widths[widest] -= step
+            excess -= step
+        return widths
+
+    def _format_row(self, row, widths):
+        cells = []
+        for cell, width in zip(row, widths):
+            if len(cell) > width:
+                cell = cell[: max(width - len(self._ellipsis), 0)] + self._ellipsis
+                cell = cell[:width]
+            cells.append(cell.center(width))
+        return "| " + " | ".join(cells) + " |"